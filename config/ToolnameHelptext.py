@@ -30,9 +30,14 @@ header = (
 
 usage = """ janus [options] solver_clis seed_file   [optionally, more seed files]
        janus [options] solver_clis seed_folder [optionally, more seed folders]
+       janus index [options] seed_file/seed_folder [optionally, more]
        solver_clis := "solver_cli1;solver_cli2;...;solver_clik"
 """
 
+index_usage = """ janus index [options] seed_file   [optionally, more seed files]
+       janus index [options] seed_folder [optionally, more seed folders]
+"""
+
 short_description = """TODO: short description"""  # noqa: E501
 
 long_description = """
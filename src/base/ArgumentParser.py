@@ -20,6 +20,7 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
+import os
 import argparse
 
 from src.base.Exitcodes import ERR_USAGE
@@ -65,6 +66,31 @@ def add_args(parser, rootpath, current_dir):
         metavar="secs",
         type=int,
     )
+    parser.add_argument(
+        "-at",
+        "--adaptive-timeout",
+        type=float,
+        default=None,
+        metavar="factor",
+        help="Set the timeout for the mutants of a seed to factor times the solver's time on the seed, \
+        at least '--min-timeout' and at most '--timeout' (default: off).",
+    )
+    parser.add_argument(
+        "-mt",
+        "--min-timeout",
+        type=float,
+        default=1.0,
+        metavar="secs",
+        help="Lower bound of adaptive timeouts (default: 1.0).",
+    )
+    parser.add_argument(
+        "-mto",
+        "--max-timeouts",
+        type=int,
+        default=32,
+        metavar="N",
+        help="Number of solver timeouts after which a seed is dropped (default: 32).",
+    )
     parser.add_argument(
         "-b",
         "--bugsfolder",
@@ -77,6 +103,22 @@ def add_args(parser, rootpath, current_dir):
         metavar="path_to_folder",
         default=current_dir + "/scratch",
     )
+    add_seed_args(parser, current_dir)
+    parser.add_argument(
+        "-mc",
+        "--mutant-cache-size",
+        type=int,
+        default=10000,
+        metavar="N",
+        help="Number of solver results on mutants kept in memory to skip re-solving duplicate mutants \
+        (default: 10000). Use 0 to disable the mutant cache.",
+    )
+    parser.add_argument(
+        "-dmc",
+        "--disk-mutant-cache",
+        action="store_true",
+        help="Additionally store solver results on mutants in the cache folder.",
+    )
     parser.add_argument(
         "-q",
         "--quiet",
@@ -87,12 +129,6 @@ def add_args(parser, rootpath, current_dir):
         "--no-log",
         action="store_true",
     )
-    parser.add_argument(
-        "-L",
-        "--file-size-limit",
-        metavar="num_bytes",
-        default=100000,
-    )
     parser.add_argument(
         "-i",
         "--iterations",
@@ -126,12 +162,165 @@ def add_args(parser, rootpath, current_dir):
               A standard setup is to use the latest release of a solver here and configure trunk version(s) as solver(s)\
               to be tested.",
     )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        metavar="N",
+        help="Number of worker processes fuzzing in parallel (default: 1). \
+        With N > 1 a supervisor process hands out the seeds to N workers, merges their statistics \
+        and restarts workers that die.",
+    )
+    parser.add_argument(
+        "-sj",
+        "--solver-jobs",
+        type=int,
+        default=1,
+        metavar="N",
+        help="Number of solver runs executed concurrently per mutant (default: 1). \
+        With N > 1 all configured solvers and the completeness-regression baseline are launched at once \
+        on a pool of N workers. Results are still checked in the order of the solver configurations.",
+    )
+    parser.add_argument(
+        "-pj",
+        "--parse-jobs",
+        type=int,
+        default=1,
+        metavar="N",
+        help="Number of worker processes parsing the upcoming seeds while the current seed is fuzzed \
+        (default: 1). A parse running past its deadline is cancelled by killing its worker. With 0 the \
+        seeds are parsed in the fuzzer's own process. Workers of '--jobs' always parse in their own process.",
+    )
+    parser.add_argument(
+        "-mb",
+        "--mutant-batch",
+        type=int,
+        default=1,
+        metavar="K",
+        help="Number of mutants generated in a row before their results are checked (default: 1). \
+        The solver runs of a mutant are submitted as soon as it is generated, so with '--solver-jobs' > 1 \
+        the solvers run while the next mutants are generated. A batch never spans two walks, mutants \
+        identical to an earlier one of the batch are not solved again.",
+    )
+    parser.add_argument(
+        "-e",
+        "--engine",
+        choices=["threads", "asyncio"],
+        default="threads",
+        help="Engine executing the solver runs (default: threads). 'asyncio' runs up to '--solver-jobs' \
+        solver processes from a single event loop and kills runs that can no longer influence the \
+        outcome, e.g. the remaining solvers after a crash or the completeness-regression baseline \
+        once no solver returned unknown.",
+    )
+    parser.add_argument(
+        "-d",
+        "--delivery",
+        choices=["file", "stdin", "memfd"],
+        default="file",
+        help="How mutants are passed to the solvers (default: file). 'file' writes every mutant to the \
+        scratch folder, 'stdin' pipes it to the solvers' stdin and 'memfd' passes an in-memory file \
+        (Linux only). Files in the bug folder are written for bug reports only.",
+    )
+    parser.add_argument(
+        "-ps",
+        "--persistent-solvers",
+        action="store_true",
+        help="Keep solver processes alive across mutants instead of starting a new process per solver call. \
+        Mutants are sent to the solvers' stdin separated by (reset). Note that this puts the solvers into \
+        incremental mode, which may change their behavior.",
+    )
+    parser.add_argument(
+        "-mq",
+        "--max-solver-queries",
+        type=int,
+        default=100,
+        metavar="N",
+        help="Number of queries after which a persistent solver process is restarted (default: 100).",
+    )
+    parser.add_argument(
+        "-ss",
+        "--seed-schedule",
+        choices=["uniform", "yield"],
+        default="uniform",
+        help="Order in which seeds are fuzzed (default: uniform). 'uniform' visits every seed once in \
+        random order. 'yield' prefers seeds with a high number of bug triggers per solver second and \
+        may revisit them, de-prioritizing seeds that time out or fail to parse. Its state is kept in \
+        the cache folder for the next campaign.",
+    )
     parser.add_argument(
         "-rs",
         "--rule-set",
         default=None,
         help="Restrict rule set to a fixed subset (default: None)",
     )
+    parser.add_argument(
+        "-rsc",
+        "--rule-schedule",
+        choices=["uniform", "ucb", "thompson"],
+        default="uniform",
+        help="Order in which the rules are tried on a mutant (default: uniform). 'ucb' and 'thompson' \
+        learn which rules lead to unknowns and bugs in the tested solvers and prefer them.",
+    )
+    parser.add_argument(
+        "-rst",
+        "--rule-stats",
+        metavar="path",
+        default=None,
+        help="Write per-rule and per-solver statistics of the rule scheduler as JSON to path.",
+    )
+
+
+def add_seed_args(parser, current_dir):
+    """
+    Options on reading the seeds, shared by fuzzing and 'janus index'.
+    """
+    parser.add_argument(
+        "-c",
+        "--cachefolder",
+        metavar="path_to_folder",
+        default=current_dir + "/cache",
+        help="Folder storing solver results and parsed seeds shared across campaigns.",
+    )
+    parser.add_argument(
+        "-nc",
+        "--no-disk-cache",
+        action="store_true",
+        help="Keep cached solver results in memory only and do not cache parsed seeds.",
+    )
+    parser.add_argument(
+        "-L",
+        "--file-size-limit",
+        metavar="num_bytes",
+        type=int,
+        default=100000,
+    )
+    parser.add_argument(
+        "-P",
+        "--parser",
+        choices=["antlr", "fast"],
+        default="antlr",
+        help="Parser for the seeds (default: antlr). 'fast' uses a hand-written S-expression parser \
+        producing the same ASTs and falls back to ANTLR on syntax it does not support, e.g. labels, \
+        match terms and datatype declarations.",
+    )
+    parser.add_argument(
+        "-sp",
+        "--stream-parse",
+        action="store_true",
+        help="Parse the seeds one top-level command at a time and skip the commands removed before \
+        fuzzing, e.g. set-info and get-model, without parsing them. Keeps the memory for parsing \
+        large incremental seeds bounded, use with a larger '--file-size-limit'.",
+    )
+    parser.add_argument(
+        "-si",
+        "--seed-index",
+        metavar="path",
+        default=None,
+        help="Seed index built by 'janus index' (default: seed-index.json in the cache folder). \
+        Fuzzing campaigns skip the seeds the index knows to be unusable, e.g. seeds that fail to \
+        parse or none of the rules of '--rule-set' applies to.",
+    )
 
 
 def build_janus_parser(rootpath, current_dir, usage):
@@ -144,3 +333,31 @@ def build_janus_parser(rootpath, current_dir, usage):
     add_args(parser, current_dir, rootpath)
 
     return parser
+
+
+def add_index_args(parser, current_dir):
+    parser.add_argument(
+        "PATH_TO_SEEDS",
+        nargs="+",
+        metavar="seed_file/seed_folder",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        metavar="N",
+        help="Number of seeds parsed and profiled in parallel (default: number of CPUs).",
+    )
+    add_seed_args(parser, current_dir)
+
+
+def build_index_parser(rootpath, current_dir, usage):
+    parser = ArgumentParser(
+        prog="janus index",
+        description="Parses, typechecks and profiles the seeds and records them in the seed index.",
+        usage=usage,
+    )
+    add_index_args(parser, rootpath)
+
+    return parser
@@ -48,12 +48,78 @@ def check_timeout():
         exit(ERR_USAGE)
 
 
+def check_adaptive_timeout():
+    if args.adaptive_timeout is not None and args.adaptive_timeout <= 0:
+        print("error: adaptive timeout factor should be a positive number", flush=True)
+        exit(ERR_USAGE)
+    if args.min_timeout <= 0 or args.min_timeout > args.timeout:
+        print(
+            "error: min timeout should be a positive number not exceeding the timeout",
+            flush=True,
+        )
+        exit(ERR_USAGE)
+    if args.max_timeouts <= 0:
+        print("error: max timeouts should be a positive number", flush=True)
+        exit(ERR_USAGE)
+
+
 def check_iterations():
     if args.iterations <= 0:
         print("error: iterations should not be a negative number zero", flush=True)
         exit(ERR_USAGE)
 
 
+def check_jobs():
+    if args.jobs <= 0:
+        print("error: jobs should be a positive number", flush=True)
+        exit(ERR_USAGE)
+
+
+def check_solver_jobs():
+    if args.solver_jobs <= 0:
+        print("error: solver jobs should be a positive number", flush=True)
+        exit(ERR_USAGE)
+
+
+def check_parse_jobs():
+    if args.parse_jobs < 0:
+        print("error: parse jobs should be a non-negative number", flush=True)
+        exit(ERR_USAGE)
+
+
+def check_mutant_batch():
+    if args.mutant_batch <= 0:
+        print("error: mutant batch should be a positive number", flush=True)
+        exit(ERR_USAGE)
+
+
+def check_max_solver_queries():
+    if args.max_solver_queries <= 0:
+        print("error: max solver queries should be a positive number", flush=True)
+        exit(ERR_USAGE)
+
+
+def check_mutant_cache_size():
+    if args.mutant_cache_size < 0:
+        print("error: mutant cache size should be a non-negative number", flush=True)
+        exit(ERR_USAGE)
+
+
+def check_delivery():
+    if args.delivery == "memfd" and not hasattr(os, "memfd_create"):
+        print("error: memfd delivery is not supported on this platform", flush=True)
+        exit(ERR_USAGE)
+
+
+def check_engine():
+    if args.engine == "asyncio" and args.persistent_solvers:
+        print(
+            "error: persistent solvers are not supported by the asyncio engine",
+            flush=True,
+        )
+        exit(ERR_USAGE)
+
+
 def create_bug_folder():
     if not os.path.isdir(args.bugsfolder):
         try:
@@ -81,6 +147,15 @@ def create_scratch_folder():
             exit(ERR_EXHAUSTED_DISK)
 
 
+def create_cache_folder():
+    if not args.no_disk_cache and not os.path.isdir(args.cachefolder):
+        try:
+            os.mkdir(args.cachefolder)
+        except Exception:
+            print("error: cache folder cannot be created", flush=True)
+            exit(ERR_EXHAUSTED_DISK)
+
+
 def get_seeds():
     temp_seeds = []
     for path in args.PATH_TO_SEEDS:
@@ -102,6 +177,15 @@ def get_seeds():
     args.PATH_TO_SEEDS = temp_seeds
 
 
+def check_seed_index():
+    if args.seed_index and not os.path.isdir(os.path.dirname(args.seed_index) or "."):
+        print(
+            'error: folder of the seed index "%s" does not exist' % (args.seed_index),
+            flush=True,
+        )
+        exit(ERR_USAGE)
+
+
 def check_diff_test():
     if len(args.PATH_TO_SEEDS) < 1:
         print("error: please provide at least one seed", flush=True)
@@ -118,10 +202,35 @@ def run_checks(parser):
     args.SOLVER_CLIS = map(lambda sol: sol.split("|"), args.SOLVER_CLIS.split(";"))
     args.SOLVER_CLIS = [sol + [None] * (2 - len(sol)) for sol in args.SOLVER_CLIS]
     check_timeout()
+    check_adaptive_timeout()
     check_iterations()
+    check_jobs()
+    check_solver_jobs()
+    check_parse_jobs()
+    check_mutant_batch()
+    check_max_solver_queries()
+    check_mutant_cache_size()
+    check_delivery()
+    check_engine()
     create_bug_folder()
     create_log_folder()
     create_scratch_folder()
+    create_cache_folder()
+    check_seed_index()
+    get_seeds()
+    check_diff_test()
+    return args
+
+
+def run_index_checks(parser, argv):
+    global args
+    args = parser.parse_args(argv)
+    if args.no_disk_cache and not args.seed_index:
+        parser.error("the seed index is kept in the cache folder, use --seed-index")
+
+    check_jobs()
+    create_cache_folder()
+    check_seed_index()
     get_seeds()
     check_diff_test()
     return args
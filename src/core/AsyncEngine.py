@@ -0,0 +1,95 @@
+# MIT License
+#
+# Copyright (c) [2020 - 2021] Mauro Bringolf and Dominik Winterer
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import os
+import sys
+import asyncio
+
+
+class AsyncRun:
+    """
+    Future-like handle of a coroutine running on an AsyncEngine. Waiting for
+    the result drives the event loop, so all other runs progress meanwhile.
+    """
+
+    def __init__(self, engine, task):
+        self.engine = engine
+        self.task = task
+
+    def result(self):
+        return self.engine.loop.run_until_complete(self.task)
+
+    def cancel(self):
+        """
+        Cancels the run, killing its solver process. The process is reaped on
+        the next call to AsyncEngine.settle().
+        """
+        return self.task.cancel()
+
+
+class AsyncEngine:
+    """
+    Runs solver coroutines on a private event loop from the fuzzer's thread,
+    at most max_jobs of them at a time. Exit codes of the solver processes
+    are collected through pidfds where available so that no watcher threads
+    are started.
+    """
+
+    def __init__(self, max_jobs):
+        self.loop = asyncio.new_event_loop()
+        self.max_jobs = max_jobs
+        self.semaphore = None
+        self.tasks = set()
+
+        # Python >= 3.12 uses pidfds by default, earlier versions would start
+        # a thread per solver process.
+        if sys.version_info < (3, 12) and hasattr(os, "pidfd_open"):
+            watcher = asyncio.PidfdChildWatcher()
+            watcher.attach_loop(self.loop)
+            asyncio.set_child_watcher(watcher)
+
+    async def limited(self, fn, *args):
+        if self.semaphore is None:
+            self.semaphore = asyncio.Semaphore(self.max_jobs)
+        async with self.semaphore:
+            return await fn(*args)
+
+    def submit(self, fn, *args):
+        task = self.loop.create_task(self.limited(fn, *args))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return AsyncRun(self, task)
+
+    def settle(self):
+        """
+        Runs the event loop until all cancelled or pending runs have finished.
+        """
+        if self.tasks:
+            self.loop.run_until_complete(
+                asyncio.gather(*self.tasks, return_exceptions=True)
+            )
+
+    def close(self):
+        for task in self.tasks:
+            task.cancel()
+        self.settle()
+        self.loop.close()
@@ -21,22 +21,31 @@
 # SOFTWARE.
 
 import os
-import subprocess
 import re
-import copy
 import time
-import shutil
-import random
 import signal
 import hashlib
 import logging
+import math
 import pathlib
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
 
 from src.core.Statistic import Statistic
 from src.core.Solver import Solver, SolverQueryResult, SolverResult
+from src.core.SolverPool import SolverPool, PersistentSolver
+from src.core.ResultCache import SeedResultCache, MutantResultCache
+from src.core.ParseCache import SeedParseCache
+from src.core.ParseService import ParseService, load_seed
+from src.core.Testcase import Testcase
+from src.core.AsyncEngine import AsyncEngine
+from src.core.SeedScheduler import (
+    make_seed_scheduler,
+    seed_feedback,
+    SCHEDULE_SAVE_INTERVAL,
+)
 
-from src.parsing.Parse import parse_file
-from src.parsing.Typechecker import typecheck
 
 from src.base.Utils import random_string, plain, escape
 from src.base.Exitcodes import OK_BUGS, OK_NOBUGS, ERR_EXHAUSTED_DISK
@@ -62,13 +71,15 @@ from src.core.FuzzerUtil import (
     in_duplicate_list,
     in_ignore_list,
     init_oracle,
+    Deferred,
+    Mutant,
 )
 from src.mutators.ImplicationBasedWeakeningStrengthening.ImplicationBasedWeakeningStrengthening import (
     ImplicationBasedWeakeningStrengthening,
 )
-
-
-MAX_TIMEOUTS = 32
+from src.mutators.ImplicationBasedWeakeningStrengthening.RuleScheduler import (
+    make_rule_scheduler,
+)
 
 
 class Fuzzer:
@@ -82,17 +93,80 @@ class Fuzzer:
         self.first_status_bar_printed = False
         self.name = random_string()
         self.timeout_of_current_seed = 0
+        self.seed_timeouts = {}  # solver cli -> timeout for the current seed
+        self.worker_id = None
+        self.status_queue = None
+
+        # Worker pool for running the solvers of a mutant concurrently. With
+        # the default of a single job, solvers are run one after another.
+        self.solver_executor = None
+        if self.args.solver_jobs > 1 and self.args.engine == "threads":
+            self.solver_executor = ThreadPoolExecutor(max_workers=self.args.solver_jobs)
+
+        # Event loop running the solvers as coroutines with '--engine asyncio'.
+        # Runs that cannot influence the outcome anymore are killed.
+        self.async_engine = None
+        if self.args.engine == "asyncio":
+            self.async_engine = AsyncEngine(self.args.solver_jobs)
+
+        # Long-lived solver processes reused across mutants (opt-in).
+        self.solver_pool = None
+        if self.args.persistent_solvers:
+            self.solver_pool = SolverPool(self.args.max_solver_queries)
+
+        self.seed_cache = SeedResultCache(
+            None if self.args.no_disk_cache else self.args.cachefolder
+        )
+
+        self.parse_cache = None
+        if not self.args.no_disk_cache:
+            self.parse_cache = SeedParseCache(self.args.cachefolder)
+
+        # Worker processes parsing the upcoming seeds while the current one is
+        # fuzzed. Without them seeds are parsed in the fuzzer's own process.
+        self.parse_service = None
+        self.prefetched = {}  # seed -> parse task
+        if self.args.parse_jobs > 0:
+            self.parse_service = ParseService(
+                self.args.parse_jobs,
+                self.args.parser,
+                None if self.args.no_disk_cache else self.args.cachefolder,
+                stream=self.args.stream_parse,
+            )
+
+        self.mutant_cache = None
+        if self.args.mutant_cache_size > 0:
+            self.mutant_cache = MutantResultCache(
+                self.args.mutant_cache_size,
+                self.args.cachefolder
+                if self.args.disk_mutant_cache and not self.args.no_disk_cache
+                else None,
+            )
+        self.rule_scheduler = make_rule_scheduler(self.args.rule_schedule)
+        self.rewards = {}  # solver cli -> reward of the current mutant
+        self.statistic_lock = threading.Lock()
 
         init_logging(self.args.quiet, self.name, args)
 
     def process_seed(self, seed):
+        """
+        Parses and typechecks a seed. Seeds parsed in an earlier campaign are
+        loaded from the parse cache instead. With '--parse-jobs' the seed is
+        parsed by the parse service, usually ahead of time by prefetch.
+        """
         if not admissible_seed_size(seed, self.args):
             self.statistic.invalid_seeds += 1
             logging.debug("Skip invalid seed: exceeds max file size")
             return None, None, None
 
         self.currentseeds = pathlib.Path(seed).stem
-        script, glob = parse_file(seed, silent=True)
+        if self.parse_service:
+            task = self.prefetched.pop(seed, None) or self.parse_service.submit(seed)
+            script, glob = task.result()
+        else:
+            script, glob = load_seed(
+                seed, self.args.parser, self.parse_cache, stream=self.args.stream_parse
+            )
 
         if not script:
 
@@ -103,142 +177,448 @@ class Fuzzer:
 
         return script, glob, seed
 
-    def get_script(self, seeds):
-        seed = seeds.pop(random.randrange(len(seeds)))
+    def prefetch(self, seed):
+        """
+        Submits a seed to the parse service so that it is parsed while the
+        current seed is fuzzed.
+        """
+        if (
+            self.parse_service
+            and seed not in self.prefetched
+            and admissible_seed_size(seed, self.args)
+        ):
+            self.prefetched[seed] = self.parse_service.submit(seed)
+
+    def visit_seed(self, seed):
+        """
+        Parses and fuzzes a seed.
+
+        :returns: feedback on the seed for the seed scheduler
+        """
         logging.debug("Processing seed " + seed)
         self.statistic.total_seeds += 1
-        return self.process_seed(seed)
+        before = self.statistic.counters()
+        script, glob, seed = self.process_seed(seed)
+
+        if not script:
+            return seed_feedback(before, before, invalid=True)
+
+        self.fuzz_seed(script, glob, seed)
+        return seed_feedback(before, self.statistic.counters())
 
     def max_timeouts_reached(self):
-        if self.timeout_of_current_seed >= MAX_TIMEOUTS:
+        if self.timeout_of_current_seed >= self.args.max_timeouts:
             return True
         return False  # stop testing if timeout limit is exceeded
 
     def run(self):
         """
-        Realizes the main fuzzing loop. The procedure fetches seeds at random
-        from the seed corpus, instantiates a mutator and then generates
-        `self.args.iterations` many iterations per seed.
+        Realizes the main fuzzing loop. The procedure fetches seeds from the
+        seed corpus as chosen by the seed scheduler ('--seed-schedule'),
+        instantiates a mutator and then generates `self.args.iterations` many
+        iterations per seed.
         """
         seeds = get_seeds(self.args)
         log_num_seeds(seeds, self.args.SOLVER_CLIS)
+        scheduler = make_seed_scheduler(self.args, seeds)
+        last_save = time.time()
+
+        # The scheduler picks the next seed before the feedback on the
+        # current one is recorded, so that it can be prefetched.
+        seed = scheduler.next()
+        while seed is not None:
+            upcoming = scheduler.next()
+            if upcoming is not None:
+                self.prefetch(upcoming)
+
+            scheduler.record(seed, self.visit_seed(seed))
+            if time.time() - last_save >= SCHEDULE_SAVE_INTERVAL:
+                scheduler.save()
+                last_save = time.time()
+            seed = upcoming
+
+        scheduler.save()
+        self.terminate()
 
-        while len(seeds) != 0:
-            script, glob, seed = self.get_script(seeds)
+    def run_worker(self, worker_id, seed_queue, status_queue):
+        """
+        Realizes the fuzzing loop of a worker process in '--jobs' mode. Seeds
+        are taken from seed_queue until the supervisor sends None, statistics
+        are sent to status_queue together with the feedback on every seed.
+        """
+        self.worker_id = worker_id
+        self.status_queue = status_queue
 
-            if not script:
-                continue
+        while True:
+            seed = seed_queue.get()
+            if seed is None:
+                break
+
+            self.status_queue.put(("seed", self.worker_id, seed))
+            feedback = self.visit_seed(seed)
+            self.status_queue.put(("feedback", self.worker_id, (seed, feedback)))
+            self.send_stats()
+
+    def fuzz_seed(self, script, glob, seed):
+        """
+        Generates `self.args.iterations` many mutants from a parsed and
+        typechecked seed and tests the solvers on them.
+        """
+        # The mutator rewrites copies of the paths it changes, so the seed and
+        # the previous mutant can share all other terms with the mutant.
+        self.mutator = ImplicationBasedWeakeningStrengthening(
+            script, glob, self.args, self.rule_scheduler
+        )
+
+        # log_generation_attempt(self.args)
+
+        unsuccessful_gens = 0
 
-            typecheck(script, glob)
-            script_cp = copy.deepcopy(script)
-            self.mutator = ImplicationBasedWeakeningStrengthening(
-                script_cp, glob, self.args
+        self.previous_mutant_results = {}
+        self.previous_mutant = None
+
+        for solver_cli, _ in self.args.SOLVER_CLIS:
+            self.previous_mutant_results[solver_cli] = SolverResult(
+                SolverQueryResult.UNKNOWN
             )
 
-            # log_generation_attempt(self.args)
+        self.timeout_of_current_seed = 0
+        self.seed_timeouts = {}
+        seed_results = {}
+        for solver_cli, _ in self.args.SOLVER_CLIS:
+            entry = self.seed_cache.entry(
+                self.make_solver(solver_cli), seed, self.args.timeout
+            )
+            seed_results[solver_cli] = grep_result(entry["stdout"])
+            self.seed_timeouts[solver_cli] = self.adaptive_timeout(entry)
 
-            unsuccessful_gens = 0
+        baseline_cli = self.args.completeness_regressions
+        if baseline_cli and self.args.adaptive_timeout:
+            entry = self.seed_cache.entry(
+                self.make_solver(baseline_cli), seed, self.args.timeout
+            )
+            self.seed_timeouts[baseline_cli] = self.adaptive_timeout(entry)
 
-            self.previous_mutant_results = {}
-            self.previous_mutant = None
+        i = 0
+        while i < self.args.iterations:
+            self.print_stats()
 
-            for solver_cli, _ in self.args.SOLVER_CLIS:
-                self.previous_mutant_results[solver_cli] = SolverResult(
-                    SolverQueryResult.UNKNOWN
-                )
+            if i % self.args.walk_length == 0:
+                logging.info("Restarting from original seed.")
 
-            for i in range(self.args.iterations):
-                self.print_stats()
+                self.mutator.script = script
+                self.previous_mutant_results = dict(seed_results)
 
-                if i % self.args.walk_length == 0:
-                    logging.info("Restarting from original seed.")
+            # A batch ends with its walk, the next walk restarts from the seed.
+            size = min(
+                self.args.mutant_batch,
+                self.args.walk_length - i % self.args.walk_length,
+                self.args.iterations - i,
+            )
+            batch = self.generate_batch(i, size)
+            i += size
 
-                    self.mutator.script = copy.deepcopy(script)
-                    self.previous_mutant_results = {}
-                    for solver_cli, _ in self.args.SOLVER_CLIS:
-                        out = subprocess.getoutput(f"{solver_cli} {seed}")
-                        self.previous_mutant_results[solver_cli] = grep_result(out)
+            if not self.test_batch(batch):
+                break
 
-                self.previous_mutant = copy.deepcopy(self.mutator.script)
-                formula, success, rule_name = self.mutator.mutate()
-                self.current_rule = rule_name
+    def generate_batch(self, first, size):
+        """
+        Generates the mutants of iterations first to first + size - 1 of the
+        current walk, each from the previous one. The solver runs of a mutant
+        are submitted right after it was generated so that the solvers can
+        run while the remaining mutants of the batch are generated. A mutant
+        structurally identical to an earlier one of the batch shares its runs.
 
-                if not success:
-                    logging.info(
-                        f"Mutator unsuccessful in iteration {i}/{self.args.iterations}."
-                    )
-                    continue
+        :returns: list of Mutant in walk order
+        """
+        batch, mutants_by_hash = [], {}
+        for i in range(first, first + size):
+            previous = self.mutator.script
+            formula, success, rule_name = self.mutator.mutate()
+
+            if not success:
+                if self.mutator.ill_typed:
+                    self.statistic.ill_typed_mutants += 1
+                logging.info(
+                    f"Mutator unsuccessful in iteration {i}/{self.args.iterations}."
+                )
+                continue
+
+            text = formula.__str__()
+            mutant_hash = hashlib.md5(text.encode()).hexdigest()
+            if mutant_hash in mutants_by_hash:
+                self.statistic.duplicate_mutants += 1
+                same = mutants_by_hash[mutant_hash]
+                testbook, runs = same.testbook, same.runs
+            else:
+                testbook = self.create_testbook(text)
+                runs = self.run_testbook(testbook, mutant_hash)
+
+            mutant = Mutant(i, previous, rule_name, mutant_hash, testbook, runs)
+            mutants_by_hash.setdefault(mutant_hash, mutant)
+            batch.append(mutant)
+        return batch
+
+    def test_batch(self, batch):
+        """
+        Tests the solvers on the mutants of a batch in walk order. The runs
+        of a mutant whose results were not needed are cancelled as soon as it
+        was tested, unless a later duplicate in the batch shares them. The
+        runs of the mutants after one that stops the testing on the seed are
+        cancelled.
 
-                shouldContinue, reason = self.test(formula, i)
+        :returns: False if the testing on the seed should be stopped
+        """
+        try:
+            for i, mutant in enumerate(batch):
+                shouldContinue, reason = self.test(mutant)
+                if all(m.runs is not mutant.runs for m in batch[i + 1 :]):
+                    self.cancel_runs(mutant.runs)
 
                 if not shouldContinue:
-                    logging.info(f"Iteration {i}: {reason}. Stop testing on this seed.")
-                    break
+                    logging.info(
+                        f"Iteration {mutant.iteration}: {reason}. Stop testing on this seed."
+                    )
+                    return False
 
                 self.statistic.mutants += 1
-                mutant_hash = hashlib.md5(formula.__str__().encode()).hexdigest()
                 logging.info(
-                    f"Iteration {i}/{self.args.iterations} generated mutant hash: {mutant_hash}"
+                    f"Iteration {mutant.iteration}/{self.args.iterations} generated mutant hash: {mutant.hash}"
                 )
 
-        self.terminate()
+                if self.max_timeouts_reached():
+                    logging.info(
+                        f"Iteration {mutant.iteration}: {self.timeout_of_current_seed} timeouts. Stop testing on this seed."
+                    )
+                    return False
+            return True
+        finally:
+            # Results of runs that have not been looked at cannot influence
+            # the outcome anymore.
+            for mutant in batch:
+                self.cancel_runs(mutant.runs)
+            # Kill the solver processes of cancelled asyncio runs.
+            if self.async_engine:
+                self.async_engine.settle()
+            # All testitems of a mutant share the testcase, it is freed once
+            # runs still in progress have finished.
+            for testbook in {id(m.testbook): m.testbook for m in batch}.values():
+                _, _, testcase = testbook[0]
+                testcase.close()
+
+    def cancel_runs(self, runs):
+        """
+        Cancels the runs of a mutant that have not finished. Asyncio runs
+        kill their solver process the next time the event loop runs.
+        """
+        for _, solver_run, baseline_run in runs:
+            solver_run.cancel()
+            if baseline_run is not None:
+                baseline_run.cancel()
 
-    def create_testbook(self, script):
+    def create_testbook(self, text):
         """
-        Generate a "testbook" for script and solver configs.
+        Generate a "testbook" for a mutant and solver configs.
+
+        text:       SMT-LIB text of the mutant
+        :returns:   list of (solver_cli, baseline_cli, testcase) triples, all
+                    sharing one Testcase delivered as set by '--delivery'
 
-        script:     parsed SMT-LIB script
-        :returns:   list containing with cli and testcases pairs
         """
         testbook = []
-        testcase = "%s/%s-%s-%s.smt2" % (
+        scratchfile = "%s/%s-%s-%s.smt2" % (
             self.args.scratchfolder,
             escape(self.currentseeds),
             self.name,
             random_string(),
         )
-        with open(testcase, "w") as testcase_writer:
-            testcase_writer.write(script.__str__())
+        testcase = Testcase(text, self.args.delivery, scratchfile)
 
         for sol_cli, _ in self.args.SOLVER_CLIS:
-            baseline_cli = self.args.completeness_regressions
+            baseline_cli = self.args.completeness_regressions or None
             testbook.append((sol_cli, baseline_cli, testcase))
         return testbook
 
-    def test(self, formula, iteration):
+    def test(self, mutant):
         """
-        Tests the solvers with the formula returning "(False, reason)" if the testing on
-        formula should be stopped and "(True, _)" otherwise.
+        Checks the solver runs on a mutant returning "(False, reason)" if the
+        testing on the seed should be stopped and "(True, _)" otherwise.
         """
         oracle = init_oracle(self.args)
-        testbook = self.create_testbook(formula)
+        self.current_rule = mutant.rule
+        self.previous_mutant = mutant.previous
+        self.rewards = {}
+        try:
+            return self.check_runs(mutant.runs, oracle)
+        finally:
+            self.rule_scheduler.record(self.current_rule, self.rewards)
 
-        reference = None
+    def adaptive_timeout(self, entry):
+        """
+        Derives the timeout for the mutants of a seed from a seed cache entry.
+        With '--adaptive-timeout FACTOR' it is FACTOR times the solver's time
+        on the seed, rounded up to tenths of a second and clamped between
+        '--min-timeout' and '--timeout'. Otherwise it is '--timeout'.
+        """
+        if not self.args.adaptive_timeout:
+            return self.args.timeout
+        timeout = math.ceil(self.args.adaptive_timeout * entry["elapsed"] * 10) / 10
+        return min(max(timeout, self.args.min_timeout), self.args.timeout)
 
-        for testitem in testbook:
-            solver_cli, baseline_cli, scratchfile = testitem
-            solver = Solver(solver_cli)
-            if baseline_cli is not None:
-                baseline_solver = Solver(baseline_cli)
-            else:
-                baseline_solver = None
+    def timeout_for(self, solver_cli):
+        return self.seed_timeouts.get(solver_cli, self.args.timeout)
+
+    def make_solver(self, solver_cli):
+        if self.solver_pool:
+            return PersistentSolver(solver_cli, self.solver_pool)
+        return Solver(solver_cli)
+
+    def cached_outcome(self, mutant_hash, solver_cli):
+        """
+        Looks up the outcome of solver_cli on the mutant in the mutant cache.
+        """
+        if not self.mutant_cache:
+            return None
+        outcome = self.mutant_cache.get(
+            mutant_hash, solver_cli, self.timeout_for(solver_cli)
+        )
+        with self.statistic_lock:
+            self.statistic.cache_lookups += 1
+            if outcome:
+                self.statistic.cache_hits += 1
+        if outcome:
+            logging.info(f"Cached result: {solver_cli}")
+        return outcome
+
+    def record_outcome(self, mutant_hash, solver_cli, outcome, elapsed):
+        with self.statistic_lock:
+            self.statistic.solver_calls += 1
+            self.statistic.solver_time += elapsed
+        if self.mutant_cache:
+            self.mutant_cache.put(
+                mutant_hash, solver_cli, self.timeout_for(solver_cli), outcome
+            )
+
+    def solve(self, solver_cli, testcase, mutant_hash):
+        """
+        Runs solver_cli on a mutant, unless the outcome of this solver on an
+        identical mutant is in the mutant cache.
+        """
+        outcome = self.cached_outcome(mutant_hash, solver_cli)
+        if outcome:
+            return outcome
+
+        if not testcase.acquire():
+            # Testing on the mutant ended before this run started.
+            return "", "", 0
+        try:
             logging.info(f"Running solver: {solver_cli}")
-            stdout, stderr, exitcode = solver.solve(scratchfile, self.args.timeout)
+            solver = self.make_solver(solver_cli)
+            start = time.time()
+            outcome = solver.solve_testcase(testcase, self.timeout_for(solver_cli))
             logging.info(f"Solver finished.")
-            if baseline_solver is not None:
-                logging.info(f"Running solver: {baseline_cli}")
-                baseline_solver_result = baseline_solver.solve_to_result(
-                    scratchfile, self.args.timeout
-                )
-                logging.info(f"Solver finished.")
+        finally:
+            testcase.release()
+
+        self.record_outcome(mutant_hash, solver_cli, outcome, time.time() - start)
+        return outcome
+
+    def solve_baseline(self, baseline_cli, testcase, mutant_hash):
+        stdout, stderr, exitcode = self.solve(baseline_cli, testcase, mutant_hash)
+        return Solver.to_result(stdout, stderr, exitcode)
+
+    async def solve_async(self, solver_cli, testcase, mutant_hash):
+        """
+        Coroutine version of solve for '--engine asyncio'.
+        """
+        outcome = self.cached_outcome(mutant_hash, solver_cli)
+        if outcome:
+            return outcome
+
+        if not testcase.acquire():
+            return "", "", 0
+        try:
+            logging.info(f"Running solver: {solver_cli}")
+            solver = Solver(solver_cli)
+            start = time.time()
+            outcome = await solver.solve_testcase_async(
+                testcase, self.timeout_for(solver_cli)
+            )
+            logging.info(f"Solver finished.")
+        finally:
+            testcase.release()
+
+        self.record_outcome(mutant_hash, solver_cli, outcome, time.time() - start)
+        return outcome
+
+    async def solve_baseline_async(self, baseline_cli, testcase, mutant_hash):
+        stdout, stderr, exitcode = await self.solve_async(
+            baseline_cli, testcase, mutant_hash
+        )
+        return Solver.to_result(stdout, stderr, exitcode)
+
+    def submit(self, fn, *args):
+        if self.async_engine:
+            return self.async_engine.submit(fn, *args)
+        if self.solver_executor:
+            return self.solver_executor.submit(fn, *args)
+        return Deferred(fn, *args)
+
+    def run_testbook(self, testbook, mutant_hash):
+        """
+        Schedule the solver runs of a testbook. With '--solver-jobs' > 1, all
+        solvers and the completeness-regression baseline are started at once
+        on the worker pool, otherwise each run is deferred until its result is
+        requested. With '--engine asyncio' the runs are coroutines on the
+        fuzzer's event loop, limited to '--solver-jobs' concurrent runs. The
+        baseline is solved at most once per mutant.
+
+        testbook:   list of (solver_cli, baseline_cli, testcase) triples
+        mutant_hash: hash of the mutant, the key of the mutant cache
+        :returns:   list of (testitem, solver run, baseline run) triples in
+                    testbook order. Runs are future-like objects.
+        """
+        solve, solve_baseline = self.solve, self.solve_baseline
+        if self.async_engine:
+            solve, solve_baseline = self.solve_async, self.solve_baseline_async
+
+        runs, baseline_runs = [], {}
+        for testitem in testbook:
+            solver_cli, baseline_cli, testcase = testitem
+            # Submitted before the baseline so that with a single job the
+            # tested solver runs first.
+            solver_run = self.submit(solve, solver_cli, testcase, mutant_hash)
+            baseline_run = None
+            if baseline_cli is not None:
+                if baseline_cli not in baseline_runs:
+                    baseline_runs[baseline_cli] = self.submit(
+                        solve_baseline, baseline_cli, testcase, mutant_hash
+                    )
+                baseline_run = baseline_runs[baseline_cli]
+            runs.append((testitem, solver_run, baseline_run))
+        return runs
+
+    def check_runs(self, runs, oracle):
+        """
+        Checks the results of the solver runs in testbook order, so that the
+        bug classification does not depend on which solver finished first.
+        """
+        reference = None
+
+        for testitem, solver_run, baseline_run in runs:
+            solver_cli, baseline_cli, testcase = testitem
+            stdout, stderr, exitcode = solver_run.result()
+            # Reward of the rule scheduler, 1 for unknowns and bugs
+            self.rewards[solver_cli] = 0
 
             # (1) Detect crashes from a solver run including invalid models.
             if in_crash_list(stdout, stderr):
+                self.rewards[solver_cli] = 1
 
                 # (2) Match against the duplicate list to avoid reporting duplicate bugs.
                 if not in_duplicate_list(stdout, stderr):
                     self.statistic.crashes += 1
-                    self.report(scratchfile, "crash", solver_cli, stdout, stderr)
+                    self.report(testcase, "crash", solver_cli, stdout, stderr)
                     logging.info("Detected crash bug.")
                     return False, "Crash"  # stop testing
                 else:
@@ -257,12 +637,14 @@ class Fuzzer:
                 # (3b) Check whether the exit code is nonzero.
                 if exitcode != 0:
                     if exitcode == -signal.SIGSEGV or exitcode == 245:  # segfault
+                        self.rewards[solver_cli] = 1
                         self.statistic.crashes += 1
-                        self.report(scratchfile, "segfault", solver_cli, stdout, stderr)
+                        self.report(testcase, "segfault", solver_cli, stdout, stderr)
                         return False, "Detected segfault"  # stop testing
 
                     elif exitcode == 137:  # timeout
                         self.statistic.timeout += 1
+                        self.timeout_of_current_seed += 1
                         logging.info(
                             "Solver timeout occurred. sol=" + str(solver_cli) + "."
                         )
@@ -290,20 +672,22 @@ class Fuzzer:
                     logging.info(
                         f"Expected '{oracle}', solver returned '{result}'. ISBUG={not oracle.equals(result)}"
                     )
+                    if SolverQueryResult.UNKNOWN in result.lst:
+                        self.rewards[solver_cli] = 1
 
                     if oracle.equals(SolverQueryResult.UNKNOWN):
                         oracle = result
                         logging.info(
                             "Oracle was 'unknown'. sol=" + str(solver_cli) + "."
                         )
-                        reference = (solver_cli, scratchfile, stdout, stderr)
+                        reference = (solver_cli, testcase, stdout, stderr)
 
                     # Check for type 1 incompleteness (regression)
-                    if baseline_solver and result.equals(SolverQueryResult.UNKNOWN):
-                        if baseline_solver_result.is_solved():
+                    if baseline_run and result.equals(SolverQueryResult.UNKNOWN):
+                        if baseline_run.result().is_solved():
                             self.statistic.regression_incompleteness += 1
                             self.report(
-                                scratchfile,
+                                testcase,
                                 "regression-incompleteness",
                                 solver_cli,
                                 stdout,
@@ -320,7 +704,7 @@ class Fuzzer:
                     ):
                         self.statistic.implication_incompleteness += 1
                         self.report(
-                            scratchfile,
+                            testcase,
                             "implication-incompleteness",
                             solver_cli,
                             self.current_rule,
@@ -334,9 +718,10 @@ class Fuzzer:
                     # Comparing with the oracle (semantic fusion) or with other
                     # non-erroneous solver runs (opfuzz) for soundness bugs.
                     if not oracle.equals(result):
+                        self.rewards[solver_cli] = 1
                         self.statistic.soundness += 1
                         self.report(
-                            scratchfile,
+                            testcase,
                             "incorrect",
                             solver_cli,
                             self.current_rule,
@@ -346,7 +731,7 @@ class Fuzzer:
                         return False, "Detected soundness bug."  # stop testing
         return True, ""
 
-    def report(self, scratchfile, bugtype, cli, stdout, stderr, previous_mutant=None):
+    def report(self, testcase, bugtype, cli, stdout, stderr, previous_mutant=None):
         plain_cli = plain(cli)
         # format: <solver><{crash,wrong,invalid_model}><seed>.<random-str>.smt2
         rand_appendix = random_string()
@@ -365,12 +750,12 @@ class Fuzzer:
             rand_appendix,
         )
         try:
-            shutil.copy(scratchfile, report)
+            testcase.save(report)
             if previous_mutant:
                 with open(report_previous, 'w') as pr:
-                    pr.write(str(previous_mutant))
+                    previous_mutant.write(pr)
         except Exception:
-            logging.error("error: couldn't copy scratchfile to bugfolder.")
+            logging.error("error: couldn't write testcase to bugfolder.")
             exit(ERR_EXHAUSTED_DISK)
         if previous_mutant:
             logpath = "%s/%s-%s-%s-%s.output" % (
@@ -388,7 +773,27 @@ class Fuzzer:
                 log.write(stdout)
         return report
 
+    def send_stats(self):
+        self.status_queue.put(("stats", self.worker_id, self.statistic.counters()))
+        if self.args.rule_stats:
+            self.status_queue.put(("rules", self.worker_id, self.rule_scheduler.stats))
+
+    def export_rule_stats(self):
+        if not self.args.rule_stats:
+            return
+        try:
+            self.rule_scheduler.export(self.args.rule_stats)
+        except OSError:
+            logging.error("error: couldn't write rule statistics.")
+
     def print_stats(self):
+        if self.status_queue is not None:
+            # Worker processes leave printing to the supervisor.
+            if time.time() - self.old_time >= 1.0:
+                self.send_stats()
+                self.old_time = time.time()
+            return
+
         if not self.first_status_bar_printed and time.time() - self.old_time >= 1:
             self.statistic.printbar(self.start_time)
             self.old_time = time.time()
@@ -399,6 +804,14 @@ class Fuzzer:
             self.old_time = time.time()
 
     def terminate(self):
+        self.export_rule_stats()
+        if self.solver_pool:
+            self.solver_pool.close()
+        if self.async_engine:
+            self.async_engine.close()
+            self.async_engine = None
+        if self.parse_service:
+            self.parse_service.close()
         print("All seeds processed", flush=True)
         if not self.args.quiet:
             self.statistic.printsum()
@@ -407,6 +820,8 @@ class Fuzzer:
         exit(OK_BUGS)
 
     def __del__(self):
+        if getattr(self, "solver_pool", None):
+            self.solver_pool.close()
         for fn in os.listdir(self.args.scratchfolder):
             if self.name in fn:
                 os.remove(os.path.join(self.args.scratchfolder, fn))
@@ -32,6 +32,7 @@ except Exception as e:
     from config.Config import crash_list, duplicate_list, ignore_list
 
 from src.core.Solver import SolverResult, SolverQueryResult
+from src.core.SeedIndex import filter_seeds
 
 
 def in_crash_list(stdout, stderr):
@@ -73,7 +74,11 @@ def grep_result(stdout):
 
 
 def get_seeds(args):
-    return args.PATH_TO_SEEDS
+    """
+    :returns: the seeds of the campaign, without those the seed index knows
+              to be unusable.
+    """
+    return filter_seeds(args.PATH_TO_SEEDS, args)
 
 
 def init_oracle(args):
@@ -89,3 +94,41 @@ def init_oracle(args):
         return SolverResult(SolverQueryResult.UNSAT)
     else:
         return SolverResult(SolverQueryResult.NO_RESULT)
+
+
+class Deferred:
+    """
+    Future-like wrapper evaluating fn(*args) on the first call to result().
+    Used to run solvers one after another such that runs whose results are
+    never requested (e.g. after a crash was detected) are never started.
+    """
+
+    def __init__(self, fn, *args):
+        self.fn = fn
+        self.args = args
+        self.done = False
+        self.value = None
+
+    def result(self):
+        if not self.done:
+            self.value = self.fn(*self.args)
+            self.done = True
+        return self.value
+
+    def cancel(self):
+        return not self.done
+
+
+class Mutant:
+    """
+    A generated mutant together with the solver runs testing it, see
+    Fuzzer.generate_batch.
+    """
+
+    def __init__(self, iteration, previous, rule, mutant_hash, testbook, runs):
+        self.iteration = iteration
+        self.previous = previous  # script the mutant was generated from
+        self.rule = rule
+        self.hash = mutant_hash
+        self.testbook = testbook
+        self.runs = runs
@@ -0,0 +1,103 @@
+# MIT License
+#
+# Copyright (c) [2020 - 2021] Mauro Bringolf and Dominik Winterer
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import os
+import zlib
+import pickle
+import hashlib
+
+PARSE_CACHE_VERSION = 1
+
+# Modules the parsed and typechecked seeds depend on. Changing one of them
+# invalidates all cached seeds.
+PARSER_MODULES = [
+    "Ast.py",
+    "AstVisitor.py",
+    "CommandReader.py",
+    "FastParser.py",
+    "Parse.py",
+    "SMTLIBv2Lexer.py",
+    "SMTLIBv2Parser.py",
+    "Typechecker.py",
+    "Types.py",
+]
+
+
+def parser_fingerprint():
+    """
+    Hash of the cache format version and the sources of the parser, the AST
+    and the typechecker.
+    """
+    digest = hashlib.sha256(str(PARSE_CACHE_VERSION).encode())
+    folder = os.path.join(os.path.dirname(os.path.dirname(__file__)), "parsing")
+    for module in PARSER_MODULES:
+        with open(os.path.join(folder, module), "rb") as reader:
+            digest.update(reader.read())
+    return digest.hexdigest()
+
+
+class SeedParseCache:
+    """
+    Stores parsed and typechecked seeds in the cache folder so that every
+    seed is parsed only once across campaigns. Entries are keyed by
+    the hash of the seed's content and the parser fingerprint and hold the
+    zlib-compressed pickle of the script and its global variables.
+    """
+
+    def __init__(self, cachefolder):
+        self.cachefolder = cachefolder
+        self.fingerprint = parser_fingerprint()
+
+    def key(self, content):
+        """
+        :content: bytes of the seed file
+        """
+        return hashlib.sha256(self.fingerprint.encode() + b"\0" + content).hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.cachefolder, "parsed-" + key + ".pickle")
+
+    def lookup(self, key):
+        """
+        :returns: (script, glob) or None on a miss.
+        """
+        try:
+            with open(self.path(key), "rb") as reader:
+                version, script, glob = pickle.loads(zlib.decompress(reader.read()))
+        except Exception:
+            return None  # missing or corrupt entry
+        if version != PARSE_CACHE_VERSION:
+            return None
+        return script, glob
+
+    def store(self, key, script, glob):
+        path = self.path(key)
+        tmp = path + "." + str(os.getpid())
+        try:
+            data = pickle.dumps(
+                (PARSE_CACHE_VERSION, script, glob), pickle.HIGHEST_PROTOCOL
+            )
+            with open(tmp, "wb") as writer:
+                writer.write(zlib.compress(data))
+            os.replace(tmp, path)
+        except (OSError, RecursionError, pickle.PicklingError):
+            pass  # the cache is best effort
@@ -0,0 +1,259 @@
+# MIT License
+#
+# Copyright (c) [2020 - 2021] Mauro Bringolf and Dominik Winterer
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import time
+import pickle
+import signal
+import logging
+import multiprocessing
+from collections import deque
+from multiprocessing.connection import wait
+
+from src.core.ParseCache import SeedParseCache
+from src.parsing.Parse import parse_file
+from src.parsing.Typechecker import typecheck
+
+PARSE_TIMEOUT = 30  # secs for parsing and typechecking a seed
+
+# Workers are forked from a single-threaded server process, never from the
+# fuzzer, whose solver threads may hold locks at the time of the fork.
+WORKER_CONTEXT = multiprocessing.get_context("forkserver")
+WORKER_CONTEXT.set_forkserver_preload([__name__])
+
+
+def load_seed(seed, parser, parse_cache, timeout_limit=PARSE_TIMEOUT, stream=False):
+    """
+    Parses and typechecks a seed. Seeds parsed in an earlier campaign are
+    loaded from the parse cache instead. Streamed seeds are parsed one
+    command at a time, see parse_file.
+
+    :returns: (script, glob) or (None, None) if the seed fails to parse.
+    """
+    key = None
+    if parse_cache:
+        with open(seed, "rb") as reader:
+            key = parse_cache.key(reader.read())
+        cached = parse_cache.lookup(key)
+        if cached:
+            logging.debug("Parsed seed found in cache")
+            return cached
+
+    script, glob = parse_file(seed, timeout_limit, True, parser, stream)
+    if not script:
+        return None, None
+
+    typecheck(script, glob)
+    if parse_cache:
+        parse_cache.store(key, script, glob)
+    return script, glob
+
+
+def serve(conn, parser, stream, cachefolder):
+    """
+    Main loop of a parse worker. Announces itself with ("ready", None), then
+    receives seeds until None and answers each with ("ok", pickled (script,
+    glob)), ("error", exception) if typechecking raised or ("local", None) if
+    the AST could not be pickled. The worker has no time limit of its own,
+    the service kills it at the deadline.
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # the fuzzer handles Ctrl-C
+    parse_cache = SeedParseCache(cachefolder) if cachefolder else None
+    conn.send(("ready", None))
+    while True:
+        try:
+            seed = conn.recv()
+        except EOFError:
+            break
+        if seed is None:
+            break
+
+        try:
+            script, glob = load_seed(seed, parser, parse_cache, None, stream)
+        except Exception as e:
+            conn.send(("error", e))
+            continue
+        try:
+            data = pickle.dumps((script, glob), pickle.HIGHEST_PROTOCOL)
+        except (RecursionError, pickle.PicklingError):
+            conn.send(("local", None))
+            continue
+        conn.send(("ok", data))
+
+
+class ParseTask:
+    """
+    Parse of a seed submitted to the parse service.
+    """
+
+    def __init__(self, service, seed):
+        self.service = service
+        self.seed = seed
+        self.deadline = None  # set once a worker picks up the task
+        self.outcome = None  # (status, value) as sent by the worker
+
+    @property
+    def done(self):
+        return self.outcome is not None
+
+    def result(self):
+        """
+        Waits for the parse to finish.
+
+        :returns: (script, glob) or (None, None) if the seed failed to parse
+                  or ran past its deadline.
+        """
+        return self.service.wait(self)
+
+
+class ParseWorker:
+    def __init__(self, parser, stream, cachefolder):
+        self.conn, child = WORKER_CONTEXT.Pipe()
+        self.process = WORKER_CONTEXT.Process(
+            target=serve, args=(child, parser, stream, cachefolder), daemon=True
+        )
+        self.process.start()
+        child.close()
+        self.task = None
+
+        # Wait for the worker to come up, so that its start-up does not count
+        # against the deadline of its first seed. A worker dying on start-up
+        # fails its first seed.
+        try:
+            self.conn.recv()
+        except EOFError:
+            pass
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+
+class ParseService:
+    """
+    Parses seeds in a pool of worker processes, so that the next seeds are
+    parsed while the current one is fuzzed. Unlike the timeout of parse_file,
+    which interrupts the main thread, a parse running past its deadline is
+    cancelled by killing its worker, which is replaced on the next task. The
+    workers send back the pickled script, so the ASTs never share state with
+    the worker. Results are collected whenever the fuzzer waits for a parse.
+    """
+
+    def __init__(
+        self,
+        jobs,
+        parser="antlr",
+        cachefolder=None,
+        timeout=PARSE_TIMEOUT,
+        stream=False,
+    ):
+        self.jobs = jobs
+        self.parser = parser
+        self.stream = stream
+        self.cachefolder = cachefolder
+        self.timeout = timeout
+        self.workers = []
+        self.pending = deque()
+
+    def submit(self, seed):
+        task = ParseTask(self, seed)
+        self.pending.append(task)
+        self.dispatch()
+        return task
+
+    def dispatch(self):
+        for worker in self.workers:
+            if worker.task is None and self.pending:
+                self.assign(worker, self.pending.popleft())
+        while self.pending and len(self.workers) < self.jobs:
+            worker = ParseWorker(self.parser, self.stream, self.cachefolder)
+            self.workers.append(worker)
+            self.assign(worker, self.pending.popleft())
+
+    def assign(self, worker, task):
+        worker.task = task
+        task.deadline = time.monotonic() + self.timeout
+        try:
+            worker.conn.send(task.seed)
+        except OSError:
+            self.finish(worker, ("failed", None))
+
+    def finish(self, worker, outcome):
+        worker.task.outcome = outcome
+        worker.task = None
+        if outcome[0] in ("failed", "timeout"):
+            worker.kill()
+            self.workers.remove(worker)
+
+    def poll(self, timeout=0):
+        """
+        Collects finished parses and cancels the parses past their deadline.
+        Waits at most timeout secs for a parse to finish, until the next
+        deadline if timeout is None.
+        """
+        busy = [worker for worker in self.workers if worker.task]
+        if not busy:
+            return
+        until = min(worker.task.deadline for worker in busy) - time.monotonic()
+        if timeout is not None:
+            until = min(until, timeout)
+        ready = wait([worker.conn for worker in busy], max(until, 0))
+
+        for worker in busy:
+            if worker.conn in ready:
+                try:
+                    self.finish(worker, worker.conn.recv())
+                except (EOFError, OSError):
+                    logging.debug(f"Parse worker died on {worker.task.seed}")
+                    self.finish(worker, ("failed", None))
+            elif time.monotonic() >= worker.task.deadline:
+                logging.debug(f"Parsing {worker.task.seed} timed out")
+                self.finish(worker, ("timeout", None))
+        self.dispatch()
+
+    def wait(self, task):
+        while not task.done:
+            self.poll(timeout=None)
+
+        status, value = task.outcome
+        if status == "ok":
+            return pickle.loads(value)
+        if status == "error":
+            raise value
+        if status == "local":
+            return load_seed(task.seed, self.parser, None, stream=self.stream)
+        return None, None
+
+    def close(self):
+        for worker in self.workers:
+            if worker.task:
+                worker.kill()
+                continue
+            try:
+                worker.conn.send(None)
+            except OSError:
+                pass
+            worker.process.join(1)
+            worker.kill()
+        self.workers = []
+        self.pending.clear()
@@ -0,0 +1,230 @@
+# MIT License
+#
+# Copyright (c) [2020 - 2021] Mauro Bringolf and Dominik Winterer
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import os
+import time
+import json
+import shutil
+import hashlib
+import threading
+import subprocess
+from collections import OrderedDict
+
+from src.core.FuzzerUtil import grep_result, in_crash_list
+from src.core.Solver import solver_cmd
+
+# Seconds to wait for the version of a solver
+VERSION_TIMEOUT = 10
+
+# Solver cli -> identity, see solver_identity
+solver_identities = {}
+
+
+def content_hash(text):
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def solver_identity(cli):
+    """
+    Identifies the solver run by cli: the cli, the path, size and
+    modification time of the solver binary and its '--version' output. The
+    cached results of a solver are keyed by its identity, so that they are
+    not reused once the solver was upgraded.
+    """
+    identity = solver_identities.get(cli)
+    if identity is not None:
+        return identity
+
+    parts = [cli]
+    cmd = solver_cmd(cli)
+    binary = shutil.which(cmd[0]) if cmd else None
+    if binary:
+        binary = os.path.realpath(binary)
+        stat = os.stat(binary)
+        parts += [binary, str(stat.st_size), str(stat.st_mtime_ns)]
+        try:
+            version = subprocess.run(
+                [binary, "--version"],
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                timeout=VERSION_TIMEOUT,
+            ).stdout
+            parts.append(version.decode("utf8", "replace"))
+        except (OSError, subprocess.SubprocessError):
+            pass
+    identity = "\0".join(parts)
+    solver_identities[cli] = identity
+    return identity
+
+
+class SeedResultCache:
+    """
+    Caches the results of the solvers on the seeds, keyed by the solver's
+    identity and the hash of the seed's content. Entries are kept in memory and, if a cache
+    folder is given, stored on disk so that they survive across campaigns.
+    """
+
+    def __init__(self, cachefolder=None):
+        self.cachefolder = cachefolder
+        self.entries = {}
+
+    def key(self, cli, text):
+        return content_hash(solver_identity(cli) + "\0" + text)
+
+    def path(self, key):
+        return os.path.join(self.cachefolder, "seed-" + key + ".json")
+
+    def lookup(self, key, timeout):
+        entry = self.entries.get(key)
+        if not entry and self.cachefolder:
+            try:
+                with open(self.path(key), "r") as reader:
+                    entry = json.load(reader)
+                self.entries[key] = entry
+            except (OSError, ValueError):
+                return None
+
+        # A timed out run is only reused for timeouts not exceeding the one
+        # it was run with.
+        if not entry or (entry["timedout"] and timeout > entry["timeout"]):
+            return None
+        return entry
+
+    def store(self, key, entry):
+        self.entries[key] = entry
+        if not self.cachefolder:
+            return
+        path = self.path(key)
+        tmp = path + "." + str(os.getpid())
+        try:
+            with open(tmp, "w") as writer:
+                json.dump(entry, writer)
+            os.replace(tmp, path)
+        except OSError:
+            pass  # the cache is best effort
+
+    def get(self, solver, seed, timeout):
+        """
+        Returns the SolverResult of solver on seed, running the solver with
+        the given timeout on a cache miss.
+        """
+        return grep_result(self.entry(solver, seed, timeout)["stdout"])
+
+    def entry(self, solver, seed, timeout):
+        """
+        Like get, but returns the cache entry, a dict with the solver's
+        stdout, whether it timed out and the time it took in seconds.
+        """
+        with open(seed, "r") as reader:
+            key = self.key(solver.cil, reader.read())
+
+        entry = self.lookup(key, timeout)
+        if not entry:
+            start = time.time()
+            stdout, _, exitcode = solver.solve(seed, timeout)
+            entry = {
+                "cli": solver.cil,
+                "stdout": stdout,
+                "timeout": timeout,
+                "timedout": exitcode == 137,
+                "elapsed": time.time() - start,
+            }
+            self.store(key, entry)
+        return entry
+
+
+def cacheable(outcome):
+    """
+    Checks whether the solver finished normally, i.e., it neither timed out
+    nor crashed.
+    """
+    stdout, stderr, exitcode = outcome
+    return exitcode == 0 and not in_crash_list(stdout, stderr)
+
+
+class MutantResultCache:
+    """
+    Bounded LRU cache mapping (mutant hash, solver identity, timeout) to the
+    stdout, stderr and exit code of the solver run. Optionally backed by a
+    cache folder on disk, which is consulted on misses of the LRU. Only runs
+    in which the solver finished normally are cached, timeouts and crashes
+    may not happen again and are left to be reproduced.
+    """
+
+    def __init__(self, size, cachefolder=None):
+        self.size = size
+        self.cachefolder = cachefolder
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def key(self, mutant_hash, cli, timeout):
+        return content_hash("%s\0%s\0%s" % (mutant_hash, solver_identity(cli), timeout))
+
+    def path(self, key):
+        return os.path.join(self.cachefolder, "mutant-" + key + ".json")
+
+    def get(self, mutant_hash, cli, timeout):
+        """
+        :returns: (stdout, stderr, exitcode) or None on a miss.
+        """
+        key = self.key(mutant_hash, cli, timeout)
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                return self.entries[key]
+
+        if not self.cachefolder:
+            return None
+        try:
+            with open(self.path(key), "r") as reader:
+                outcome = tuple(json.load(reader)["outcome"])
+        except (OSError, ValueError, KeyError):
+            return None
+        if not cacheable(outcome):
+            return None
+        self.insert(key, outcome)
+        return outcome
+
+    def insert(self, key, outcome):
+        with self.lock:
+            self.entries[key] = outcome
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+    def put(self, mutant_hash, cli, timeout, outcome):
+        if not cacheable(outcome):
+            return
+        key = self.key(mutant_hash, cli, timeout)
+        self.insert(key, outcome)
+        if not self.cachefolder:
+            return
+        path = self.path(key)
+        tmp = path + "." + str(os.getpid()) + "." + str(threading.get_ident())
+        try:
+            with open(tmp, "w") as writer:
+                json.dump({"cli": cli, "timeout": timeout, "outcome": outcome}, writer)
+            os.replace(tmp, path)
+        except OSError:
+            pass  # the cache is best effort
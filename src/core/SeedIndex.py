@@ -0,0 +1,375 @@
+# MIT License
+#
+# Copyright (c) [2020 - 2021] Mauro Bringolf and Dominik Winterer
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import os
+import re
+import json
+import time
+import hashlib
+import logging
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+from src.core.ParseCache import SeedParseCache, parser_fingerprint
+from src.core.ParseService import PARSE_TIMEOUT
+from src.parsing.Ast import Assert, Term
+from src.parsing.Parse import parse_filestream, parse_commandstream
+from src.parsing.Types import UNKNOWN
+from src.parsing.Typechecker import typecheck
+from src.mutators.ImplicationBasedWeakeningStrengthening.common import SAT, UNSAT
+from src.mutators.ImplicationBasedWeakeningStrengthening.CandidateIndex import (
+    CandidateIndex,
+)
+from src.mutators.ImplicationBasedWeakeningStrengthening.rules.all import ALL_RULES
+from src.mutators.ImplicationBasedWeakeningStrengthening.rules.rule_set import (
+    makeRuleSet,
+)
+
+SEED_INDEX_VERSION = 1
+
+# Seconds between saves of the index while it is built
+INDEX_SAVE_INTERVAL = 60
+
+# Modules deciding which rules apply to a seed, besides the parser modules.
+RULE_MODULES = [
+    "CandidateIndex.py",
+    "Rule.py",
+    "regex_meta.py",
+    "rules/all.py",
+    "rules/lhs_rhs.py",
+    "rules/regex.py",
+]
+
+SET_LOGIC_RE = re.compile(rb"\(\s*set-logic\s+([^\s()]+)\s*\)")
+
+
+def index_fingerprint(parser, stream):
+    """
+    Hash of the index format version, the parser fingerprint, the parser
+    settings and the sources of the rules.
+    """
+    digest = hashlib.sha256(str(SEED_INDEX_VERSION).encode())
+    digest.update(parser_fingerprint().encode())
+    digest.update(("parser=%s stream=%s" % (parser, stream)).encode())
+    folder = os.path.join(
+        os.path.dirname(os.path.dirname(__file__)),
+        "mutators",
+        "ImplicationBasedWeakeningStrengthening",
+    )
+    for module in RULE_MODULES:
+        with open(os.path.join(folder, module), "rb") as reader:
+            digest.update(reader.read())
+    return digest.hexdigest()
+
+
+def seed_index_path(args):
+    """
+    :returns: path of the seed index, None if there is none.
+    """
+    if args.seed_index:
+        return args.seed_index
+    if args.no_disk_cache:
+        return None
+    return os.path.join(args.cachefolder, "seed-index.json")
+
+
+def profile_script(script):
+    """
+    Features of a parsed and typechecked script: the number of asserts, the
+    histogram of the operators and the sorts in the asserts, whether they
+    contain quantifiers and the rules applicable to the script per oracle.
+    """
+    ops = {}
+    sorts = set()
+    quantifiers = False
+    asserts = 0
+    for cmd in script.commands:
+        if not isinstance(cmd, Assert):
+            continue
+        asserts += 1
+        stack = [cmd.term]
+        while stack:
+            term = stack.pop()
+            if not isinstance(term, Term):
+                continue
+            if term.type is not None and term.type != UNKNOWN:
+                sorts.add(str(term.type))
+            if term.quantifier:
+                quantifiers = True
+                sorts.update(term.quantified_vars[1])
+            if term.op is not None:
+                op = term.op if isinstance(term.op, str) else term.op.name
+                ops[op] = ops.get(op, 0) + 1
+            stack.extend(term.subterms or [])
+            stack.extend(term.let_terms or [])
+
+    rules = {}
+    for oracle, name in [(SAT, "sat"), (UNSAT, "unsat")]:
+        index = CandidateIndex.build(script, oracle)
+        rules[name] = sorted(
+            rule_name for rule_name, rule in ALL_RULES.items() if index.candidates(rule)
+        )
+
+    return {
+        "asserts": asserts,
+        "ops": ops,
+        "sorts": sorted(sorts),
+        "quantifiers": quantifiers,
+        "rules": rules,
+    }
+
+
+# Settings and parse cache of an index worker process, see init_worker.
+worker = {}
+
+
+def init_worker(parser, stream, file_size_limit, cachefolder):
+    worker["parser"] = parser
+    worker["stream"] = stream
+    worker["file_size_limit"] = file_size_limit
+    worker["parse_cache"] = SeedParseCache(cachefolder) if cachefolder else None
+
+
+def profile_seed(seed):
+    """
+    Parses, typechecks and profiles a seed in an index worker process. The
+    parsed seed is stored in the parse cache for the fuzzing campaigns.
+
+    :returns: seed and its entry in the index. Seeds that exceed the file
+              size limit, fail to parse or to typecheck are invalid and have
+              the reason "size", "parse" or "typecheck". Seeds whose parsing
+              timed out have the reason "timeout", which depends on the
+              machine, so they are not stored in the index.
+    """
+    stat = os.stat(seed)
+    entry = {
+        "size": stat.st_size,
+        "mtime": stat.st_mtime_ns,
+        "valid": False,
+        "reason": None,
+        "logic": None,
+    }
+    if stat.st_size >= worker["file_size_limit"]:
+        entry["reason"] = "size"
+        return seed, entry
+
+    with open(seed, "rb") as reader:
+        content = reader.read()
+    match = SET_LOGIC_RE.search(content)
+    if match:
+        entry["logic"] = match.group(1).decode("utf8", "replace")
+
+    parse_cache = worker["parse_cache"]
+    cached = None
+    if parse_cache:
+        key = parse_cache.key(content)
+        cached = parse_cache.lookup(key)
+    if cached:
+        script, glob = cached
+    else:
+        parse_fct = parse_commandstream if worker["stream"] else parse_filestream
+        try:
+            script, glob = parse_fct(seed, PARSE_TIMEOUT, worker["parser"])
+        except KeyboardInterrupt:
+            # Raised by the timeout of the parser.
+            entry["reason"] = "timeout"
+            return seed, entry
+        except Exception:
+            script = None
+        if not script:
+            entry["reason"] = "parse"
+            return seed, entry
+        try:
+            typecheck(script, glob)
+        except Exception:
+            entry["reason"] = "typecheck"
+            return seed, entry
+        if parse_cache:
+            parse_cache.store(key, script, glob)
+
+    entry.update(profile_script(script))
+    entry["valid"] = True
+    return seed, entry
+
+
+class SeedIndex:
+    """
+    Features of the seeds of a corpus, built by 'janus index' ahead of the
+    fuzzing campaigns, keyed by the absolute path of the seed. An entry is
+    only used while the size and modification time of its seed are
+    unchanged. The index is dropped as a whole if the parser, its settings
+    or the rules changed since it was built.
+    """
+
+    def __init__(self, path, parser="antlr", stream=False):
+        self.path = path
+        self.fingerprint = index_fingerprint(parser, stream)
+        self.seeds = {}
+        if os.path.isfile(path):
+            try:
+                with open(path, "r") as reader:
+                    index = json.load(reader)
+                if index.get("fingerprint") == self.fingerprint:
+                    self.seeds = index["seeds"]
+                else:
+                    logging.info("Seed index is outdated, starting afresh.")
+            except (OSError, ValueError, KeyError):
+                logging.info("Could not read seed index, starting afresh.")
+
+    def entry(self, seed):
+        """
+        :returns: the entry of seed or None if seed is not indexed or changed
+                  since.
+        """
+        entry = self.seeds.get(os.path.abspath(seed))
+        if entry is None:
+            return None
+        try:
+            stat = os.stat(seed)
+        except OSError:
+            return None
+        if entry["size"] != stat.st_size or entry["mtime"] != stat.st_mtime_ns:
+            return None
+        return entry
+
+    def update(self, seed, entry):
+        self.seeds[os.path.abspath(seed)] = entry
+
+    def usable(self, seed, args, rule_names):
+        """
+        Checks whether seed can be fuzzed with the file size limit, the
+        oracle and the rule set of args. Seeds the index does not know are
+        considered usable.
+
+        :rule_names: names of the rules in the rule set of args
+        """
+        entry = self.entry(seed)
+        if entry is None:
+            return True
+        if entry["size"] >= args.file_size_limit:
+            return False
+        if not entry["valid"]:
+            # Seeds exceeding the file size limit of 'janus index' were not
+            # parsed.
+            return entry["reason"] == "size"
+        applicable = entry["rules"].get(args.oracle)
+        return applicable is None or not rule_names.isdisjoint(applicable)
+
+    def save(self):
+        tmp = self.path + "." + str(os.getpid())
+        try:
+            with open(tmp, "w") as writer:
+                json.dump(
+                    {"fingerprint": self.fingerprint, "seeds": self.seeds}, writer
+                )
+            os.replace(tmp, self.path)
+        except OSError:
+            logging.error("Could not save seed index.")
+
+
+def filter_seeds(seeds, args):
+    """
+    Drops the seeds the seed index knows to be unusable, e.g. seeds that fail
+    to parse or none of the rules of '--rule-set' applies to.
+    """
+    path = seed_index_path(args)
+    if not path or not os.path.isfile(path):
+        return seeds
+
+    index = SeedIndex(path, args.parser, args.stream_parse)
+    rule_names = {rule.name for rule in makeRuleSet(args.rule_set)}
+    usable = [seed for seed in seeds if index.usable(seed, args, rule_names)]
+    if len(usable) < len(seeds):
+        logging.info(
+            "Seed index: skipping %d of %d seeds"
+            % (len(seeds) - len(usable), len(seeds))
+        )
+    return usable
+
+
+def build_index(args):
+    """
+    Realizes 'janus index': profiles the seeds which are not indexed yet or
+    changed since on a pool of '--jobs' processes and saves the index.
+
+    :returns: False if a worker process died, True otherwise.
+    """
+    index = SeedIndex(seed_index_path(args), args.parser, args.stream_parse)
+    seeds = [seed for seed in args.PATH_TO_SEEDS if index.entry(seed) is None]
+    print(
+        "%d seeds, %d to be indexed" % (len(args.PATH_TO_SEEDS), len(seeds)),
+        flush=True,
+    )
+
+    cachefolder = None if args.no_disk_cache else args.cachefolder
+    last_save = time.time()
+    complete = True
+    timeouts = 0
+    with ProcessPoolExecutor(
+        max_workers=args.jobs,
+        initializer=init_worker,
+        initargs=(args.parser, args.stream_parse, args.file_size_limit, cachefolder),
+    ) as executor:
+        futures = [executor.submit(profile_seed, seed) for seed in seeds]
+        try:
+            for future in as_completed(futures):
+                try:
+                    seed, entry = future.result()
+                    if entry["reason"] == "timeout":
+                        timeouts += 1
+                    else:
+                        index.update(seed, entry)
+                except OSError as e:
+                    logging.error("Could not index seed: %s" % e)
+                if time.time() - last_save >= INDEX_SAVE_INTERVAL:
+                    index.save()
+                    last_save = time.time()
+        except BrokenProcessPool:
+            print("error: an index worker died, rerun to index the rest", flush=True)
+            complete = False
+    index.save()
+
+    reasons = {"size": 0, "parse": 0, "typecheck": 0}
+    valid = 0
+    for seed in args.PATH_TO_SEEDS:
+        entry = index.entry(seed)
+        if entry is None:
+            continue
+        if entry["valid"]:
+            valid += 1
+        else:
+            reasons[entry["reason"]] += 1
+    print(
+        "%d valid seeds, %d exceed the file size limit, %d fail to parse, "
+        "%d fail to typecheck, %d time out"
+        % (
+            valid,
+            reasons["size"],
+            reasons["parse"],
+            reasons["typecheck"],
+            timeouts,
+        ),
+        flush=True,
+    )
+    return complete
@@ -0,0 +1,220 @@
+# MIT License
+#
+# Copyright (c) [2020 - 2021] Mauro Bringolf and Dominik Winterer
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import os
+import json
+import random
+import logging
+
+# Seconds between saves of the scheduler state
+SCHEDULE_SAVE_INTERVAL = 60
+
+# Statistic counters counting as yield of a seed
+YIELD_COUNTERS = [
+    "regression_incompleteness",
+    "implication_incompleteness",
+    "crashes",
+    "soundness",
+]
+
+
+def seed_feedback(before, after, invalid=False):
+    """
+    Summarizes the visit of a seed from the Statistic counters() before and
+    after the visit.
+    """
+    return {
+        "invalid": invalid,
+        "yield": sum(after[c] - before[c] for c in YIELD_COUNTERS),
+        "solver_time": after["solver_time"] - before["solver_time"],
+        "timeouts": after["timeout"] - before["timeout"],
+    }
+
+
+class UniformSeedScheduler:
+    """
+    Visits every seed once in random order.
+    """
+
+    def __init__(self, seeds):
+        self.seeds = list(seeds)
+
+    def next(self):
+        """
+        :returns: the next seed to visit or None if the campaign is over.
+        """
+        if not self.seeds:
+            return None
+        # Swap the chosen seed to the end to pop in O(1).
+        i = random.randrange(len(self.seeds))
+        self.seeds[i], self.seeds[-1] = self.seeds[-1], self.seeds[i]
+        return self.seeds.pop()
+
+    def record(self, seed, feedback):
+        pass
+
+    def save(self):
+        pass
+
+
+class SumTree:
+    """
+    Weights of the items 0 to n - 1 in the leaves of a complete binary tree
+    whose inner nodes hold the sum of their children, so that updating a
+    weight and sampling an item proportionally to its weight take O(log n).
+    """
+
+    def __init__(self, weights):
+        self.size = 1
+        while self.size < len(weights):
+            self.size *= 2
+        self.tree = [0.0] * self.size + list(weights)
+        self.tree += [0.0] * (2 * self.size - len(self.tree))
+        for node in range(self.size - 1, 0, -1):
+            self.tree[node] = self.tree[2 * node] + self.tree[2 * node + 1]
+
+    def total(self):
+        return self.tree[1]
+
+    def update(self, i, weight):
+        node = self.size + i
+        self.tree[node] = weight
+        node //= 2
+        while node:
+            self.tree[node] = self.tree[2 * node] + self.tree[2 * node + 1]
+            node //= 2
+
+    def sample(self):
+        """
+        :returns: an item drawn with probability proportional to its weight,
+                  the total weight must be positive.
+        """
+        r = random.random() * self.tree[1]
+        node = 1
+        while node < self.size:
+            left = self.tree[2 * node]
+            # Rounding must not lead into a subtree of weight 0.
+            if r < left or self.tree[2 * node + 1] <= 0:
+                node = 2 * node
+            else:
+                r -= left
+                node = 2 * node + 1
+        return node - self.size
+
+
+class YieldSeedScheduler:
+    """
+    Power schedule picking seeds with probability proportional to their
+    observed yield (incompleteness, crash and soundness triggers) per solver
+    second. Seeds that time out are de-prioritized, seeds that fail to parse
+    are not revisited in the campaign and strongly de-prioritized in later
+    ones. Unvisited seeds have the prior yield of PRIOR_YIELD per
+    PRIOR_TIME seconds so that they are explored early.
+
+    The campaign visits as many seeds as the corpus has, revisiting
+    productive seeds at the expense of unproductive ones. The statistics are
+    kept in statefile, if given, to carry them across campaigns. The weights
+    are kept in a SumTree and only the recorded seed's weight is updated.
+    """
+
+    PRIOR_YIELD = 1.0
+    PRIOR_TIME = 1.0
+    INVALID_PENALTY = 0.01
+
+    def __init__(self, seeds, statefile=None):
+        self.seeds = list(seeds)
+        self.budget = len(self.seeds)
+        self.statefile = statefile
+        self.failed = set()  # seeds that failed to parse in this campaign
+        self.state = {}
+        if statefile and os.path.isfile(statefile):
+            try:
+                with open(statefile, "r") as reader:
+                    self.state = json.load(reader)
+            except (OSError, ValueError):
+                logging.info("Could not read seed schedule, starting afresh.")
+        self.positions = {}
+        for i, seed in enumerate(self.seeds):
+            self.positions.setdefault(seed, []).append(i)
+        self.weights = SumTree([self.weight(seed) for seed in self.seeds])
+
+    def stats(self, seed):
+        return self.state.setdefault(
+            seed,
+            {"visits": 0, "yield": 0, "solver_time": 0.0, "timeouts": 0, "invalid": 0},
+        )
+
+    def weight(self, seed):
+        if seed in self.failed:
+            return 0.0
+        stats = self.state.get(seed)
+        if not stats:
+            return self.PRIOR_YIELD / self.PRIOR_TIME
+        weight = (self.PRIOR_YIELD + stats["yield"]) / (
+            self.PRIOR_TIME + stats["solver_time"]
+        )
+        weight /= 1 + stats["timeouts"] / max(stats["visits"], 1)
+        if stats["invalid"]:
+            weight *= self.INVALID_PENALTY
+        return weight
+
+    def next(self):
+        if self.budget <= 0 or not self.seeds:
+            return None
+        if self.weights.total() <= 0:
+            return None
+        self.budget -= 1
+        return self.seeds[self.weights.sample()]
+
+    def record(self, seed, feedback):
+        stats = self.stats(seed)
+        stats["visits"] += 1
+        if feedback["invalid"]:
+            stats["invalid"] += 1
+            self.failed.add(seed)
+        else:
+            stats["yield"] += feedback["yield"]
+            stats["solver_time"] += feedback["solver_time"]
+            stats["timeouts"] += feedback["timeouts"]
+        weight = self.weight(seed)
+        for i in self.positions.get(seed, []):
+            self.weights.update(i, weight)
+
+    def save(self):
+        if not self.statefile:
+            return
+        tmp = self.statefile + "." + str(os.getpid())
+        try:
+            with open(tmp, "w") as writer:
+                json.dump(self.state, writer)
+            os.replace(tmp, self.statefile)
+        except OSError:
+            logging.info("Could not save seed schedule.")
+
+
+def make_seed_scheduler(args, seeds):
+    if args.seed_schedule == "yield":
+        statefile = None
+        if not args.no_disk_cache:
+            statefile = os.path.join(args.cachefolder, "seed-schedule.json")
+        return YieldSeedScheduler(seeds, statefile)
+    return UniformSeedScheduler(seeds)
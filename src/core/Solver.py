@@ -20,12 +20,39 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
+import os
+import asyncio
 import subprocess
 from enum import Enum
 
 from src.base.Exitcodes import ERR_USAGE
 
 
+# Command-line flags that make a solver read SMT-LIB from stdin. Solvers not
+# listed here are assumed to read stdin when no file is given.
+STDIN_FLAGS = {
+    "z3": ["-in"],
+    "cvc5": ["--lang=smt2", "--incremental"],
+    "cvc4": ["--lang=smt2", "--incremental"],
+}
+
+
+def solver_cmd(cli):
+    return list(filter(None, cli.split(" ")))
+
+
+def stdin_cmd(cli):
+    """
+    Returns the command running the solver cli on SMT-LIB read from stdin.
+    """
+    cmd = solver_cmd(cli)
+    name = os.path.basename(cmd[0])
+    for solver, flags in STDIN_FLAGS.items():
+        if name.startswith(solver):
+            return cmd + flags
+    return cmd
+
+
 class SolverQueryResult(Enum):
     """
     Enum storing the result of a single solver check-sat query.
@@ -94,16 +121,68 @@ class Solver:
         self.cil = cil
 
     def solve(self, file, timeout, debug=False):
+        return self.run(solver_cmd(self.cil) + [file], timeout, debug)
+
+    def solve_testcase(self, testcase, timeout, debug=False):
+        """
+        Runs the solver on a Testcase, passing it through stdin if the
+        testcase has no path.
+        """
+        if testcase.path is None:
+            cmd = stdin_cmd(self.cil)
+            return self.run(cmd, timeout, debug, input=testcase.text.encode())
+        cmd = solver_cmd(self.cil) + [testcase.path]
+        return self.run(cmd, timeout, debug, pass_fds=testcase.pass_fds())
+
+    async def solve_testcase_async(self, testcase, timeout):
+        """
+        Like solve_testcase, but as a coroutine. If the coroutine is
+        cancelled the solver process is killed.
+        """
+        input = None
+        if testcase.path is None:
+            cmd = stdin_cmd(self.cil)
+            input = testcase.text.encode()
+        else:
+            cmd = solver_cmd(self.cil) + [testcase.path]
+
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdin=subprocess.PIPE if input is not None else None,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                pass_fds=testcase.pass_fds(),
+            )
+        except FileNotFoundError:
+            print('error: solver "' + cmd[0] + '" not found', flush=True)
+            exit(ERR_USAGE)
+
+        try:
+            stdout, stderr = await asyncio.wait_for(proc.communicate(input), timeout)
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            return "", "", 137
+        except asyncio.CancelledError:
+            proc.kill()
+            await proc.wait()
+            raise
+
+        return stdout.decode(), stderr.decode(), proc.returncode
+
+    def run(self, cmd, timeout, debug=False, input=None, pass_fds=()):
         try:
-            cmd = list(filter(None, self.cil.split(" "))) + [file]
             if debug:
                 print("cmd: " + " ".join(cmd), flush=True)
             output = subprocess.run(
                 cmd,
+                input=input,
                 timeout=timeout,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE,
                 shell=False,
+                pass_fds=pass_fds,
             )
 
         except subprocess.TimeoutExpired as te:
@@ -135,6 +214,10 @@ class Solver:
 
     def solve_to_result(self, file, timeout, debug=False):
         stdout, stderr, exitcode = self.solve(file, timeout, debug)
+        return Solver.to_result(stdout, stderr, exitcode)
+
+    @staticmethod
+    def to_result(stdout, stderr, exitcode):
         if exitcode == 0 and stderr.strip() == "":
             if stdout.strip() == "sat":
                 return SolverQueryResult.SAT
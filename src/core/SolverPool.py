@@ -0,0 +1,227 @@
+# MIT License
+#
+# Copyright (c) [2020 - 2021] Mauro Bringolf and Dominik Winterer
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import io
+import os
+import time
+import logging
+import selectors
+import threading
+import subprocess
+
+from src.core.Solver import Solver, stdin_cmd
+from src.base.Utils import random_string
+from src.base.Exitcodes import ERR_USAGE
+from src.parsing.CommandReader import read_commands, command_name
+
+
+def strip_exit(script):
+    """
+    Removes the (exit) commands from script, which would end the persistent
+    solver process before the sentinel. Malformed scripts are kept as they
+    are and left to the solver.
+    """
+    if "exit" not in script:
+        return script
+    try:
+        commands = list(read_commands(io.StringIO(script)))
+    except ValueError:
+        return script
+    return "\n".join(cmd for cmd in commands if command_name(cmd) != "exit")
+
+
+class SolverProcess:
+    """
+    A long-lived solver process reading SMT-LIB from stdin. Every query is
+    preceded by (reset) and followed by an (echo ...) of a sentinel marking the
+    end of the query's output.
+    """
+
+    def __init__(self, cli):
+        self.cli = cli
+        self.queries = 0
+        self.sentinel = "janus-done-" + random_string(10)
+        cmd = stdin_cmd(cli)
+        try:
+            self.proc = subprocess.Popen(
+                cmd,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                bufsize=0,
+            )
+        except FileNotFoundError:
+            print('error: solver "' + cmd[0] + '" not found', flush=True)
+            exit(ERR_USAGE)
+        for stream in [self.proc.stdin, self.proc.stdout, self.proc.stderr]:
+            os.set_blocking(stream.fileno(), False)
+
+    def is_alive(self):
+        return self.proc.poll() is None
+
+    def kill(self):
+        if self.is_alive():
+            self.proc.kill()
+        self.proc.wait()
+        for stream in [self.proc.stdin, self.proc.stdout, self.proc.stderr]:
+            stream.close()
+
+    def query(self, script, timeout):
+        """
+        Sends script to the solver and collects its output.
+
+        :returns: stdout, stderr and exit code like Solver.solve. The exit code
+                  is 137 on a timeout and the solver's exit code if it
+                  terminated, in both cases the process is not usable anymore.
+                  A query answered with an (error ...) gets exit code 1,
+                  like solvers exit after reporting errors in a file.
+        """
+        self.queries += 1
+        query = "(reset)\n%s\n(echo \"%s\")\n" % (strip_exit(script), self.sentinel)
+        pending = memoryview(query.encode())
+        sentinel = self.sentinel.encode()
+        stdout, stderr = bytearray(), bytearray()
+        deadline = time.time() + timeout
+
+        selector = selectors.DefaultSelector()
+        selector.register(self.proc.stdin, selectors.EVENT_WRITE)
+        selector.register(self.proc.stdout, selectors.EVENT_READ)
+        selector.register(self.proc.stderr, selectors.EVENT_READ)
+        stdout_open = True
+        try:
+            while sentinel not in stdout:
+                if not stdout_open:
+                    # EOF before the sentinel: the solver terminated.
+                    self.proc.wait()
+                    stderr += self.drain(self.proc.stderr)
+                    returncode = self.proc.returncode
+                    self.kill()
+                    return stdout.decode(), stderr.decode(), returncode
+
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    self.kill()
+                    return stdout.decode(), stderr.decode(), 137
+
+                for key, _ in selector.select(remaining):
+                    if key.fileobj is self.proc.stdin:
+                        try:
+                            written = os.write(key.fd, pending[:65536])
+                        except BrokenPipeError:
+                            written = len(pending)
+                        pending = pending[written:]
+                        if not pending:
+                            selector.unregister(self.proc.stdin)
+                        continue
+
+                    data = os.read(key.fd, 65536)
+                    if not data:
+                        selector.unregister(key.fileobj)
+                        if key.fileobj is self.proc.stdout:
+                            stdout_open = False
+                    elif key.fileobj is self.proc.stdout:
+                        stdout += data
+                    else:
+                        stderr += data
+        finally:
+            selector.close()
+
+        stderr += self.drain(self.proc.stderr)
+        # Cut off the line of the sentinel.
+        end = stdout.rfind(b"\n", 0, stdout.index(sentinel)) + 1
+        stdout = stdout[:end].decode()
+        errors = any(line.startswith("(error ") for line in stdout.splitlines())
+        return stdout, stderr.decode(), 1 if errors else 0
+
+    def drain(self, stream):
+        data = bytearray()
+        try:
+            while True:
+                chunk = os.read(stream.fileno(), 65536)
+                if not chunk:
+                    break
+                data += chunk
+        except (BlockingIOError, ValueError):
+            pass
+        return data
+
+
+class SolverPool:
+    """
+    Keeps idle solver processes per solver cli for reuse across mutants. A
+    process is recycled after a crash, a timeout or max_queries queries.
+    """
+
+    def __init__(self, max_queries):
+        self.max_queries = max_queries
+        self.idle = {}
+        self.lock = threading.Lock()
+
+    def acquire(self, cli):
+        with self.lock:
+            processes = self.idle.get(cli, [])
+            if processes:
+                return processes.pop()
+        logging.debug(f"Starting persistent solver process: {cli}")
+        return SolverProcess(cli)
+
+    def release(self, process):
+        if not process.is_alive() or process.queries >= self.max_queries:
+            process.kill()
+            return
+        with self.lock:
+            self.idle.setdefault(process.cli, []).append(process)
+
+    def solve(self, cli, file, timeout):
+        with open(file, "r") as reader:
+            script = reader.read()
+        return self.query(cli, script, timeout)
+
+    def query(self, cli, script, timeout):
+        process = self.acquire(cli)
+        try:
+            return process.query(script, timeout)
+        finally:
+            self.release(process)
+
+    def close(self):
+        with self.lock:
+            for processes in self.idle.values():
+                for process in processes:
+                    process.kill()
+            self.idle = {}
+
+
+class PersistentSolver(Solver):
+    """
+    Solver running queries on the processes of a SolverPool.
+    """
+
+    def __init__(self, cil, pool):
+        super().__init__(cil)
+        self.pool = pool
+
+    def solve(self, file, timeout, debug=False):
+        return self.pool.solve(self.cil, file, timeout)
+
+    def solve_testcase(self, testcase, timeout, debug=False):
+        return self.pool.query(self.cil, testcase.text, timeout)
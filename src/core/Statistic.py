@@ -33,6 +33,8 @@ class Statistic:
         self.unsuccessful_generations = 0
         self.mutants = 0
         self.invalid_mutants = 0
+        self.ill_typed_mutants = 0
+        self.duplicate_mutants = 0
         self.regression_incompleteness = 0
         self.implication_incompleteness = 0
         self.crashes = 0
@@ -40,7 +42,25 @@ class Statistic:
         self.duplicates = 0
         self.timeout = 0
         self.solver_calls = 0
+        self.solver_time = 0.0
         self.effective_calls = 0
+        self.cache_lookups = 0
+        self.cache_hits = 0
+
+    def counters(self):
+        """
+        Returns the counters as a dict, e.g. to send them to another process.
+        """
+        counters = vars(self).copy()
+        del counters["starttime"]
+        return counters
+
+    def merge(self, counters):
+        """
+        Adds counters obtained from another Statistic's counters().
+        """
+        for name, value in counters.items():
+            setattr(self, name, getattr(self, name) + value)
 
     def printbar(self, start_time):
         total_time = time.time() - start_time
@@ -66,6 +86,11 @@ class Statistic:
                 mutants_per_sec_str,
             )
         )
+        if self.cache_lookups != 0:
+            hit_rate = round(
+                (float(self.cache_hits) / float(self.cache_lookups)) * 100, 1
+            )
+            bar += ", cache hits: %s%%" % hit_rate
         logging.info(bar)
 
     def printsum(self):
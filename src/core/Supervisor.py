@@ -0,0 +1,253 @@
+# MIT License
+#
+# Copyright (c) [2020 - 2021] Mauro Bringolf and Dominik Winterer
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import copy
+import time
+import queue
+import signal
+import logging
+import traceback
+import multiprocessing
+
+from src.core.Statistic import Statistic
+from src.core.Logger import init_logging, log_num_seeds
+from src.core.FuzzerUtil import get_seeds
+from src.core.SeedScheduler import (
+    make_seed_scheduler,
+    seed_feedback,
+    SCHEDULE_SAVE_INTERVAL,
+)
+from src.mutators.ImplicationBasedWeakeningStrengthening.RuleScheduler import (
+    merge_rule_stats,
+)
+
+from src.base.Utils import random_string
+from src.base.Exitcodes import (
+    OK_BUGS,
+    OK_NOBUGS,
+    ERR_USAGE,
+    ERR_INTERNAL,
+    ERR_EXHAUSTED_DISK,
+)
+
+# Exit codes of workers that indicate a problem restarting will not fix.
+FATAL_WORKER_EXITCODES = [ERR_USAGE, ERR_EXHAUSTED_DISK]
+
+
+def run_worker(args, worker_id, seed_queue, status_queue):
+    """
+    Entry point of a worker process.
+    """
+    from src.core.Fuzzer import Fuzzer
+
+    # The parser timeout raises KeyboardInterrupt in the main thread, so the
+    # worker must not inherit the supervisor's SIGINT handler.
+    signal.signal(signal.SIGINT, signal.default_int_handler)
+
+    # Forked workers inherit the supervisor's log handlers. Every worker
+    # writes to its own log file instead.
+    for handler in logging.getLogger().handlers[:]:
+        logging.getLogger().removeHandler(handler)
+
+    try:
+        fuzzer = Fuzzer(args)
+        fuzzer.run_worker(worker_id, seed_queue, status_queue)
+    except KeyboardInterrupt:
+        exit(OK_NOBUGS)
+    except Exception:
+        logging.error(traceback.format_exc())
+        exit(ERR_INTERNAL)
+    exit(OK_NOBUGS)
+
+
+class Supervisor:
+    """
+    Realizes the '--jobs N' mode: the seeds are handed out to N worker
+    processes, each running a Fuzzer, from one shared queue. The statistics of
+    the workers are merged into a single status bar and workers that die are
+    restarted.
+    """
+
+    def __init__(self, args):
+        self.args = args
+        self.statistic = Statistic()
+        self.old_time = time.time()
+        self.start_time = time.time()
+        self.name = random_string()
+        self.workers = {}  # worker id -> process
+        self.worker_stats = {}  # worker id -> counters of the worker
+        self.worker_seeds = {}  # worker id -> seed currently processed
+        self.worker_rule_stats = {}  # worker id -> stats of the rule scheduler
+        self.next_worker_id = 0
+        self.queued_seeds = 0
+
+        init_logging(self.args.quiet, self.name, args)
+
+        # Workers never print to the console, the supervisor prints for them.
+        self.worker_args = copy.copy(args)
+        self.worker_args.quiet = True
+        # Workers are daemonic and cannot start parse workers of their own.
+        self.worker_args.parse_jobs = 0
+
+        self.seed_queue = multiprocessing.Queue()
+        self.status_queue = multiprocessing.Queue()
+
+    def start_worker(self):
+        worker_id = self.next_worker_id
+        self.next_worker_id += 1
+        process = multiprocessing.Process(
+            target=run_worker,
+            args=(self.worker_args, worker_id, self.seed_queue, self.status_queue),
+            daemon=True,
+        )
+        process.start()
+        self.workers[worker_id] = process
+        logging.debug(f"Started worker {worker_id} (pid {process.pid}).")
+
+    def feed_seeds(self, scheduler):
+        """
+        Keeps the seed queue short so that the seeds are handed out in the
+        order the scheduler picks them, taking into account the feedback of
+        the workers. Sends one None per worker once the scheduler is done.
+        """
+        while not self.all_seeds_queued and self.queued_seeds < 2 * self.args.jobs:
+            seed = scheduler.next()
+            if seed is None:
+                for _ in range(self.args.jobs):
+                    self.seed_queue.put(None)
+                self.all_seeds_queued = True
+                break
+            self.seed_queue.put(seed)
+            self.queued_seeds += 1
+
+    def collect_status(self, timeout, scheduler):
+        try:
+            msg = self.status_queue.get(timeout=timeout)
+            while True:
+                kind, worker_id, payload = msg
+                if kind == "seed":
+                    self.queued_seeds -= 1
+                    self.worker_seeds[worker_id] = payload
+                elif kind == "stats":
+                    self.worker_stats[worker_id] = payload
+                elif kind == "feedback":
+                    self.worker_seeds.pop(worker_id, None)
+                    scheduler.record(*payload)
+                elif kind == "rules":
+                    self.worker_rule_stats[worker_id] = payload
+                msg = self.status_queue.get_nowait()
+        except queue.Empty:
+            pass
+
+        self.statistic = Statistic()
+        self.statistic.starttime = self.start_time
+        for counters in self.worker_stats.values():
+            self.statistic.merge(counters)
+
+    def check_workers(self, scheduler):
+        """
+        Restarts the workers that died. The seed a worker died on is reported
+        to the scheduler as invalid, so that it is not handed out again.
+        """
+        for worker_id, process in list(self.workers.items()):
+            if process.is_alive():
+                continue
+
+            del self.workers[worker_id]
+            seed = self.worker_seeds.pop(worker_id, None)
+            if process.exitcode == OK_NOBUGS:
+                logging.debug(f"Worker {worker_id} finished.")
+                continue
+
+            logging.info(
+                f"Worker {worker_id} died with exit code {process.exitcode} "
+                f"({seed or 'no seed'})."
+            )
+            if seed is not None:
+                counters = Statistic().counters()
+                scheduler.record(seed, seed_feedback(counters, counters, invalid=True))
+            if process.exitcode in FATAL_WORKER_EXITCODES:
+                self.fatal_exitcode = process.exitcode
+                continue
+            self.start_worker()
+
+    def run(self):
+        """
+        Starts the workers and supervises them until all seeds are processed.
+        """
+        seeds = get_seeds(self.args)
+        log_num_seeds(seeds, self.args.SOLVER_CLIS)
+
+        scheduler = make_seed_scheduler(self.args, seeds)
+        last_save = time.time()
+
+        self.all_seeds_queued = False
+        self.fatal_exitcode = None
+        try:
+            for _ in range(self.args.jobs):
+                self.start_worker()
+
+            while self.workers:
+                self.feed_seeds(scheduler)
+                self.collect_status(0.5, scheduler)
+                self.check_workers(scheduler)
+                self.print_stats()
+
+                if self.fatal_exitcode is not None:
+                    exit(self.fatal_exitcode)
+
+                if time.time() - last_save >= SCHEDULE_SAVE_INTERVAL:
+                    scheduler.save()
+                    last_save = time.time()
+
+            # Statistics sent right before the workers exited
+            self.collect_status(0.1, scheduler)
+        finally:
+            for process in self.workers.values():
+                process.terminate()
+            scheduler.save()
+
+        self.terminate()
+
+    def print_stats(self):
+        if time.time() - self.old_time >= 2.0:
+            self.statistic.printbar(self.start_time)
+            self.old_time = time.time()
+
+    def export_rule_stats(self):
+        if not self.args.rule_stats:
+            return
+        try:
+            merge_rule_stats(self.worker_rule_stats.values()).export(
+                self.args.rule_stats
+            )
+        except OSError:
+            logging.error("error: couldn't write rule statistics.")
+
+    def terminate(self):
+        self.export_rule_stats()
+        print("All seeds processed", flush=True)
+        if not self.args.quiet:
+            self.statistic.printsum()
+        if self.statistic.crashes + self.statistic.soundness == 0:
+            exit(OK_NOBUGS)
+        exit(OK_BUGS)
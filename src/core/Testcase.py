@@ -0,0 +1,102 @@
+# MIT License
+#
+# Copyright (c) [2020 - 2021] Mauro Bringolf and Dominik Winterer
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import os
+import threading
+
+# Ways of passing a mutant to the solvers
+DELIVERY_MODES = ["file", "stdin", "memfd"]
+
+
+class Testcase:
+    """
+    A mutant as delivered to the solvers. Depending on the delivery mode the
+    mutant is written to the scratch folder ("file"), piped to the solvers'
+    stdin ("stdin") or kept in an anonymous in-memory file passed to the
+    solvers as a /proc/self/fd path ("memfd").
+
+    Solver runs hold a reference to the testcase by acquire() and release()
+    such that close() frees the file only after the last run finished.
+    """
+
+    def __init__(self, text, delivery, scratchfile):
+        self.text = text
+        self.delivery = delivery
+        self.path = None
+        self.fd = None
+        self.refs = 0
+        self.closed = False
+        self.lock = threading.Lock()
+
+        if delivery == "file":
+            with open(scratchfile, "w") as testcase_writer:
+                testcase_writer.write(text)
+            self.path = scratchfile
+        elif delivery == "memfd":
+            self.fd = os.memfd_create(os.path.basename(scratchfile))
+            os.write(self.fd, text.encode())
+            self.path = "/proc/self/fd/%d" % self.fd
+
+    def pass_fds(self):
+        """
+        File descriptors the solver process has to inherit to open self.path.
+        """
+        return (self.fd,) if self.fd is not None else ()
+
+    def acquire(self):
+        """
+        :returns: False if the testcase was already closed.
+        """
+        with self.lock:
+            if self.closed:
+                return False
+            self.refs += 1
+            return True
+
+    def release(self):
+        with self.lock:
+            self.refs -= 1
+            if self.closed and self.refs == 0:
+                self.free()
+
+    def close(self):
+        with self.lock:
+            self.closed = True
+            if self.refs == 0:
+                self.free()
+
+    def free(self):
+        if self.delivery == "file":
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+        elif self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+    def save(self, path):
+        """
+        Writes the testcase to path, e.g. for a bug report.
+        """
+        with open(path, "w") as writer:
+            writer.write(self.text)
@@ -0,0 +1,145 @@
+# MIT License
+#
+# Copyright (c) [2020 - 2021] Mauro Bringolf and Dominik Winterer
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from src.parsing.Ast import Assert
+from src.parsing.Traversal import preorder
+
+
+def child_parities(term, parity):
+    """
+    Returns the indices of the subterms of term the rules may rewrite, paired
+    with their parity.
+    """
+    if term.op == "not":
+        return [(0, -parity)]
+
+    elif term.op == "and" or term.op == "or":
+        return [(i, parity) for i in range(len(term.subterms))]
+
+    elif term.op == "implies" or (term.op == "=>" and term.subterms[0].type == "Bool"):
+        n = len(term.subterms)
+        return [(i, -parity) for i in range(n - 1)] + [(n - 1, parity)]
+
+    elif term.op == "ite":
+        # Note that we ignore 'b' because its parity is ambiguous in 'ite'
+        return [(1, parity), (2, parity)]
+
+    elif term.let_terms is not None or term.quantifier is not None:
+        return [(i, parity) for i in range(len(term.subterms))]
+
+    return []
+
+
+def positions(term, parity, path=()):
+    """
+    Yields the subformulas of term the rules may rewrite in pre-order, as
+    triples of the node, its parity and its path, i.e., the indices of the
+    subterms leading from term to the node.
+    """
+
+    def children(node, context):
+        parity, path = context
+        return [
+            (node.subterms[i], (child_parity, path + (i,)))
+            for i, child_parity in child_parities(node, parity)
+        ]
+
+    for node, (parity, path) in preorder(term, (parity, path), children):
+        yield node, parity, path
+
+
+def pre_order(entry):
+    index, path = entry[0], entry[1]
+    return index, path
+
+
+class CandidateIndex:
+    """
+    The subformulas of a script the rules may rewrite, collected with their
+    parity in a single traversal. A rule's candidates (index, path, parity),
+    index being the position of the assert in the script's commands, are
+    computed from these the first time they are asked for, so rules the
+    scheduler never gets to are not checked.
+    """
+
+    def __init__(self, oracle, nodes, candidates=None):
+        self.oracle = oracle
+        self.nodes = nodes  # (index, path, parity, node) in pre-order
+        # rule -> candidates found so far and the nodes not checked yet
+        self.by_rule = candidates if candidates is not None else {}
+
+    @staticmethod
+    def build(script, oracle):
+        nodes = []
+        for index, cmd in enumerate(script.commands):
+            if isinstance(cmd, Assert):
+                nodes.extend(
+                    (index, path, parity, node)
+                    for node, parity, path in positions(cmd.term, 1)
+                )
+        return CandidateIndex(oracle, nodes)
+
+    def candidates(self, rule):
+        entries, unchecked = self.by_rule.get(rule, ([], self.nodes))
+        if unchecked:
+            entries = entries + [
+                (index, path, parity)
+                for index, path, parity, node in unchecked
+                if rule.is_applicable(node, self.oracle * parity)
+            ]
+            entries.sort(key=pre_order)
+            self.by_rule[rule] = (entries, [])
+        return entries
+
+    def update(self, script, index, path, parity):
+        """
+        Returns the index of script, which is the script of this index with
+        the node at path in commands[index] rewritten. Only the rewritten
+        subterm and the nodes above it are visited again, the candidates of
+        all other nodes are kept.
+        """
+
+        def stale(entry):
+            i, p = entry[0], entry[1]
+            return i == index and (path[: len(p)] == p or p[: len(path)] == path)
+
+        changed = []
+        node, node_parity = script.commands[index].term, 1
+        for depth, i in enumerate(path):
+            changed.append((index, path[:depth], node_parity, node))
+            node_parity = dict(child_parities(node, node_parity))[i]
+            node = node.subterms[i]
+        changed.extend(
+            (index, node_path, node_parity, node)
+            for node, node_parity, node_path in positions(node, parity, path)
+        )
+
+        nodes = [entry for entry in self.nodes if not stale(entry)] + changed
+        nodes.sort(key=pre_order)
+
+        candidates = {}
+        for rule, (entries, unchecked) in self.by_rule.items():
+            candidates[rule] = (
+                [entry for entry in entries if not stale(entry)],
+                [entry for entry in unchecked if not stale(entry)] + changed,
+            )
+        return CandidateIndex(self.oracle, nodes, candidates)
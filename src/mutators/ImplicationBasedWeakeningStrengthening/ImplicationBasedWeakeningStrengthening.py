@@ -31,73 +31,109 @@ from src.mutators.Mutator import Mutator
 from src.parsing.Parse import *
 
 from src.parsing.Ast import Assert
+from src.parsing.Typechecker import typecheck_path, TypeCheckError, UnknownOperator
 
 from src.mutators.ImplicationBasedWeakeningStrengthening.common import *
 from src.mutators.ImplicationBasedWeakeningStrengthening.rules.rule_set import (
     makeRuleSet,
 )
+from src.mutators.ImplicationBasedWeakeningStrengthening.RuleScheduler import (
+    RuleScheduler,
+)
+from src.mutators.ImplicationBasedWeakeningStrengthening.TermPool import TermPool
+from src.mutators.ImplicationBasedWeakeningStrengthening.CandidateIndex import (
+    CandidateIndex,
+    positions,
+)
 
 
 class ImplicationBasedWeakeningStrengthening(Mutator):
-    def __init__(self, script, glbls, args):
+    def __init__(self, script, glbls, args, rule_scheduler=None):
         self.glbls = glbls
         self.script = script
         assert args.oracle in ["sat", "unsat"]
         self.oracle = SAT if args.oracle == "sat" else UNSAT
 
         self.rules = makeRuleSet(args.rule_set)
+        self.ill_typed = False  # whether the last mutant was rejected as ill-typed
+        self.rule_scheduler = rule_scheduler or RuleScheduler()
+
+        # Candidates of the rules in self.script, see candidate_index.
+        self.seed = script
+        self.seed_index = None
+        self.index = None
+        self.index_script = None
 
         formulas = copy.deepcopy(self.get_formulas(script))
+        term_pool = TermPool(formulas, glbls)
         for rule in self.rules:
             rule.glbls = glbls
             rule.formula_pool = formulas
+            rule.term_pool = term_pool
 
     """
-    Returns a list of AST node references paired with their parity
+    Returns a list of AST node references paired with their parity and their
+    path, i.e., the indices of the subterms leading from term to the node.
     """
 
-    def get_candidates(self, term, rule, parity):
-
-        res = []
-        if rule.is_applicable(term, self.oracle * parity):
-            res.append((term, parity))
-
-        if term.op == "not":
-            res.extend(self.get_candidates(term.subterms[0], rule, -parity))
-
-        elif term.op == "and":
-            for arg in term.subterms:
-                res.extend(self.get_candidates(arg, rule, parity))
-
-        elif term.op == "or":
-            for arg in term.subterms:
-                res.extend(self.get_candidates(arg, rule, parity))
-
-        elif term.op == "implies" or (
-            term.op == "=>" and term.subterms[0].type == "Bool"
-        ):
-            lhses = term.subterms[:-1]
-            rhs = term.subterms[-1]
-            for lhs in lhses:
-                res.extend(self.get_candidates(lhs, rule, -parity))
-            res.extend(self.get_candidates(rhs, rule, parity))
-
-        elif term.op == "ite":
-            [b, t1, t2] = term.subterms
-            # Note that we ignore 'b' because its parity is ambiguous in 'ite'
-            res.extend(self.get_candidates(t1, rule, parity))
-            res.extend(self.get_candidates(t2, rule, parity))
-
-        elif term.let_terms is not None:
-
-            for arg in term.subterms:
-                res.extend(self.get_candidates(arg, rule, parity))
-
-        elif term.quantifier is not None:
-            for arg in term.subterms:
-                res.extend(self.get_candidates(arg, rule, parity))
+    def get_candidates(self, term, rule, parity, path=()):
+        return [
+            (node, node_parity, node_path)
+            for node, node_parity, node_path in positions(term, parity, path)
+            if rule.is_applicable(node, self.oracle * node_parity)
+        ]
+
+    def candidate_index(self):
+        """
+        Returns the CandidateIndex of self.script. The index of the seed is
+        kept for the restarts of the walk.
+        """
+        if self.index is None or self.index_script is not self.script:
+            if self.script is not self.seed:
+                self.index = CandidateIndex.build(self.script, self.oracle)
+            else:
+                if self.seed_index is None:
+                    self.seed_index = CandidateIndex.build(self.script, self.oracle)
+                self.index = self.seed_index
+            self.index_script = self.script
+        return self.index
+
+    def copy_path(self, index, path):
+        """
+        Replaces self.script by a copy sharing all terms but the ones on the
+        path from the assert at commands[index] to the node to be rewritten.
+        Rules rewrite the node and its subterms in place, so the node is deep
+        copied. The previous script stays untouched, and so do the formulas
+        of the pool, which aliased the seed's terms and were rewritten along
+        with them when whole scripts were deep copied. Mutants for a given
+        random seed therefore differ from the ones of earlier versions.
+
+        :returns: the copy of the node
+        """
+        script = copy.copy(self.script)
+        script.commands = list(self.script.commands)
+        assrt = copy.copy(script.commands[index])
+        script.commands[index] = assrt
+
+        if not path:
+            assrt.term = copy.deepcopy(assrt.term)
+            assrt.term.parent = None
+            self.script = script
+            return assrt.term
+
+        node = assrt.term = assrt.term.copy_node()
+        for depth, i in enumerate(path):
+            child = node.subterms[i]
+            if depth == len(path) - 1:
+                child = copy.deepcopy(child)
+            else:
+                child = child.copy_node()
+            child.parent = node
+            node.subterms[i] = child
+            node = child
 
-        return res
+        self.script = script
+        return node
 
     def get_formulas(self, script):
         return list(
@@ -107,51 +143,67 @@ class ImplicationBasedWeakeningStrengthening(Mutator):
             )
         )
 
-    def mutate(self):
+    def typecheck_mutant(self, index, path):
+        """
+        Re-annotates the subterm at path of the assert at commands[index],
+        which a rule just rewrote, and the terms above it.
+
+        :returns: False if the mutant is ill-typed
+        """
+        try:
+            typecheck_path(self.script.commands[index].term, path, self.glbls)
+        except (TypeCheckError, UnknownOperator) as e:
+            logging.debug(f"Ill-typed mutant: {e}")
+            return False
+        return True
 
-        formulas = self.get_formulas(self.script)
+    def mutate(self):
+        """
+        Applies a rule to a copy of self.script, see copy_path.
+        """
+        index = self.candidate_index()
 
         success = False
         candidates = []
         number_of_modifications_done = 0
         chosen_rule = None
+        self.ill_typed = False
 
         if logging.getLogger().isEnabledFor(logging.INFO):
-            applicableRules = 0
-            for rule in self.rules:
-                candidates = []
-                for formula in formulas:
-                    candidates.extend(self.get_candidates(formula, rule, 1))
-
-                if len(candidates) > 0:
-                    applicableRules += 1
+            applicableRules = sum(1 for rule in self.rules if index.candidates(rule))
             logging.info(f"Number of applicable rules: {applicableRules}")
 
-        random.shuffle(self.rules)
-
-        for rule in self.rules:
+        for rule in self.rule_scheduler.order(self.rules):
 
-            candidates = []
-
-            # Go through all formulas in script and get candidates for 'rule'
-            for formula in formulas:
-                candidates.extend(self.get_candidates(formula, rule, 1))
+            candidates = index.candidates(rule)
 
             # This rule is applicable to some subformula, so we pick it
             if len(candidates) > 0:
 
                 # Apply the rule to a random candidate
-                to_replace, parity = random.choice(candidates)
+                cmd_index, path, parity = random.choice(candidates)
+                previous = self.script
+                to_replace = self.copy_path(cmd_index, path)
                 rule.apply(to_replace, parity * self.oracle)
-                number_of_modifications_done += 1
                 logging.info(f"Chosen rule: {rule.name}")
                 chosen_rule = rule.name
 
+                if not self.typecheck_mutant(cmd_index, path):
+                    self.script = previous
+                    self.ill_typed = True
+                    break
+
+                self.index = index.update(self.script, cmd_index, path, parity)
+                self.index_script = self.script
+                number_of_modifications_done += 1
+
                 # We successfully modified the script
                 success = True
                 break
 
-        if not success:
+        if self.ill_typed:
+            logging.info("Mutant is ill-typed.")
+        elif not success:
             logging.info("No rule applies.")
 
         return self.script, success, chosen_rule
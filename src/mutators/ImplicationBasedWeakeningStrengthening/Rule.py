@@ -25,6 +25,7 @@ import random
 import string
 
 from src.parsing.Ast import StringConst, Const, Expr
+from src.mutators.ImplicationBasedWeakeningStrengthening.TermPool import TermPool
 
 
 class Rule:
@@ -35,6 +36,7 @@ class Rule:
             self.formula_pool = copy.deepcopy(formula_pool)
 
         self.glbls = None
+        self.term_pool = None
 
         self.random_value_generator = {
             func[4:]: getattr(Rule, func)(self)
@@ -48,32 +50,19 @@ class Rule:
 
     def random_value_node(self, qsort, qvar=None):
         candidates = self.get_candidates(qsort, qvar)
-        candidates += [Const(x, type=s) for x, s in self.glbls.items() if s == qsort]
+        candidates += self.get_term_pool().globals(qsort)
         if len(candidates) > 0:
             return random.choice(candidates)
         else:
             return self.random_value_generator[qsort]()
 
-    def get_candidates(self, sort, unfree_variable):
-
-        res = []
-
-        def go(term):
-            free_variable_names = term.free_variables().keys()
-            if (
-                term.type == sort
-                and (not unfree_variable or unfree_variable not in free_variable_names)
-                and set(free_variable_names).issubset(set((self.glbls.keys())))
-            ):
-                res.append(term)
-            if term.subterms:
-                for t in term.subterms:
-                    go(t)
+    def get_term_pool(self):
+        if self.term_pool is None:
+            self.term_pool = TermPool(self.formula_pool, self.glbls)
+        return self.term_pool
 
-        for f in self.formula_pool:
-            go(f)
-
-        return res
+    def get_candidates(self, sort, unfree_variable):
+        return self.get_term_pool().candidates(sort, unfree_variable)
 
     """
     INTERFACE TO IMPLEMENT
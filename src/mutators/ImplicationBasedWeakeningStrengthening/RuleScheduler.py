@@ -0,0 +1,165 @@
+# MIT License
+#
+# Copyright (c) [2020 - 2021] Mauro Bringolf and Dominik Winterer
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import json
+import math
+import random
+
+RULE_SCHEDULES = ["uniform", "ucb", "thompson"]
+
+
+class RuleScheduler:
+    """
+    Decides in which order the mutator tries the rules; the first applicable
+    rule is applied. The base class tries the rules in uniform random order.
+
+    Rewards are reported per mutant and solver: 1 if the solver returned
+    unknown or a bug was found, 0 otherwise. Every (solver cli, rule) pair is
+    an arm of its own, the learning schedulers rank a rule by its best arm,
+    i.e. by the solver it looks most promising for. The pulls and reward of
+    a rule only count its mutants and those with a reward on any solver, for
+    the exported statistics.
+    """
+
+    def __init__(self):
+        # rule name -> {"pulls": n, "reward": r, "solvers": {cli: {...}}}
+        self.stats = {}
+        self.solver_clis = set()
+
+    def rule_stats(self, rule_name):
+        return self.stats.setdefault(
+            rule_name, {"pulls": 0, "reward": 0, "solvers": {}}
+        )
+
+    def arm(self, rule_name, cli):
+        """
+        :returns: the stats of the (cli, rule_name) arm
+        """
+        solvers = self.stats.get(rule_name, {}).get("solvers", {})
+        return solvers.get(cli, {"pulls": 0, "reward": 0})
+
+    def order(self, rules):
+        rules = list(rules)
+        random.shuffle(rules)
+        return rules
+
+    def record(self, rule_name, rewards):
+        """
+        rule_name:  rule the mutant was generated with
+        rewards:    dict mapping solver clis to their reward on the mutant
+        """
+        if rule_name is None or not rewards:
+            return
+        stats = self.rule_stats(rule_name)
+        stats["pulls"] += 1
+        stats["reward"] += max(rewards.values())
+        for cli, reward in rewards.items():
+            solver_stats = stats["solvers"].setdefault(cli, {"pulls": 0, "reward": 0})
+            solver_stats["pulls"] += 1
+            solver_stats["reward"] += reward
+            self.solver_clis.add(cli)
+
+    def export(self, path):
+        with open(path, "w") as writer:
+            json.dump(self.stats, writer, indent=2, sort_keys=True)
+
+
+class UCBRuleScheduler(RuleScheduler):
+    """
+    Tries the rules in order of the best UCB1 score of their arms; rules
+    never chosen for some solver come first in random order.
+    """
+
+    def __init__(self, exploration=1.0):
+        super().__init__()
+        self.exploration = exploration
+
+    def score(self, rule_name, cli, total):
+        stats = self.arm(rule_name, cli)
+        if stats["pulls"] == 0:
+            return math.inf
+        mean = stats["reward"] / stats["pulls"]
+        return mean + self.exploration * math.sqrt(2 * math.log(total) / stats["pulls"])
+
+    def order(self, rules):
+        totals = {
+            cli: max(sum(self.arm(name, cli)["pulls"] for name in self.stats), 1)
+            for cli in self.solver_clis
+        }
+        keys = {}
+        for rule in rules:
+            score = max(
+                (self.score(rule.name, cli, total) for cli, total in totals.items()),
+                default=math.inf,
+            )
+            keys[rule.name] = (score, random.random())
+        return sorted(rules, key=lambda rule: keys[rule.name], reverse=True)
+
+
+class ThompsonRuleScheduler(RuleScheduler):
+    """
+    Tries the rules in order of the best sample of the Beta posteriors of
+    their arms' reward probabilities.
+    """
+
+    def sample(self, rule_name, cli):
+        stats = self.arm(rule_name, cli)
+        return random.betavariate(
+            1 + stats["reward"], 1 + stats["pulls"] - stats["reward"]
+        )
+
+    def order(self, rules):
+        keys = {}
+        for rule in rules:
+            keys[rule.name] = max(
+                (self.sample(rule.name, cli) for cli in self.solver_clis),
+                default=random.random(),
+            )
+        return sorted(rules, key=lambda rule: keys[rule.name], reverse=True)
+
+
+def make_rule_scheduler(schedule):
+    if schedule == "ucb":
+        return UCBRuleScheduler()
+    if schedule == "thompson":
+        return ThompsonRuleScheduler()
+    return RuleScheduler()
+
+
+def merge_rule_stats(stats_list):
+    """
+    Sums up the stats of several rule schedulers, e.g. of worker processes.
+    """
+    merged = RuleScheduler()
+    for stats in stats_list:
+        for rule_name, rule_stats in stats.items():
+            target = merged.rule_stats(rule_name)
+            target["pulls"] += rule_stats["pulls"]
+            target["reward"] += rule_stats["reward"]
+            for cli, solver_stats in rule_stats["solvers"].items():
+                solver_target = target["solvers"].setdefault(
+                    cli, {"pulls": 0, "reward": 0}
+                )
+                solver_target["pulls"] += solver_stats["pulls"]
+                solver_target["reward"] += solver_stats["reward"]
+                merged.solver_clis.add(cli)
+    return merged
@@ -0,0 +1,62 @@
+# MIT License
+#
+# Copyright (c) [2020 - 2021] Mauro Bringolf and Dominik Winterer
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from src.parsing.Ast import Const
+
+
+class TermPool:
+    """
+    The subterms of the formula pool whose free variables are all global,
+    indexed by sort, for Rule.random_value_node. Built once per seed and
+    shared by all rules.
+    """
+
+    def __init__(self, formulas, glbls):
+        self.glbls = glbls
+        self.terms = {}  # sort -> [(term, free variable names)] in pre-order
+        global_names = set(glbls.keys())
+
+        stack = list(reversed(formulas))
+        while stack:
+            term = stack.pop()
+            names = set(term.free_variables().keys())
+            if names <= global_names:
+                self.terms.setdefault(term.type, []).append((term, names))
+            if term.subterms:
+                stack.extend(reversed(term.subterms))
+
+        self.global_sorts = {}  # sort -> names of the globals of that sort
+        for name, sort in glbls.items():
+            self.global_sorts.setdefault(sort, []).append(name)
+
+    def candidates(self, sort, unfree_variable=None):
+        """
+        Returns the terms of the given sort not containing unfree_variable
+        free.
+        """
+        entries = self.terms.get(sort, [])
+        if not unfree_variable:
+            return [term for term, _ in entries]
+        return [term for term, names in entries if unfree_variable not in names]
+
+    def globals(self, sort):
+        return [Const(name, type=sort) for name in self.global_sorts.get(sort, [])]
@@ -27,7 +27,7 @@ NEGATIVE = -1
 WEAKENING = 1
 STRENGTHENING = -1
 
-from src.parsing.Ast import Const
+from src.parsing.Ast import Const, Quantifier
 import copy
 
 
@@ -43,19 +43,14 @@ def fresh_var(expression, not_in=None):
 
 
 def convert_node_to_quantifier(node, quantifier, quantified_vars, body):
-    # reset all defaults
-    node.__init__()
-
-    # set quantifier fields
-    node.quantifier = quantifier
-    node.quantified_vars = quantified_vars
-    node.subterms = [body]
+    # reset all defaults and set quantifier fields
+    node.assign(Quantifier(quantifier, quantified_vars, [body]))
     node.type = "Bool"
 
 
 def convert_node_to_single_subterm(node):
-    node.__dict__ = node.subterms[0].__dict__.copy()
+    node.assign(node.subterms[0])
 
 
 def convert_to_node(target, source):
-    target.__dict__ = copy.deepcopy(source.__dict__.copy())
+    target.assign(copy.deepcopy(source))
@@ -135,7 +135,7 @@ ALL_RULES: Dict[str, Rule] = {
         s="String",
         f=lambda String_1, Int_1, t: Expr(
             "str.substr",
-            [String_1, t, Expr("str.len", [String_1], type="String")],
+            [String_1, t, Expr("str.len", [String_1], type="Int")],
             type="String",
         ),
         n=2,
@@ -167,7 +167,7 @@ ALL_RULES: Dict[str, Rule] = {
         s="String",
         f=lambda String_1, Int_1, t: Expr(
             "str.substr",
-            [String_1, t, Expr("str.len", [String_1], type="String")],
+            [String_1, t, Expr("str.len", [String_1], type="Int")],
             type="String",
         ),
         P=lambda ts: Expr(
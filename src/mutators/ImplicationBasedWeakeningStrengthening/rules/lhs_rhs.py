@@ -279,13 +279,28 @@ class NumberRelationShiftSkewed(Implication):
             and expression.subterms[0].is_type("Int")
         )
 
+    def absolute_value(self, node, sort):
+        # abs is only defined on Int, so Real terms get an ite instead
+        if sort == "Int":
+            return Expr("abs", [node], type=sort)
+        zero = Const("0.0", type=sort)
+        return Expr(
+            "ite",
+            [
+                Expr(">=", [node, zero], type="Bool"),
+                node,
+                Expr("-", [node], type=sort),
+            ],
+            type=sort,
+        )
+
     def to_RHS(self, expression):
         sort = expression.subterms[0].type
 
         shift_amount_node = self.random_value_node(sort)
-        shift_amount_node_nonneg = Expr("abs", [shift_amount_node], type=sort)
+        shift_amount_node_nonneg = self.absolute_value(shift_amount_node, sort)
         shift_amount_node_nonpos = Expr(
-            "-", [Expr("abs", [shift_amount_node], type=sort)], type=sort
+            "-", [self.absolute_value(shift_amount_node, sort)], type=sort
         )
 
         shift_operator = random.choice(["-", "+"])
@@ -351,9 +366,9 @@ class NumberRelationShiftSkewed(Implication):
     def random_shift_parameters(self, expression):
         sort = expression.subterms[0].type
         shift_amount_node = self.random_value_node(sort)
-        shift_amount_node_nonneg = Expr("abs", [shift_amount_node], type=sort)
+        shift_amount_node_nonneg = self.absolute_value(shift_amount_node, sort)
         shift_amount_node_nonpos = Expr(
-            "-", [Expr("abs", [shift_amount_node], type=sort)], type=sort
+            "-", [self.absolute_value(shift_amount_node, sort)], type=sort
         )
         shift_operator = random.choice(["-", "+"])
         split = random.randrange(1, len(expression.subterms))
@@ -400,7 +415,11 @@ class NumberRelationShiftSkewed(Implication):
         )
 
         for t in target:
-            convert_to_node(t, Expr(shift_operator, [t, shift_amount], type=t.type))
+            # Built from a copy, Expr would make t's parent the new term.
+            shifted = Expr(
+                shift_operator, [copy.deepcopy(t), shift_amount], type=t.type
+            )
+            convert_to_node(t, shifted)
 
     def matches_LHS(self, expression):
         # TODO extend this class to support Reals
@@ -432,7 +451,11 @@ class NumberRelationShiftSkewed(Implication):
         )
 
         for t in target:
-            convert_to_node(t, Expr(shift_operator, [t, shift_amount], type=t.type))
+            # Built from a copy, Expr would make t's parent the new term.
+            shifted = Expr(
+                shift_operator, [copy.deepcopy(t), shift_amount], type=t.type
+            )
+            convert_to_node(t, shifted)
 
 
 class NumberRelationShiftBalanced(Equivalence):
@@ -913,11 +936,17 @@ class OrToImp(Implication):
 
     def to_RHS(self, expression):
         expression.op = "=>"
-        expression.subterms[0] = Expr("not", [expression.subterms[0]], type="Bool")
+        expression.subterms = [
+            Expr("not", [expression.subterms[0]], type="Bool"),
+            expression.subterms[1],
+        ]
 
     def to_LHS(self, expression):
         expression.op = "or"
-        expression.subterms[0] = Expr("not", [expression.subterms[0]], type="Bool")
+        expression.subterms = [
+            Expr("not", [expression.subterms[0]], type="Bool"),
+            expression.subterms[1],
+        ]
 
 
 class StringLeqApp(Implication):
@@ -116,7 +116,7 @@ class Regex_concat_to_option_power(RegexRule):
 
     def apply_regex(self, re, direction):
         args = re.subterms
-        re.op = Expr("_", [Const("re.^"), Const(str(len(args)), type="Int")])
+        re.op = f"(_ re.^ {len(args)})"
         re.subterms = [Expr("re.union", args, type="RegLan")]
 
 
@@ -188,7 +188,7 @@ class Regex_change_range(RegexRule):
         randomly_choose_upper = random.choice([True, False])
         if randomly_choose_upper:
             args = [s2, s3] if direction == WEAKENING else [s3, s2]
-            comparison = Expr("str.<=", args, type="String")
+            comparison = Expr("str.<=", args, type="Bool")
             upper_bound = Expr(
                 "ite",
                 [Expr("and", [s3_is_singleton, comparison], type="Bool"), s3, s2],
@@ -196,10 +196,10 @@ class Regex_change_range(RegexRule):
             )
 
             # Replace upper bound
-            re.subterms[1] = upper_bound
+            re.subterms = [s1, upper_bound]
         else:
             args = [s3, s1] if direction == WEAKENING else [s1, s3]
-            comparison = Expr("str.<=", args, type="String")
+            comparison = Expr("str.<=", args, type="Bool")
             lower_bound = Expr(
                 "ite",
                 [Expr("and", [s3_is_singleton, comparison], type="Bool"), s3, s1],
@@ -207,7 +207,7 @@ class Regex_change_range(RegexRule):
             )
 
             # Replace lower bound
-            re.subterms[0] = lower_bound
+            re.subterms = [lower_bound, s2]
 
 
 class Regex_distribute_union_concat(RegexRule):
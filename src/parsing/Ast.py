@@ -21,6 +21,21 @@
 # SOFTWARE.
 
 import copy
+import weakref
+
+from src.parsing.Traversal import postorder, preorder
+
+
+def _scoped_subterms(term, context):
+    """
+    The subterms of term in the order they bind and use variables, i.e., the
+    terms bound by a let before its body. Constants, labeled terms and
+    variables have none.
+    """
+    if isinstance(term, str) or term.is_const or term.label or term.is_var:
+        return []
+    let_terms = term.let_terms if term.var_binders else []
+    return [(sub, context) for sub in let_terms + term.subterms]
 
 
 class Script:
@@ -32,56 +47,52 @@ class Script:
         self.op_occs = []
         self.assert_cmd = []
 
+        # Variables bound in the first assert are removed from global_vars,
+        # the script keeps a copy with all of them. Every assert is checked
+        # against all global variables.
+        shadowed = None
         for cmd in self.commands:
             if isinstance(cmd, Assert):
-                globs_ = copy.deepcopy(self.global_vars)
-                self._get_free_var_occs(cmd.term, self.global_vars)
-                self.global_vars = globs_
+                bound = set()
+                self._get_free_var_occs(cmd.term, global_vars, bound)
+                if shadowed is None:
+                    shadowed = bound
                 self._get_op_occs(cmd.term)
                 self.assert_cmd.append(cmd)
+        if shadowed is not None:
+            self.global_vars = copy.deepcopy(global_vars)
+            for var in shadowed:
+                global_vars.pop(var, None)
 
     def _get_op_occs(self, e):
-        if isinstance(e, str):
-            return
-        if e.is_const:
-            return
-        if e.label:
-            return
-        if e.is_var:
-            return
+        def is_op(e):
+            return not (isinstance(e, str) or e.is_const or e.label or e.is_var)
 
-        self.op_occs.append(e)
-        for sub in e.subterms:
-            self._get_op_occs(sub)
+        def ops(term, context):
+            return [(sub, context) for sub in term.subterms if is_op(sub)]
 
-    def _get_free_var_occs(self, e, global_vars):
-        if isinstance(e, str):
-            return
-        if e.is_const:
-            return
-        if e.label:
-            return
-        if e.quantifier:
-            for var in list(global_vars):
-                for quantified_var in e.quantified_vars:
-                    if var == quantified_var[0]:
-                        global_vars.pop(var)
-
-        if e.var_binders:
-            for var in list(global_vars):
-                for let_var in e.var_binders:
-                    if var == let_var:
-                        global_vars.pop(var)
-            for let_term in e.let_terms:
-                self._get_free_var_occs(let_term, global_vars)
-
-        if e.is_var:
-            if e.name in global_vars:
-                self.free_var_occs.append(e)
-            return
+        if is_op(e):
+            for term, _ in preorder(e, children=ops):
+                self.op_occs.append(term)
+
+    def _get_free_var_occs(self, e, global_vars, bound):
+        """
+        :bound: variables bound so far, they stay bound for the rest of the
+                assert.
+        """
+        for term, _ in preorder(e, children=_scoped_subterms):
+            if isinstance(term, str) or term.is_const or term.label:
+                continue
+            if term.quantifier:
+                for quantified_var in term.quantified_vars:
+                    bound.add(quantified_var[0])
+
+            if term.var_binders:
+                bound.update(term.var_binders)
 
-        for sub in e.subterms:
-            self._get_free_var_occs(sub, global_vars)
+            if term.is_var:
+                if term.name in global_vars and term.name not in bound:
+                    self.free_var_occs.append(term)
 
     def _decl_commands(self):
         vars, types = [], {}
@@ -96,21 +107,18 @@ class Script:
         return vars, types
 
     def _prefix_free_vars(self, prefix, e):
-        if isinstance(e, str):
-            return
-        if e.is_const:
-            return
-        if e.is_var and e.type:
-            if e in self.free_var_occs:
-                e.name = prefix + e.name
-            return
-
-        if e.var_binders:
-            for i, var in enumerate(e.var_binders):
-                self._prefix_free_vars(prefix, e.let_terms[i])
-
-        for s in e.subterms:
-            self._prefix_free_vars(prefix, s)
+        def unprefixed(term, context):
+            if isinstance(term, str) or term.is_const or (term.is_var and term.type):
+                return []
+            let_terms = term.let_terms if term.var_binders else []
+            return [(sub, context) for sub in let_terms + term.subterms]
+
+        for term, _ in preorder(e, children=unprefixed):
+            if isinstance(term, str) or term.is_const:
+                continue
+            if term.is_var and term.type:
+                if term in self.free_var_occs:
+                    term.name = prefix + term.name
 
     def prefix_vars(self, prefix):
         """
@@ -166,14 +174,21 @@ class Script:
             new_cmds.append(cmd)
         self.commands = new_cmds
 
-    def __str__(self):
-        s = ""
-        for i, c in enumerate(self.commands):
-            if i != len(self.commands) - 1:
-                s += c.__str__() + "\n"
+    def write(self, out):
+        """
+        Writes the SMT-LIB text of the script to the file-like object out,
+        one command at a time.
+        """
+        for i, cmd in enumerate(self.commands):
+            if i > 0:
+                out.write("\n")
+            if isinstance(cmd, Assert):
+                cmd.write(out)
             else:
-                s += c.__str__()
-        return s
+                out.write(cmd.__str__())
+
+    def __str__(self):
+        return "\n".join(cmd.__str__() for cmd in self.commands)
 
 
 class Commands:
@@ -212,6 +227,11 @@ class Assert:
     def __init__(self, term):
         self.term = term
 
+    def write(self, out):
+        out.write("(assert ")
+        self.term.write(out)
+        out.write(")")
+
     def __str__(self):
         return "(assert " + self.term.__str__() + ")"
 
@@ -509,7 +529,83 @@ def LabeledTerm(label, subterms):
     return Term(label=label, subterms=subterms)
 
 
+# Fields of a term, they are the only ones copied between terms.
+TERM_FIELDS = (
+    "name",
+    "type",
+    "is_const",
+    "is_var",
+    "label",
+    "indices",
+    "quantifier",
+    "quantified_vars",
+    "var_binders",
+    "let_terms",
+    "op",
+    "subterms",
+    "is_indexed_id",
+)
+
+# Fields holding strings, booleans, types or None. They are never modified in
+# place and shared between copies.
+ATOMIC_FIELDS = (
+    "name",
+    "type",
+    "is_const",
+    "is_var",
+    "quantifier",
+    "op",
+    "is_indexed_id",
+)
+
+# Fields holding lists or tuples of strings.
+CONTAINER_FIELDS = ("label", "indices", "quantified_vars", "var_binders")
+
+# Fields a term's free variables depend on, setting one of them invalidates the
+# cached free variables.
+FREE_VARIABLE_FIELDS = frozenset(
+    [
+        "name",
+        "is_var",
+        "quantifier",
+        "quantified_vars",
+        "var_binders",
+        "let_terms",
+        "subterms",
+    ]
+)
+
+# Fields a term's structural hash and text depend on, setting one of them
+# invalidates the cached hash and text.
+STRUCTURE_FIELDS = FREE_VARIABLE_FIELDS | frozenset(
+    ["op", "is_const", "label", "indices", "is_indexed_id"]
+)
+
+
+def _frozen(value):
+    """
+    Hashable version of the list-valued fields of a term, e.g. its
+    quantified_vars.
+    """
+    if isinstance(value, (list, tuple)):
+        return tuple(_frozen(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted(value.items()))
+    return value
+
+
 class Term:
+    # Terms have no __dict__. The parent is referenced weakly, so that trees
+    # have no reference cycles and are freed as soon as they are dropped
+    # instead of by the cyclic garbage collector.
+    __slots__ = TERM_FIELDS + (
+        "_parent",
+        "_free_variables",
+        "_hash",
+        "_text",
+        "__weakref__",
+    )
+
     def __init__(
         self,
         name=None,
@@ -519,7 +615,7 @@ class Term:
         label=None,
         indices=None,
         quantifier=None,
-        quantified_vars={},
+        quantified_vars=None,
         var_binders=None,
         let_terms=None,
         op=None,
@@ -527,65 +623,133 @@ class Term:
         is_indexed_id=False,
         parent=None,
     ):
-
-        self._initialize(
-            name=name,
-            type=type,
-            is_const=is_const,
-            is_var=is_var,
-            indices=indices,
-            label=label,
-            quantifier=quantifier,
-            quantified_vars=quantified_vars,
-            var_binders=var_binders,
-            let_terms=let_terms,
-            op=op,
-            subterms=subterms,
-            is_indexed_id=is_indexed_id,
-            parent=parent,
+        # A new term has nothing to invalidate, so the fields are set without
+        # going through __setattr__.
+        values = (
+            name,
+            type,
+            is_const,
+            is_var,
+            label,
+            indices,
+            quantifier,
+            quantified_vars,
+            var_binders,
+            let_terms,
+            op,
+            subterms,
+            is_indexed_id,
         )
+        for field, value in zip(TERM_FIELDS, values):
+            object.__setattr__(self, field, value)
+        self._clear_caches()
+        self.parent = parent
         self._add_parent_pointer()
 
-    def _initialize(
-        self,
-        name=None,
-        type=None,
-        is_const=None,
-        is_var=None,
-        label=None,
-        indices=None,
-        quantifier=None,
-        quantified_vars={},
-        var_binders=None,
-        let_terms=None,
-        op=None,
-        subterms=None,
-        is_indexed_id=None,
-        parent=None,
-    ):
-        self.name = name
-        self.type = type
-        self.is_const = is_const
-        self.is_var = is_var
-        self.label = label
-        self.indices = indices
-        self.quantifier = quantifier
-        self.quantified_vars = quantified_vars
-        self.var_binders = var_binders
-        self.let_terms = let_terms
-        self.op = op
-        self.subterms = subterms
-        self.is_indexed_id = is_indexed_id
-        self.parent = parent
+    def _clear_caches(self):
+        object.__setattr__(self, "_free_variables", None)
+        object.__setattr__(self, "_hash", None)
+        object.__setattr__(self, "_text", None)
+
+    @property
+    def parent(self):
+        ref = self._parent
+        return ref() if ref is not None else None
+
+    @parent.setter
+    def parent(self, term):
+        object.__setattr__(
+            self, "_parent", weakref.ref(term) if term is not None else None
+        )
 
     def _add_parent_pointer(self):
         """
-        Adds pointer from each element in subterm to expr.
+        Adds pointer from each element in subterm and let_terms to expr.
         """
-        if self.subterms:
-            for term in self.subterms:
-                if not isinstance(term, str):
-                    term.parent = self
+        ref = weakref.ref(self)
+        for terms in [self.subterms, self.let_terms]:
+            if terms:
+                for term in terms:
+                    if not isinstance(term, str):
+                        object.__setattr__(term, "_parent", ref)
+
+    def __setattr__(self, key, value):
+        if key in STRUCTURE_FIELDS:
+            if key in FREE_VARIABLE_FIELDS:
+                self.invalidate_free_variables()
+            self.invalidate_hash()
+            self.invalidate_text()
+        object.__setattr__(self, key, value)
+        if key == "subterms" or key == "let_terms":
+            self._add_parent_pointer()
+
+    def assign(self, other):
+        """
+        Makes the term a shallow copy of other. The term keeps its parent and
+        becomes the parent of other's subterms.
+        """
+        self.invalidate_free_variables()
+        self.invalidate_hash()
+        self.invalidate_text()
+        for field in TERM_FIELDS:
+            object.__setattr__(self, field, getattr(other, field))
+        object.__setattr__(self, "_hash", other._hash)
+        object.__setattr__(self, "_text", other._text)
+        self._add_parent_pointer()
+
+    def __getstate__(self):
+        return tuple(getattr(self, field) for field in TERM_FIELDS)
+
+    def __setstate__(self, state):
+        for field, value in zip(TERM_FIELDS, state):
+            object.__setattr__(self, field, value)
+        self._clear_caches()
+        object.__setattr__(self, "_parent", None)
+        self._add_parent_pointer()
+
+    def __deepcopy__(self, memo):
+        """
+        Deep copies the term into a tree: the parent pointer is not followed
+        and subterms occurring several times are copied for every occurrence,
+        so that every term of the copy has exactly one parent.
+        """
+        result = Term.__new__(Term)
+        for field in ATOMIC_FIELDS:
+            object.__setattr__(result, field, getattr(self, field))
+        for field in CONTAINER_FIELDS:
+            value = getattr(self, field)
+            if value is not None:
+                value = copy.deepcopy(value, memo)
+            object.__setattr__(result, field, value)
+        for field in ("subterms", "let_terms"):
+            terms = getattr(self, field)
+            if terms is not None:
+                terms = [
+                    term.__deepcopy__(memo)
+                    if isinstance(term, Term)
+                    else copy.deepcopy(term, memo)
+                    for term in terms
+                ]
+            object.__setattr__(result, field, terms)
+        object.__setattr__(result, "_parent", None)
+        object.__setattr__(result, "_free_variables", None)
+        object.__setattr__(result, "_hash", self._hash)
+        object.__setattr__(result, "_text", self._text)
+        result._add_parent_pointer()
+        return result
+
+    def copy_node(self):
+        """
+        Shallow copy with its own list of subterms, the subterms are shared.
+        """
+        result = Term.__new__(Term)
+        for field in TERM_FIELDS:
+            object.__setattr__(result, field, getattr(self, field))
+        if self.subterms is not None:
+            object.__setattr__(result, "subterms", list(self.subterms))
+        object.__setattr__(result, "_parent", self._parent)
+        result._clear_caches()
+        return result
 
     def find_all(self, e, occs):
         """
@@ -593,12 +757,16 @@ class Term:
         """
         if self == e:
             return occs.append(e)
-        if self.subterms:
-            for sub in self.subterms:
+
+        def unmatched(term, context):
+            for sub in term.subterms or []:
                 if sub == e:
                     occs.append(sub)
                 else:
-                    sub.find_all(e, occs)
+                    yield sub, context
+
+        for _ in preorder(self, children=unmatched):
+            pass
 
     def has_subterms(self):
         return self.subterms and len(self.subterms) > 0
@@ -629,44 +797,99 @@ class Term:
 
     def free_variables(self):
         """
-        Compute the set of free variable names in this term
+        Compute the free variables in this term as a dict mapping their names
+        to their occurrences. The result is cached on every subterm and must
+        not be modified.
         """
+        cached = self._free_variables
+        if cached is not None:
+            return cached
+
+        def uncached(term, context):
+            return [
+                (child, context)
+                for child in (term.subterms or []) + (term.let_terms or [])
+                if child._free_variables is None
+            ]
+
+        for term, _ in postorder(self, children=uncached):
+            children = (term.subterms or []) + (term.let_terms or [])
+            result = {}
+            for child in reversed(children):
+                for (var_name, var_nodes) in child._free_variables.items():
+                    result.setdefault(var_name, []).extend(var_nodes)
+            if term.is_var:
+                result.setdefault(term.name, []).append(term)
+
+            if term.quantifier:
+                bound_vars = set(term.quantified_vars[0])
+            elif term.var_binders:
+                bound_vars = set(term.var_binders)
+            else:
+                bound_vars = set()
+            for var in bound_vars & set(result.keys()):
+                del result[var]
 
-        def merge_results(fv1, fv2):
-            for (var_name, var_nodes) in fv2.items():
-                current = fv1.get(var_name, [])
-                current.extend(var_nodes)
-                fv1[var_name] = current
-
-            return fv1
-
-        result = {}
-
-        if self.is_var:
-            current = result.get(self.name, [])
-            current.append(self)
-            result[self.name] = current
+            term._free_variables = result
 
-        children = []
-        if self.subterms:
-            children += self.subterms
-        if self.let_terms:
-            children += self.let_terms
+        return self._free_variables
 
-        for child in children:
-            fvs = child.free_variables()
-            result = merge_results(fvs, result)
+    def invalidate_free_variables(self):
+        """
+        Drops the cached free variables of this term and the terms above it.
+        """
+        term = self
+        while term is not None:
+            term._free_variables = None
+            term = term.parent
 
-        bound_vars = set()
-        if self.quantifier:
-            bound_vars |= set(self.quantified_vars[0])
-        elif self.var_binders:
-            bound_vars |= set(self.var_binders)
+    def __hash__(self):
+        """
+        Structural hash of the term, cached on every subterm. It covers all
+        fields compared by __eq__ but the type annotation, which the
+        typechecker sets after construction.
+        """
+        cached = self._hash
+        if cached is not None:
+            return cached
+
+        def unhashed(term, context):
+            return [
+                (child, context)
+                for child in (term.subterms or []) + (term.let_terms or [])
+                if isinstance(child, Term) and child._hash is None
+            ]
+
+        for term, _ in postorder(self, children=unhashed):
+            term._hash = hash(
+                (
+                    term.name,
+                    term.op,
+                    term.is_const,
+                    term.is_var,
+                    term.is_indexed_id,
+                    _frozen(term.label),
+                    _frozen(term.indices),
+                    term.quantifier,
+                    _frozen(term.quantified_vars),
+                    _frozen(term.var_binders),
+                    tuple(hash(t) for t in term.let_terms or []),
+                    tuple(hash(t) for t in term.subterms or []),
+                )
+            )
 
-        for var in bound_vars & set(result.keys()):
-            del result[var]
+        return self._hash
 
-        return result
+    def invalidate_hash(self):
+        """
+        Drops the cached hash of this term and the terms above it. Hashes are
+        computed for all subterms at once, so the terms above a term without
+        a cached hash have none either.
+        """
+        term = self
+        while term is not None and term._hash is not None:
+            term._hash = None
+            term = term.parent
 
     def substitute(self, e, repl):
         """
@@ -675,26 +898,13 @@ class Term:
         occs = []
         self.find_all(e, occs)
         for occ in occs:
-            occ._initialize(
-                name=copy.deepcopy(repl.name),
-                type=copy.deepcopy(repl.type),
-                is_const=copy.deepcopy(repl.is_const),
-                is_var=copy.deepcopy(repl.is_var),
-                label=copy.deepcopy(repl.label),
-                indices=copy.deepcopy(repl.indices),
-                quantifier=copy.deepcopy(repl.quantifier),
-                quantified_vars=copy.deepcopy(repl.quantified_vars),
-                var_binders=copy.deepcopy(repl.var_binders),
-                let_terms=copy.deepcopy(repl.let_terms),
-                op=copy.deepcopy(repl.op),
-                subterms=copy.deepcopy(repl.subterms),
-                is_indexed_id=copy.deepcopy(repl.is_indexed_id),
-                parent=occ.parent,
-            )
+            occ.assign(copy.deepcopy(repl))
 
     def __eq__(self, other):
         if not isinstance(other, Term):
             return False
+        if self is other:
+            return True
         if self.name != other.name:
             return False
         if self.type != other.type:
@@ -717,64 +927,132 @@ class Term:
             return False
         if self.op != other.op:
             return False
+        # Terms with different structural hashes differ, so the subterms are
+        # only compared for terms that are most likely equal.
+        if hash(self) != hash(other):
+            return False
+        if self.var_binders != other.var_binders:
+            return False
+        if self.let_terms != other.let_terms:
+            return False
         if self.subterms != other.subterms:
             return False
         if self.is_indexed_id != other.is_indexed_id:
             return False
         return True
 
-    def __get_subterm_str__(self):
-        subs_str = ""
-        length = len(self.subterms)
-        for i in range(length):
-            sb = self.subterms[i]
-            if i == length - 1:
-                subs_str += sb.__str__()
-            else:
-                subs_str += sb.__str__() + " "
-        return subs_str
-
-    def __str__(self):
-        if self.is_const or self.is_var or self.is_indexed_id:
-            return self.name
-
+    def _text_items(self):
+        """
+        The SMT-LIB text of a term which is neither a constant nor a
+        variable, as a list of strings and the subterms in between.
+        """
         if self.quantifier:
-            subs_str = self.__get_subterm_str__()
-            n_vars = len(self.quantified_vars[0])
-            s = (
-                "("
-                + self.quantified_vars[0][0]
-                + " "
-                + self.quantified_vars[1][0]
-                + ")"
+            sorted_vars = " ".join(
+                "(" + var + " " + sort + ")"
+                for var, sort in zip(self.quantified_vars[0], self.quantified_vars[1])
             )
-            if len(self.quantified_vars[0]) > 1:
-                for i in range(1, n_vars):
-                    s += (
-                        " ("
-                        + self.quantified_vars[0][i]
-                        + " "
-                        + self.quantified_vars[1][i]
-                        + ")"
-                    )
-            return "(" + self.quantifier + " (" + s + ") " + subs_str + ")"
-
-        elif self.var_binders:
-            s = "(let ("
-            for i, var in enumerate(self.var_binders):
-                s += "(" + var + " " + self.let_terms[i].__str__() + ")"
-            s += ")"
-
+            items = ["(" + self.quantifier + " (" + sorted_vars + ") "]
+            for i, sub in enumerate(self.subterms):
+                if i > 0:
+                    items.append(" ")
+                items.append(sub)
+            items.append(")")
+            return items
+
+        if self.var_binders:
+            items = ["(let ("]
+            for var, term in zip(self.var_binders, self.let_terms):
+                items += ["(" + var + " ", term, ")"]
+            items.append(")")
             for sub in self.subterms:
-                s += " " + sub.__str__()
-            return s + ")"
-
-        elif self.label:
-            subs_str = self.__get_subterm_str__()
-            return "(! " + subs_str + " " + self.label[0] + " " + self.label[1] + ")"
+                items += [" ", sub]
+            items.append(")")
+            return items
+
+        items = ["(! " if self.label else "(" + self.op.__str__() + " "]
+        for i, sub in enumerate(self.subterms):
+            if i > 0:
+                items.append(" ")
+            items.append(sub)
+        if self.label:
+            items.append(" " + self.label[0] + " " + self.label[1] + ")")
         else:
-            subs_str = self.__get_subterm_str__()
-            return "(" + self.op.__str__() + " " + subs_str + ")"
+            items.append(")")
+        return items
+
+    def _render(self, chunks):
+        """
+        Appends the SMT-LIB text of the term to the list chunks, reusing the
+        text cached on its subterms. The text of a subterm is cached when it
+        is at most half as long as its parent's, so that every character is
+        stored in at most logarithmically many cached texts, and the text of
+        a term without parent is cached as well.
+        """
+        cached = self._text
+        if cached is not None:
+            chunks.append(cached)
+            return
+
+        size = 0
+        stack = [(self, None)]
+        while stack:
+            item, parent_frame = stack.pop()
+            if isinstance(item, str):
+                chunks.append(item)
+                size += len(item)
+                continue
+
+            if isinstance(item, list):
+                # All of the term's text was appended.
+                term, first_chunk, start, spans = item
+                length = size - start
+                for (sub, sub_first_chunk, sub_last_chunk, sub_length) in spans:
+                    if 2 * sub_length <= length:
+                        sub._text = "".join(chunks[sub_first_chunk:sub_last_chunk])
+                if parent_frame is not None:
+                    parent_frame[3].append((term, first_chunk, len(chunks), length))
+                elif term.parent is None:
+                    term._text = "".join(chunks[first_chunk:])
+                continue
+
+            term = item
+            if term.is_const or term.is_var or term.is_indexed_id:
+                chunks.append(term.name)
+                size += len(term.name)
+                continue
+            cached = term._text
+            if cached is not None:
+                chunks.append(cached)
+                size += len(cached)
+                continue
+
+            frame = [term, len(chunks), size, []]
+            stack.append((frame, parent_frame))
+            stack.extend((sub, frame) for sub in reversed(term._text_items()))
+
+    def write(self, out):
+        """
+        Writes the SMT-LIB text of the term to the file-like object out.
+        """
+        chunks = []
+        self._render(chunks)
+        out.writelines(chunks)
+
+    def invalidate_text(self):
+        """
+        Drops the cached text of this term and the terms above it. Unlike
+        hashes, texts are only cached for some subterms, so the whole path to
+        the root is visited.
+        """
+        term = self
+        while term is not None:
+            term._text = None
+            term = term.parent
+
+    def __str__(self):
+        chunks = []
+        self._render(chunks)
+        return "".join(chunks)
 
     def __repr__(self):
         if self.is_const:
@@ -22,6 +22,7 @@
 
 from src.parsing.SMTLIBv2Parser import SMTLIBv2Parser
 from src.parsing.SMTLIBv2Visitor import SMTLIBv2Visitor
+from src.parsing.Traversal import postorder
 from src.parsing.Ast import (
     Var,
     Const,
@@ -67,6 +68,24 @@ class AstException(Exception):
     pass
 
 
+class _TermFrame:
+    """
+    A term being visited by AstVisitor.visitTerm: the local variables in its
+    scope, its subterms built so far and the function building it.
+    """
+
+    __slots__ = ("local_vars", "parent", "subterms", "build")
+
+    def __init__(self, local_vars, parent=None):
+        self.local_vars = local_vars
+        self.parent = parent
+        self.subterms = []
+        self.build = None
+
+    def subframe(self):
+        return _TermFrame(self.local_vars, self)
+
+
 class AstVisitor(SMTLIBv2Visitor):
     def __init__(self, strict=True):
         self.strict = strict
@@ -258,21 +277,19 @@ class AstVisitor(SMTLIBv2Visitor):
     def visitAttribute(self, ctx: SMTLIBv2Parser.AttributeContext):
         return (ctx.keyword().getText(), ctx.attribute_value().getText())
 
-    def handle_quantifier(self, ctx: SMTLIBv2Parser.TermContext, quant, local_vars):
-
-        subterms = []
+    def handle_quantifier(self, ctx: SMTLIBv2Parser.TermContext, quant, frame):
         qvars = []
         qtypes = []
         for i in range(len(ctx.sorted_var())):
             qvar = self.visitSymbol(ctx.sorted_var()[i].symbol())
             qtype = self.visitSort(ctx.sorted_var()[i].sort())
-            local_vars[qvar] = qtype
+            frame.local_vars[qvar] = qtype
             qvars.append(qvar)
             qtypes.append(qtype)
 
+        frame.build = lambda subterms: Quantifier(quant, (qvars, qtypes), subterms)
         for t in ctx.term():
-            subterms.append(self.visitTerm(t, local_vars))
-        return Quantifier(quant, (qvars, qtypes), subterms)
+            yield t, frame.subframe()
 
     def visitSpec_constant(self, ctx: SMTLIBv2Parser.Spec_constantContext):
         """
@@ -308,6 +325,18 @@ class AstVisitor(SMTLIBv2Visitor):
             return ctx.getText().encode("utf-8").decode("utf-8"), REGEXP_TYPE
 
     def visitTerm(self, ctx: SMTLIBv2Parser.TermContext, local_vars):
+        """
+        Visits the term with an explicit stack, so that deeply nested terms
+        do not exhaust the recursion limit. The subterms of a term are found
+        by term_subterms, the term is built once they are visited.
+        """
+        for _, frame in postorder(ctx, _TermFrame(local_vars), self.term_subterms):
+            term = frame.build(frame.subterms)
+            if frame.parent is not None:
+                frame.parent.subterms.append(term)
+        return term
+
+    def term_subterms(self, ctx: SMTLIBv2Parser.TermContext, frame):
         """
         term
         : spec_constant
@@ -322,8 +351,13 @@ class AstVisitor(SMTLIBv2Visitor):
         | ParOpen GRW_Match term ParOpen match_case+ ParClose ParClose
         | ParOpen GRW_Exclamation term attribute+ ParClose
         ;
-        """
 
+        Yields the subterms of the term paired with their frame and sets
+        frame.build to the function building the term from them. The local
+        variables are updated in the order of a recursive visit, e.g. the
+        variable of a let binding is added right before its term is visited.
+        """
+        local_vars = frame.local_vars
         if (
             ctx.ParOpen()
             and ctx.GRW_Exclamation()
@@ -334,7 +368,8 @@ class AstVisitor(SMTLIBv2Visitor):
             term, label = self.visitTerm(ctx.term()[0]), self.visitAttribute(
                 ctx.attribute()[0]
             )
-            return LabeledTerm(label, [term])
+            frame.build = lambda subterms: LabeledTerm(label, [term])
+            return
 
         if (
             len(ctx.ParOpen()) == 2
@@ -349,12 +384,10 @@ class AstVisitor(SMTLIBv2Visitor):
         if len(ctx.ParOpen()) == 1 and ctx.GRW_Underscore() and ctx.numeral():
             bitwidth = ctx.symbol().getText().strip("bv")
             value = ctx.numeral().getText()
-            return Const(name="(_ bv" + bitwidth + " " + value + ")")
-
-        if len(ctx.ParOpen()) == 1 and ctx.GRW_Underscore() and ctx.numeral():
-            bitwidth = ctx.symbol().getText().strip("bv")
-            value = ctx.numeral().getText()
-            return Const(name="(_ bv" + bitwidth + " " + value + ")")
+            frame.build = lambda subterms: Const(
+                name="(_ bv" + bitwidth + " " + value + ")"
+            )
+            return
 
         if (
             len(ctx.ParOpen()) == 2
@@ -364,7 +397,8 @@ class AstVisitor(SMTLIBv2Visitor):
             and ctx.term()
         ):
 
-            return self.handle_quantifier(ctx, "exists", local_vars)
+            yield from self.handle_quantifier(ctx, "exists", frame)
+            return
 
         if (
             len(ctx.ParOpen()) == 2
@@ -374,7 +408,8 @@ class AstVisitor(SMTLIBv2Visitor):
             and ctx.term()
         ):
 
-            return self.handle_quantifier(ctx, "forall", local_vars)
+            yield from self.handle_quantifier(ctx, "forall", frame)
+            return
 
         if (
             len(ctx.ParOpen()) == 2
@@ -384,16 +419,17 @@ class AstVisitor(SMTLIBv2Visitor):
             and ctx.term()
         ):
 
-            terms = []
             var_list = []
+            frame.build = lambda subterms: LetBinding(
+                var_list, subterms[: len(var_list)], subterms=subterms[len(var_list) :]
+            )
             for b in ctx.var_binding():
                 local_vars[self.visitSymbol(b.symbol())] = "Unknown"
                 var_list.append(self.visitSymbol(b.symbol()))
-                terms.append(self.visitTerm(b.term(), local_vars))
-            subterms = []
+                yield b.term(), frame.subframe()
             for sub in ctx.term():
-                subterms.append(self.visitTerm(sub, local_vars=local_vars))
-            return LetBinding(var_list, terms, subterms=subterms)
+                yield sub, frame.subframe()
+            return
 
         if (
             ctx.ParOpen()
@@ -403,17 +439,20 @@ class AstVisitor(SMTLIBv2Visitor):
         ):
 
             op = self.visitQual_identifier(ctx.qual_identifier(), local_vars)
-            subterms = []
+            frame.build = lambda subterms: Expr(op=op, subterms=subterms)
             for term in ctx.term():
-                subterms.append(self.visitTerm(term, local_vars))
-            return Expr(op=op, subterms=subterms)
+                yield term, frame.subframe()
+            return
 
         if ctx.spec_constant():
             name, type = self.visitSpec_constant(ctx.spec_constant())
-            return Const(name=name, type=type)
+            frame.build = lambda subterms: Const(name=name, type=type)
+            return
 
         if ctx.qual_identifier():
-            return self.visitQual_identifier(ctx.qual_identifier(), local_vars)
+            term = self.visitQual_identifier(ctx.qual_identifier(), local_vars)
+            frame.build = lambda subterms: term
+            return
 
         raise AstException("No match for term : ... |... |... ")
 
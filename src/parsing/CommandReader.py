@@ -0,0 +1,101 @@
+# MIT License
+#
+# Copyright (c) [2020 - 2021] Mauro Bringolf and Dominik Winterer
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import re
+
+CODE, STRING, QUOTED_SYMBOL, COMMENT = range(4)
+
+# Characters ending the current state of the scanner.
+DELIMITERS = {
+    CODE: re.compile(r'[()";|]'),
+    STRING: re.compile(r'"'),
+    QUOTED_SYMBOL: re.compile(r"\|"),
+    COMMENT: re.compile(r"\n"),
+}
+
+COMMAND_NAME_RE = re.compile(r"\(\s*([^\s()|\";]+)")
+
+
+def read_commands(reader, chunk_size=1 << 16):
+    """
+    Splits the SMT-LIB script read from reader into its top-level commands
+    without parsing them. Only the text of the current command is kept in
+    memory, comments between the commands are dropped. An unterminated last
+    command is returned as is and left to the parser.
+
+    :reader: file object opened in text mode.
+    :returns: generator of the text of the commands.
+    :raises ValueError: on text between the commands and unbalanced
+                        parentheses.
+    """
+    pieces = []  # text of the current command in earlier chunks
+    depth = 0
+    state = CODE
+    for chunk in iter(lambda: reader.read(chunk_size), ""):
+        begin = 0 if depth > 0 else None  # start of the command in chunk
+        pos = 0
+        while True:
+            match = DELIMITERS[state].search(chunk, pos)
+            end = match.start() if match else len(chunk)
+            if state == CODE and depth == 0 and chunk[pos:end].strip():
+                raise ValueError("text outside of a command")
+            if not match:
+                break
+            pos = match.end()
+            if state != CODE:
+                # Escaped quotes "" inside strings leave and reenter STRING.
+                state = CODE
+                continue
+
+            char = match.group()
+            if depth == 0 and char in ')"|':
+                raise ValueError("text outside of a command")
+            if char == "(":
+                if depth == 0:
+                    begin = match.start()
+                depth += 1
+            elif char == ")":
+                depth -= 1
+                if depth == 0:
+                    pieces.append(chunk[begin:pos])
+                    yield "".join(pieces)
+                    pieces = []
+                    begin = None
+            elif char == '"':
+                state = STRING
+            elif char == "|":
+                state = QUOTED_SYMBOL
+            else:
+                state = COMMENT
+        if begin is not None:
+            pieces.append(chunk[begin:])
+    if pieces:
+        yield "".join(pieces)
+
+
+def command_name(text):
+    """
+    :returns: name of the command or None if it does not start with one.
+    """
+    match = COMMAND_NAME_RE.match(text)
+    return match.group(1) if match else None
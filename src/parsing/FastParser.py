@@ -0,0 +1,635 @@
+# MIT License
+#
+# Copyright (c) [2020 - 2021] Mauro Bringolf and Dominik Winterer
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+"""
+Hand-written tokenizer and recursive-descent parser for the subset of SMT-LIB
+that makes up the bulk of the seeds. It builds the same Script and Term
+objects and the same map of global variables as the ANTLR parser followed by
+the AstVisitor, at a fraction of the cost. Input outside of the subset raises
+UnsupportedSyntax and is left to the ANTLR parser, see Parse.generate_ast_fast.
+"""
+
+import re
+
+from src.parsing.Ast import (
+    Var,
+    Const,
+    Expr,
+    Quantifier,
+    LetBinding,
+    Pop,
+    Push,
+    DeclareConst,
+    DeclareFun,
+    DefineFun,
+    Script,
+    Assert,
+    CheckSat,
+    CheckSatAssuming,
+    GetValue,
+    SMTLIBCommand,
+)
+from src.parsing.Types import (
+    BITVECTOR_TYPE,
+    INTEGER_TYPE,
+    REAL_TYPE,
+    STRING_TYPE,
+    BOOLEAN_TYPE,
+    REGEXP_TYPE,
+    sort2type,
+)
+
+
+class UnsupportedSyntax(Exception):
+    pass
+
+
+LPAR = "("
+RPAR = ")"
+BV = " bv"
+SYMBOL = "symbol"
+QUOTED_SYMBOL = "quoted_symbol"
+RESERVED = "reserved"
+KEYWORD = "keyword"
+NUMERAL = "numeral"
+DECIMAL = "decimal"
+HEXADECIMAL = "hexadecimal"
+BINARY = "binary"
+STRING = "string"
+REG_CONST = "reg_const"
+
+SYM = "a-zA-Z+=/*%?!$\\-_~&^<>@.äÄöÖüÜ"
+
+# Mirrors the lexer rules of SMTLIBv2.g4. Python picks the first matching
+# alternative, hence decimals come before numerals.
+TOKEN_RE = re.compile(
+    r"""
+    (?P<ws>[ \t\r\n]+)
+    | (?P<comment>;[^\r\n]*)
+    | (?P<lpar>\()
+    | (?P<rpar>\))
+    | (?P<string>"(?:[^"]|"")*")
+    | (?P<quoted_symbol>\|[^|\\]*\|)
+    | (?P<keyword>:[%(sym)s][0-9%(sym)s]*)
+    | (?P<binary>\#b[01]+)
+    | (?P<hexadecimal>\#x[0-9a-fA-F]+)
+    | (?P<decimal>(?:0|[1-9][0-9]*)\.0*(?:0|[1-9][0-9]*))
+    | (?P<numeral>0|[1-9][0-9]*)
+    | (?P<symbol>[%(sym)s][0-9%(sym)s]*)
+    | (?P<error>[\s\S])
+    """
+    % {"sym": SYM},
+    re.VERBOSE,
+)
+
+# Characters the lexer does not accept in strings and quoted symbols.
+NON_PRINTABLE_RE = re.compile("[^\t\n\r\x20-\x7e\x80-\uffff]")
+
+# Words with a token of their own, they cannot be used as symbols.
+RESERVED_WORDS = {
+    "assert",
+    "assert-soft",
+    "simplify",
+    "check-sat",
+    "check-sat-assuming",
+    "check-sat-using",
+    "labels",
+    "minimize",
+    "maximize",
+    "declare-const",
+    "declare-datatype",
+    "declare-codatatype",
+    "declare-datatypes",
+    "declare-codatatypes",
+    "declare-fun",
+    "declare-sort",
+    "define",
+    "define-fun",
+    "define-const",
+    "define-fun-rec",
+    "define-funs-rec",
+    "define-sort",
+    "display",
+    "echo",
+    "eval",
+    "exit",
+    "get-objectives",
+    "get-assertions",
+    "get-assignment",
+    "get-info",
+    "get-model",
+    "block-model",
+    "get-option",
+    "poly/factor",
+    "get-proof",
+    "get-unsat-assumptions",
+    "get-unsat-core",
+    "get-value",
+    "pop",
+    "push",
+    "reset",
+    "reset-assertions",
+    "set-info",
+    "set-logic",
+    "set-option",
+    "then",
+    "and-then",
+    "par-then",
+    "or-else",
+    "par-or-else",
+    "par-or",
+    "try-for",
+    "using-params",
+    "!",
+    "_",
+    "as",
+    "BINARY",
+    "DECIMAL",
+    "exists",
+    "HEXADECIMAL",
+    "forall",
+    "let",
+    "match",
+    "NUMERAL",
+    "par",
+}
+
+REG_CONSTS = {"re.none", "re.all", "re.allchar"}
+
+PREDEF_KEYWORDS = {
+    ":all-statistics",
+    ":assertion-stack-levels",
+    ":authors",
+    ":category",
+    ":chainable",
+    ":definition",
+    ":diagnostic-output-channel",
+    ":error-behavior",
+    ":extensions",
+    ":funs",
+    ":funs-description",
+    ":global-declarations",
+    ":interactive-mode",
+    ":language",
+    ":left-assoc",
+    ":license",
+    ":named",
+    ":name",
+    ":notes",
+    ":pattern",
+    ":print-success",
+    ":produce-assertions",
+    ":produce-assignments",
+    ":produce-models",
+    ":produce-proofs",
+    ":produce-unsat-assumptions",
+    ":produce-unsat-cores",
+    ":random-seed",
+    ":reason-unknown",
+    ":regular-output-channel",
+    ":reproducible-resource-limit",
+    ":right-assoc",
+    ":smt-lib-version",
+    ":sorts",
+    ":sorts-description",
+    ":source",
+    ":status",
+    ":theories",
+    ":values",
+    ":verbosity",
+    ":version",
+}
+
+SPEC_CONSTANT_TYPES = {
+    NUMERAL: INTEGER_TYPE,
+    DECIMAL: REAL_TYPE,
+    HEXADECIMAL: INTEGER_TYPE,
+    BINARY: INTEGER_TYPE,
+    STRING: STRING_TYPE,
+    REG_CONST: REGEXP_TYPE,
+}
+
+B_VALUES = {"true", "false"}
+
+# Commands kept verbatim as SMTLIBCommand, as by the AstVisitor.
+NULLARY_COMMANDS = {
+    "exit",
+    "get-objectives",
+    "get-assertions",
+    "get-assignment",
+    "get-model",
+    "block-model",
+    "get-proof",
+    "get-unsat-assumptions",
+    "get-unsat-core",
+    "reset",
+    "reset-assertions",
+    "labels",
+}
+
+
+def tokenize(text):
+    """
+    Splits text into tokens (kind, text, start, end) the way the ANTLR lexer
+    does. Raises UnsupportedSyntax on input the lexer would report errors on
+    or tokenize differently from a plain S-expression reader.
+    """
+    tokens = []
+    pos = 0
+    while pos < len(text):
+        m = TOKEN_RE.match(text, pos)
+        kind = m.lastgroup
+        value = m.group()
+        pos = m.end()
+        if kind == "ws":
+            # The grammar's ' bv' literal takes precedence over a single
+            # whitespace, e.g. in (_ bv5 32).
+            if value == " " and text.startswith("bv", pos):
+                tokens.append((BV, BV, pos - 1, pos + 2))
+                pos += 2
+            continue
+        if kind == "comment":
+            continue
+        if kind == "lpar":
+            kind = LPAR
+        elif kind == "rpar":
+            kind = RPAR
+        elif kind == SYMBOL:
+            if value in RESERVED_WORDS:
+                kind = RESERVED
+            elif value in REG_CONSTS:
+                kind = REG_CONST
+        elif kind == KEYWORD:
+            if value not in PREDEF_KEYWORDS:
+                if value[1:] in RESERVED_WORDS or value[1:] in REG_CONSTS:
+                    raise UnsupportedSyntax("reserved word in keyword " + value)
+                if any(value.startswith(k) for k in PREDEF_KEYWORDS):
+                    raise UnsupportedSyntax("keyword split by the lexer " + value)
+        elif kind == STRING or kind == QUOTED_SYMBOL:
+            if NON_PRINTABLE_RE.search(value):
+                raise UnsupportedSyntax("non-printable character in " + value)
+        elif kind == "error":
+            raise UnsupportedSyntax("unexpected character %r" % value)
+        tokens.append((kind, value, m.start(), pos))
+    if tokens and tokens[-1][0] == BV:
+        raise UnsupportedSyntax("unexpected ' bv'")
+    return tokens
+
+
+class FastParser:
+    """
+    Recursive-descent parser over the tokens of an SMT-LIB script. The
+    methods mirror those of the AstVisitor, including the handling of local
+    and global variables, so that both produce the same AST.
+    """
+
+    def __init__(self, text, global_vars=None):
+        self.text = text
+        self.tokens = tokenize(text)
+        self.pos = 0
+        self.global_vars = {} if global_vars is None else global_vars
+
+    def parse(self):
+        """
+        :returns: Script object and the map of global variables.
+        """
+        return Script(self.commands(), self.global_vars), self.global_vars
+
+    def commands(self):
+        cmds = []
+        while self.pos < len(self.tokens):
+            cmds.append(self.command())
+        return cmds
+
+    def next(self):
+        if self.pos >= len(self.tokens):
+            raise UnsupportedSyntax("unexpected end of input")
+        token = self.tokens[self.pos]
+        self.pos += 1
+        return token
+
+    def peek(self, offset=0):
+        if self.pos + offset >= len(self.tokens):
+            raise UnsupportedSyntax("unexpected end of input")
+        return self.tokens[self.pos + offset]
+
+    def expect(self, kind):
+        token = self.next()
+        if token[0] != kind:
+            raise UnsupportedSyntax("expected %s but got %s" % (kind, token[1]))
+        return token
+
+    def symbol(self):
+        kind, value = self.next()[:2]
+        if kind != SYMBOL and kind != QUOTED_SYMBOL:
+            raise UnsupportedSyntax("expected a symbol but got " + value)
+        return value
+
+    def add_to_globals(self, identifier, input_sorts, output_sort):
+        if len(input_sorts) == 0:
+            self.global_vars[identifier] = sort2type(output_sort)
+        else:
+            self.global_vars[identifier] = sort2type(input_sorts + " " + output_sort)
+
+    def command(self):
+        start = self.expect(LPAR)[2]
+        kind, name = self.next()[:2]
+        if kind != RESERVED:
+            raise UnsupportedSyntax("unknown command " + name)
+
+        if name == "assert":
+            cmd = Assert(self.term({}))
+        elif name == "check-sat":
+            terms = []
+            while self.peek()[0] != RPAR:
+                terms.append(self.term({}))
+            cmd = CheckSat(terms) if len(terms) > 0 else CheckSat()
+        elif name == "check-sat-assuming":
+            self.expect(LPAR)
+            terms = []
+            while self.peek()[0] != RPAR:
+                terms.append(self.term({}))
+            self.next()
+            cmd = CheckSatAssuming(terms)
+        elif name == "get-value":
+            self.expect(LPAR)
+            terms = [self.term({})]
+            while self.peek()[0] != RPAR:
+                terms.append(self.term({}))
+            self.next()
+            cmd = GetValue(terms)
+        elif name == "push" or name == "pop":
+            if self.peek()[0] == NUMERAL:
+                self.next()
+            cmd = Push() if name == "push" else Pop()
+        elif name == "declare-const":
+            var = self.symbol()
+            pos = self.pos
+            self.global_vars[var] = self.sort()
+            # The AstVisitor visits the sort a second time, after the
+            # declaration.
+            self.pos = pos
+            cmd = DeclareConst(var, self.sort())
+        elif name == "declare-fun":
+            identifier = self.symbol()
+            self.expect(LPAR)
+            input_sorts = []
+            while self.peek()[0] != RPAR:
+                input_sorts.append(self.sort())
+            self.next()
+            output_sort = self.sort()
+            input_sorts = " ".join(input_sorts)
+            self.add_to_globals(identifier, input_sorts, output_sort)
+            cmd = DeclareFun(identifier, input_sorts, output_sort)
+        elif name == "define-fun":
+            identifier = self.symbol()
+            self.expect(LPAR)
+            sorted_vars = []
+            while self.peek()[0] != RPAR:
+                self.expect(LPAR)
+                var = self.symbol()
+                sorted_vars.append("(" + var + " " + self.sort() + ")")
+                self.expect(RPAR)
+            self.next()
+            sorted_vars = " ".join(sorted_vars)
+            pos = self.pos
+            self.add_to_globals(identifier, sorted_vars, self.sort())
+            self.pos = pos
+            sort = self.sort()
+            cmd = DefineFun(identifier, sorted_vars, sort, self.term({}))
+        else:
+            self.verbatim_command(name)
+            end = self.expect(RPAR)[3]
+            return SMTLIBCommand(self.text[start:end])
+
+        self.expect(RPAR)
+        return cmd
+
+    def verbatim_command(self, name):
+        """
+        Checks the arguments of a command the AstVisitor keeps verbatim.
+        """
+        if name in NULLARY_COMMANDS:
+            return
+        if name == "set-logic":
+            self.symbol()
+        elif name == "set-info" or name == "set-option":
+            self.attribute()
+        elif name == "get-info" or name == "get-option":
+            self.expect(KEYWORD)
+        elif name == "declare-sort":
+            self.symbol()
+            if self.peek()[0] == NUMERAL:
+                self.next()
+        elif name == "define-sort":
+            self.symbol()
+            self.expect(LPAR)
+            while self.peek()[0] != RPAR:
+                self.symbol()
+            self.next()
+            self.sort()
+        elif name == "echo":
+            self.echo_argument()
+            while self.peek()[0] != RPAR:
+                self.echo_argument()
+        else:
+            raise UnsupportedSyntax("unsupported command " + name)
+
+    def echo_argument(self):
+        kind, value = self.next()[:2]
+        if kind not in (STRING, SYMBOL, QUOTED_SYMBOL):
+            raise UnsupportedSyntax("unexpected argument of echo " + value)
+
+    def attribute(self):
+        self.expect(KEYWORD)
+        kind = self.peek()[0]
+        if kind == RPAR:
+            return
+        if kind == LPAR:
+            self.s_expr()
+        elif kind in SPEC_CONSTANT_TYPES or kind == SYMBOL or kind == QUOTED_SYMBOL:
+            self.next()
+        else:
+            raise UnsupportedSyntax("unexpected attribute value " + self.peek()[1])
+
+    def s_expr(self):
+        depth = 0
+        while True:
+            kind, value = self.next()[:2]
+            if kind == LPAR:
+                depth += 1
+            elif kind == RPAR:
+                depth -= 1
+            elif kind not in SPEC_CONSTANT_TYPES and kind not in (
+                SYMBOL,
+                QUOTED_SYMBOL,
+                KEYWORD,
+            ):
+                raise UnsupportedSyntax("unexpected token in s-expression " + value)
+            if depth == 0:
+                return
+
+    def indexed_identifier(self):
+        """
+        Parses the remainder of (_ symbol index+) after the underscore.
+
+        :returns: name of the identifier and its indices as (kind, text).
+        """
+        symbol = self.symbol()
+        indices = []
+        while self.peek()[0] != RPAR:
+            kind, value = self.next()[:2]
+            if kind not in (NUMERAL, SYMBOL, QUOTED_SYMBOL):
+                raise UnsupportedSyntax("unexpected index " + value)
+            indices.append((kind, value))
+        self.next()
+        if not indices:
+            raise UnsupportedSyntax("indexed identifier without indices")
+        return symbol, indices
+
+    def identifier(self):
+        if self.peek()[0] != LPAR:
+            return self.symbol()
+        self.next()
+        underscore = self.next()
+        if underscore[:2] != (RESERVED, "_"):
+            raise UnsupportedSyntax("expected _ but got " + underscore[1])
+        symbol, indices = self.indexed_identifier()
+        return "(_ " + symbol + " " + " ".join(i for _, i in indices) + ")"
+
+    def sort(self):
+        if self.peek()[0] == LPAR and self.peek(1)[0] != RESERVED:
+            self.next()
+            s = "(" + self.sort_identifier()
+            s += " " + self.sort()
+            while self.peek()[0] != RPAR:
+                s += " " + self.sort()
+            self.next()
+            return s + ")"
+        return self.sort_identifier()
+
+    def sort_identifier(self):
+        name = self.identifier()
+        if name in self.global_vars:
+            # The AstVisitor would resolve the sort to a variable.
+            raise UnsupportedSyntax("sort named as a global variable " + name)
+        return name
+
+    def variable(self, name, local_vars, is_indexed_id=False):
+        if name in local_vars:
+            return Var(name=name, type=local_vars[name], is_indexed_id=is_indexed_id)
+        elif name in self.global_vars:
+            return Var(
+                name=name, type=self.global_vars[name], is_indexed_id=is_indexed_id
+            )
+        return name
+
+    def term(self, local_vars):
+        kind, value = self.next()[:2]
+        if kind == SYMBOL:
+            if value in B_VALUES:
+                return Const(name=value, type=BOOLEAN_TYPE)
+            return self.variable(value, local_vars)
+        if kind == QUOTED_SYMBOL:
+            return self.variable(value, local_vars)
+        if kind in SPEC_CONSTANT_TYPES:
+            return Const(name=value, type=SPEC_CONSTANT_TYPES[kind])
+        if kind != LPAR:
+            raise UnsupportedSyntax("unexpected token " + value)
+
+        kind, value = self.next()[:2]
+        if kind == SYMBOL or kind == QUOTED_SYMBOL:
+            op = self.variable(value, local_vars)
+        elif kind == LPAR:
+            underscore = self.next()
+            if underscore[:2] != (RESERVED, "_"):
+                raise UnsupportedSyntax("unexpected token " + underscore[1])
+            symbol, indices = self.indexed_identifier()
+            name = "(_ " + symbol + " " + " ".join(i for _, i in indices) + ")"
+            op = self.variable(name, local_vars, is_indexed_id=True)
+        elif value == "_":
+            return self.underscore_term(local_vars)
+        elif value == "let":
+            return self.let_binding(local_vars)
+        elif value == "forall" or value == "exists":
+            return self.quantifier(value, local_vars)
+        else:
+            raise UnsupportedSyntax("unsupported term " + value)
+
+        subterms = [self.term(local_vars)]
+        while self.peek()[0] != RPAR:
+            subterms.append(self.term(local_vars))
+        self.next()
+        return Expr(op=op, subterms=subterms)
+
+    def underscore_term(self, local_vars):
+        if self.peek()[0] == BV:
+            self.next()
+            X = self.expect(NUMERAL)[1]
+            n = self.expect(NUMERAL)[1]
+            self.expect(RPAR)
+            return Const(name="(_ bv" + X + " " + n + ")", type=BITVECTOR_TYPE(int(n)))
+        symbol, indices = self.indexed_identifier()
+        if len(indices) == 1 and indices[0][0] == NUMERAL:
+            # The grammar's (_ symbol numeral) alternative of term.
+            bitwidth = symbol.strip("bv")
+            return Const(name="(_ bv" + bitwidth + " " + indices[0][1] + ")")
+        name = "(_ " + symbol + " " + " ".join(i for _, i in indices) + ")"
+        return self.variable(name, local_vars, is_indexed_id=True)
+
+    def let_binding(self, local_vars):
+        self.expect(LPAR)
+        terms = []
+        var_list = []
+        while True:
+            self.expect(LPAR)
+            var = self.symbol()
+            local_vars[var] = "Unknown"
+            var_list.append(var)
+            terms.append(self.term(local_vars))
+            self.expect(RPAR)
+            if self.peek()[0] == RPAR:
+                break
+        self.next()
+        subterms = [self.term(local_vars)]
+        self.expect(RPAR)
+        return LetBinding(var_list, terms, subterms=subterms)
+
+    def quantifier(self, quant, local_vars):
+        self.expect(LPAR)
+        qvars = []
+        qtypes = []
+        while True:
+            self.expect(LPAR)
+            qvar = self.symbol()
+            qtype = self.sort()
+            self.expect(RPAR)
+            local_vars[qvar] = qtype
+            qvars.append(qvar)
+            qtypes.append(qtype)
+            if self.peek()[0] == RPAR:
+                break
+        self.next()
+        subterms = [self.term(local_vars)]
+        self.expect(RPAR)
+        return Quantifier(quant, (qvars, qtypes), subterms)
@@ -23,6 +23,7 @@
 import sys
 import traceback
 import logging
+from collections import ChainMap
 
 from antlr4.error.ErrorListener import ErrorListener
 
@@ -30,6 +31,9 @@ from src.parsing.SMTLIBv2Lexer import SMTLIBv2Lexer
 from src.parsing.SMTLIBv2Parser import SMTLIBv2Parser
 from src.parsing.TimeoutDecorator import exit_after
 from src.parsing.AstVisitor import AstVisitor
+from src.parsing.FastParser import FastParser, UnsupportedSyntax
+from src.parsing.CommandReader import read_commands, command_name
+from src.parsing.Ast import Script
 
 from antlr4.CommonTokenStream import CommonTokenStream
 from antlr4.FileStream import FileStream
@@ -37,6 +41,21 @@ from antlr4.InputStream import InputStream
 
 sys.setrecursionlimit(100000)
 
+# Commands removed by prepare_seed.
+SEED_FILTER = (
+    "set-info",
+    "set-logic",
+    # Output-producing commands
+    "get-model",
+    "get-assertions",
+    "get-proof",
+    "get-unsat-assumptions",
+    "get-unsat-core",
+    "get-value",
+    "echo",
+    "simplify",
+)
+
 
 class ErrorListener(ErrorListener):
     def syntaxError(self, recognizer, offendingSymbol, line, column, msg, e):
@@ -60,29 +79,9 @@ def prepare_seed(formula):
     """
     new_cmds = []
     for cmd in formula.commands:
-        if "set-info" in cmd.__str__():
-            continue
-        if "set-logic" in cmd.__str__():
-            continue
-
-        # Ignore output-producing commands to make sure the detection logic
-        # won't be mislead
-        #
-        if "get-model" in cmd.__str__():
-            continue
-        if "get-assertions" in cmd.__str__():
-            continue
-        if "get-proof" in cmd.__str__():
-            continue
-        if "get-unsat-assumptions" in cmd.__str__():
-            continue
-        if "get-unsat-core" in cmd.__str__():
-            continue
-        if "get-value" in cmd.__str__():
-            continue
-        if "echo" in cmd.__str__():
-            continue
-        if "simplify" in cmd.__str__():
+        # Rendering caches the text of the asserted terms for the mutants.
+        cmd_str = cmd.__str__()
+        if any(word in cmd_str for word in SEED_FILTER):
             continue
         new_cmds.append(cmd)
 
@@ -90,7 +89,7 @@ def prepare_seed(formula):
     return formula
 
 
-def generate_ast(stream, prep_seed=True):
+def generate_parse_tree(stream):
     error_listener = ErrorListener()
     lexer = SMTLIBv2Lexer(stream)
     lexer.removeErrorListeners()
@@ -98,7 +97,11 @@ def generate_ast(stream, prep_seed=True):
     stream = CommonTokenStream(lexer)
     parser = SMTLIBv2Parser(stream)
     parser.removeErrorListeners()
-    tree = parser.start()
+    return parser.start()
+
+
+def generate_ast(stream, prep_seed=True):
+    tree = generate_parse_tree(stream)
     vis = AstVisitor()
     formula = vis.visitStart(tree)
 
@@ -109,9 +112,84 @@ def generate_ast(stream, prep_seed=True):
     return prepare_seed(formula) if prep_seed else formula, vis.global_vars
 
 
-def parse_filestream(fn, timeout_limit):
+def generate_ast_fast(s, prep_seed=True):
+    """
+    Generate the AST with the FastParser. Scripts using syntax the FastParser
+    does not support are parsed by ANTLR instead.
+    """
+    try:
+        formula, global_vars = FastParser(s).parse()
+    except UnsupportedSyntax as e:
+        logging.debug("Fast parser falls back to ANTLR: %s" % e)
+        return generate_ast(InputStream(s), prep_seed)
+
+    if len(formula.commands) == 0:
+        return None
+
+    return prepare_seed(formula) if prep_seed else formula, global_vars
+
+
+def generate_command_asts(text, vis, parser="antlr"):
+    """
+    Generate the ASTs of the commands in text, usually a single one. The
+    global variables are kept by the AstVisitor across calls.
+    """
+    if parser == "fast":
+        # Declarations of a command falling back to ANTLR are dropped.
+        global_vars = ChainMap({}, vis.global_vars)
+        try:
+            cmds = FastParser(text, global_vars).commands()
+        except UnsupportedSyntax as e:
+            logging.debug("Fast parser falls back to ANTLR: %s" % e)
+        else:
+            vis.global_vars.update(global_vars.maps[0])
+            return cmds
+
+    tree = generate_parse_tree(InputStream(text))
+    return [vis.visitCommand(c) for c in tree.script().command()]
+
+
+def generate_ast_stream(reader, prep_seed=True, parser="antlr"):
+    """
+    Generate the AST one top-level command at a time, such that neither the
+    text nor the parse tree of the whole script is held in memory. Commands
+    removed by prepare_seed are skipped without being parsed.
+    """
+    vis = AstVisitor()
+    cmds = []
+    empty = True
+    for text in read_commands(reader):
+        if prep_seed and command_name(text) in SEED_FILTER:
+            empty = False
+            continue
+        new_cmds = generate_command_asts(text, vis, parser)
+        cmds.extend(new_cmds)
+        empty = empty and len(new_cmds) == 0
+
+    if empty:
+        return None
+
+    formula = Script(cmds, vis.global_vars)
+    return prepare_seed(formula) if prep_seed else formula, vis.global_vars
+
+
+def parse_commandstream(fn, timeout_limit, parser="antlr"):
+    @exit_after(timeout_limit)
+    def _parse_commandstream(fn):
+        with open(fn, encoding="utf8", newline="") as reader:
+            ast, globs = generate_ast_stream(reader, parser=parser)
+        return ast, globs
+
+    return _parse_commandstream(fn)
+
+
+def parse_filestream(fn, timeout_limit, parser="antlr"):
     @exit_after(timeout_limit)
     def _parse_filestream(fn):
+        if parser == "fast":
+            with open(fn, "rb") as reader:
+                ast, globs = generate_ast_fast(reader.read().decode("utf8"))
+            return ast, globs
         fstream = FileStream(fn, encoding="utf8")
         ast, globs = generate_ast(fstream)
         return ast, globs
@@ -119,9 +197,12 @@ def parse_filestream(fn, timeout_limit):
     return _parse_filestream(fn)
 
 
-def parse_inputstream(s, timeout_limit):
+def parse_inputstream(s, timeout_limit, parser="antlr"):
     @exit_after(timeout_limit)
     def _parse_inputstream(s):
+        if parser == "fast":
+            ast, globs = generate_ast_fast(s)
+            return ast, globs
         istream = InputStream(s)
         ast, globs = generate_ast(istream)
         return ast, globs
@@ -129,12 +210,14 @@ def parse_inputstream(s, timeout_limit):
     return _parse_inputstream(s)
 
 
-def parse(parse_fct, arg, timeout_limit, silent=True):
+def parse(parse_fct, arg, timeout_limit, silent=True, parser="antlr"):
     """
     Parser helper function.
 
     :parse_fct: function to parse stream.
     :arg: first argument to parse_fct.
+    :parser: "antlr" or "fast", the latter falls back to ANTLR on syntax it
+             does not support.
     :returns: Script object representing AST of SMT-LIB file. None if timeout
               or crash occurred.
     """
@@ -142,7 +225,7 @@ def parse(parse_fct, arg, timeout_limit, silent=True):
     globs = None
 
     try:
-        script, globs = parse_fct(arg, timeout_limit)
+        script, globs = parse_fct(arg, timeout_limit, parser)
     except KeyboardInterrupt:
         print("Parser timed out or was interrupted.")
     except Exception as e:
@@ -153,27 +236,32 @@ def parse(parse_fct, arg, timeout_limit, silent=True):
     return script, globs
 
 
-def parse_file(fn, timeout_limit=30, silent=True):
+def parse_file(fn, timeout_limit=30, silent=True, parser="antlr", stream=False):
     """
     Parse SMT-LIB file.
 
     :fn: path to SMT-LIB file.
     :silent: if silent=True the parser will withhold stacktrace from user
              on crash.
+    :parser: "antlr" or "fast".
+    :stream: if stream=True the file is parsed one command at a time.
     :returns: Script object representing AST of SMT-LIB file. None if timeout
               or crash occurred.
     """
-    return parse(parse_filestream, fn, timeout_limit, silent)
+    if stream:
+        return parse(parse_commandstream, fn, timeout_limit, silent, parser)
+    return parse(parse_filestream, fn, timeout_limit, silent, parser)
 
 
-def parse_str(s, timeout_limit=30, silent=True):
+def parse_str(s, timeout_limit=30, silent=True, parser="antlr"):
     """
     Parse SMT-LIB from string.
 
     :fn: path to SMT-LIB file.
     :silent: if silent=True the parser will withhold stacktrace from user
              on crash.
+    :parser: "antlr" or "fast".
     :returns: Script object representing AST of SMT-LIB file. None if timeout
               or crash occurred.
     """
-    return parse(parse_inputstream, s, timeout_limit, silent)
+    return parse(parse_inputstream, s, timeout_limit, silent, parser)
@@ -36,11 +36,14 @@ def cdquit(fn_name):
 def exit_after(s):
     """
     use as decorator to exit the process if
-    function takes longer than s seconds
+    function takes longer than s seconds,
+    no time limit if s is None
     """
 
     def outer(fn):
         def inner(*args, **kwargs):
+            if s is None:
+                return fn(*args, **kwargs)
             timer = threading.Timer(s, cdquit, args=[fn.__name__])
             timer.start()
             try:
@@ -0,0 +1,78 @@
+# MIT License
+#
+# Copyright (c) [2020 - 2021] Mauro Bringolf and Dominik Winterer
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+"""
+Traversals of terms with an explicit stack instead of recursion, so that
+deep terms neither hit the recursion limit nor overflow the C stack.
+
+Both traversals take a function children(node, context) returning the
+children of a node paired with their context, e.g. the parity of a
+subformula or the local variables in scope. The children are asked for
+lazily, the next child only after the subtree of the previous one was
+visited, so a context may depend on the visit of the left siblings, e.g.
+the types of the bindings of a let. The nodes need not be terms.
+"""
+
+
+def term_children(term, context):
+    """
+    The let terms and subterms of term, all in the context of term. Bare
+    identifiers, which are plain strings, are left out.
+    """
+    return [
+        (child, context)
+        for child in (term.let_terms or []) + (term.subterms or [])
+        if not isinstance(child, str)
+    ]
+
+
+def preorder(root, context=None, children=term_children):
+    """
+    Yields the nodes below root, parents before children, paired with their
+    context. The children of a node are asked for after it was yielded.
+    """
+    yield root, context
+    stack = [iter(children(root, context))]
+    while stack:
+        for node, node_context in stack[-1]:
+            yield node, node_context
+            stack.append(iter(children(node, node_context)))
+            break
+        else:
+            stack.pop()
+
+
+def postorder(root, context=None, children=term_children):
+    """
+    Yields the nodes below root, children before parents, paired with their
+    context.
+    """
+    stack = [(root, context, iter(children(root, context)))]
+    while stack:
+        node, node_context, pending = stack[-1]
+        for child, child_context in pending:
+            stack.append((child, child_context, iter(children(child, child_context))))
+            break
+        else:
+            stack.pop()
+            yield node, node_context
@@ -20,9 +20,6 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
-import sys
-
-
 from src.parsing.Types import (
     sort2type,
     # Types
@@ -102,6 +99,8 @@ from src.parsing.Types import (
     STR_FROM_INT,
     STR_IS_DIGIT,
     RE_RANGE,
+    RE_LOOP,
+    RE_POWER,
     SELECT,
     STORE,
     BV_CONCAT,
@@ -155,14 +154,21 @@ from src.parsing.Types import (
 )
 
 from src.parsing.Ast import Assert
-
-sys.setrecursionlimit(100000)
+from src.parsing.Traversal import postorder
 
 
 class Context:
     def __init__(self, globals, locals):
         self.globals = globals
         self.locals = locals
+        # If set, only this term is typechecked and all other annotated terms
+        # keep their type, see typecheck_path.
+        self.retype = None
+        # Types of the terms typechecked by the running typecheck_expr and
+        # the ones their parents asked for, by their id.
+        self.types = None
+        self.demanded = None
+        self.leaves = None  # constants and variables with their type before
 
     def add_to_globals(self, var, type):
         if isinstance(type, str):
@@ -176,6 +182,58 @@ class Context:
         else:
             self.locals[var] = type
 
+    def subterms(self, expr, locals):
+        """
+        The subterms the typechecking function of expr asks for, paired with
+        the local variables in their scope. Constants and variables are left
+        out, they are typechecked when asked for.
+        """
+        if self.retype is not None and expr is not self.retype:
+            if expr.type is not None:
+                return []
+        if expr.op:
+            return [(term, locals) for term in expr.subterms if is_compound(term)]
+        if expr.quantifier:
+            inner = Context(self.globals, locals.copy())
+            for var, type in zip(*expr.quantified_vars):
+                inner.add_to_locals(var, type)
+            return [
+                (term, inner.locals) for term in expr.subterms[:1] if is_compound(term)
+            ]
+        if expr.let_terms:
+            return self.let_subterms(expr, locals)
+        if expr.label:
+            return [(term, locals) for term in expr.subterms[:1] if is_compound(term)]
+        return []
+
+    def let_subterms(self, expr, locals):
+        """
+        The bindings of a let are added to the locals of the later bindings
+        and the body once the bound term is typechecked.
+        """
+        inner = Context(self.globals, locals.copy())
+        inner.retype = self.retype
+        for var, term in zip(expr.var_binders, expr.let_terms):
+            if isinstance(term, str):
+                return
+            if is_compound(term):
+                yield term, inner.locals
+                t = self.types[id(term)]
+                if isinstance(t, Failure):
+                    return
+            else:
+                self.leaves.setdefault(id(term), term.type)
+                t = typecheck_term(term, inner)
+            inner.add_to_locals(var, t)
+        if is_compound(expr.subterms[0]):
+            yield expr.subterms[0], inner.locals
+
+
+def is_compound(term):
+    return not (
+        isinstance(term, str) or term.is_const or term.is_var or term.is_indexed_id
+    )
+
 
 class TypeCheckError(Exception):
     def __init__(self, expr, subterm=None, expected=None, actual=None):
@@ -193,6 +251,16 @@ class TypeCheckError(Exception):
         super().__init__(self.message)
 
 
+class Failure:
+    """
+    Exception raised typechecking a term, raised again once the term's
+    parent asks for its type.
+    """
+
+    def __init__(self, error):
+        self.error = error
+
+
 class UnknownOperator(Exception):
     def __init__(self, op):
         self.message = "unknown function/constant " + op
@@ -442,6 +510,14 @@ def typecheck_regex_binary(expr, ctxt):
     return REGEXP_TYPE
 
 
+def typecheck_regex_indexed(expr, ctxt):
+    """
+    ((_ re.loop i n) RegLan RegLan)
+    ((_ re.^ n) RegLan RegLan)
+    """
+    return typecheck_regex_binary(expr, ctxt)
+
+
 def typecheck_str_at(expr, ctxt):
     """
     (str.at String Int String)
@@ -504,13 +580,9 @@ def typecheck_replace_re(expr, ctxt):
     t1 = typecheck_expr(expr.subterms[0], ctxt)
     t2 = typecheck_expr(expr.subterms[1], ctxt)
     t3 = typecheck_expr(expr.subterms[2], ctxt)
-    if (
-        typecheck_expr(expr.subterms[0], ctxt) != STRING_TYPE
-        or typecheck_expr(expr.subterms[1], ctxt) != REGEXP_TYPE
-        or typecheck_expr(expr.subterms[2], ctxt) != STRING_TYPE
-    ):
+    if t1 != STRING_TYPE or t2 != REGEXP_TYPE or t3 != STRING_TYPE:
         raise TypeCheckError(
-            expr, expr, [STRING_TYPE, STRING_TYPE, STRING_TYPE], [t1, t2, t3]
+            expr, expr, [STRING_TYPE, REGEXP_TYPE, STRING_TYPE], [t1, t2, t3]
         )
     return STRING_TYPE
 
@@ -584,7 +656,7 @@ def typecheck_string_ops(expr, ctxt):
     if expr.op in [STR_REPLACE, STR_REPLACE_ALL]:
         return typecheck_replace(expr, ctxt)
     if expr.op in [STR_REPLACE_RE, STR_REPLACE_RE_ALL]:
-        return typecheck_replace(expr, ctxt)
+        return typecheck_replace_re(expr, ctxt)
     if expr.op in [STR_TO_CODE, STR_TO_INT]:
         return typecheck_str_to_int(expr, ctxt)
     if expr.op == STR_TO_RE:
@@ -858,10 +930,13 @@ def typecheck_fp_ops(expr, ctxt):
 def typecheck_quantifiers(expr, ctxt):
     vars = expr.quantified_vars[0]
     types = expr.quantified_vars[1]
+    outer = ctxt.locals.copy()
     for i in range(len(vars)):
         var, type = vars[i], types[i]
         ctxt.add_to_locals(var, type)
     t = typecheck_expr(expr.subterms[0], ctxt)
+    # The bound variables may shadow variables of the enclosing scope.
+    ctxt.locals = outer
     if t != BOOLEAN_TYPE:
         raise TypeCheckError(expr, expr.subterms[0], BOOLEAN_TYPE, t)
     return BOOLEAN_TYPE
@@ -908,11 +983,14 @@ def typecheck_real_ints_ops(expr, ctxt):
 
 def typecheck_let_expression(expr, ctxt):
     n_var_binders = len(expr.var_binders)
+    outer = ctxt.locals.copy()
     for i in range(n_var_binders):
         var = expr.var_binders[i]
         t = typecheck_expr(expr.let_terms[i], ctxt)
         ctxt.add_to_locals(var, t)
-    return typecheck_expr(expr.subterms[0], ctxt)
+    t = typecheck_expr(expr.subterms[0], ctxt)
+    ctxt.locals = outer
+    return t
 
 
 def typecheck_label(expr, ctxt):
@@ -973,6 +1051,77 @@ def annotate(f, expr, ctxt):
 
 
 def typecheck_expr(expr, ctxt):
+    """
+    Typechecks expr and its subterms bottom-up with an explicit stack. The
+    typechecking function of a term finds the types of its subterms, which
+    are typechecked before, through typecheck_expr. Subterms the function
+    of their parent does not ask for keep their previous type, as if they
+    had not been visited.
+
+    :returns: type of expr
+    """
+    types = ctxt.types
+    if types is not None:
+        key = id(expr)
+        t = types.get(key, types)
+        if t is types:
+            # Constants, variables and the term itself are typechecked now.
+            ctxt.leaves.setdefault(key, expr.type)
+            return typecheck_term(expr, ctxt)
+        ctxt.demanded.add(key)
+        if isinstance(t, Failure):
+            raise t.error
+        return t
+
+    if not is_compound(expr):
+        return typecheck_term(expr, ctxt)
+
+    types, demanded, leaves = ctxt.types, ctxt.demanded, ctxt.leaves = {}, set(), {}
+    outer = ctxt.locals
+    visited = []  # (term, type before) in post-order
+    try:
+        for term, locals in postorder(expr, ctxt.locals, ctxt.subterms):
+            # The functions of quantifiers and lets add their variables to the
+            # locals, which are shared with the siblings.
+            if term.quantifier or term.let_terms:
+                locals = locals.copy()
+            ctxt.locals = locals
+            visited.append((term, term.type))
+            try:
+                types[id(term)] = typecheck_term(term, ctxt)
+            except Exception as e:
+                types[id(term)] = Failure(e)
+    finally:
+        ctxt.types, ctxt.demanded, ctxt.leaves = None, None, None
+        ctxt.locals = outer
+
+    if len(demanded) < len(visited) - 1:
+        reached = {id(expr)}
+        for term, type in reversed(visited):
+            subs = (term.let_terms or []) + (term.subterms or [])
+            if id(term) not in reached:
+                # Undo the annotations of a term whose parent did not ask for
+                # it, including the ones of its constants and variables.
+                term.type = type
+                for sub in subs:
+                    if id(sub) in leaves:
+                        sub.type = leaves[id(sub)]
+                continue
+            for sub in subs:
+                if id(sub) in demanded:
+                    reached.add(id(sub))
+    t = types[id(expr)]
+    if isinstance(t, Failure):
+        raise t.error
+    return t
+
+
+def typecheck_term(expr, ctxt):
+    """
+    Typechecks expr, whose subterms are typechecked by typecheck_expr.
+    """
+    if ctxt.retype is not None and expr is not ctxt.retype and expr.type is not None:
+        return expr.type
     if expr.is_const:
         return expr.type
     if expr.is_var or expr.is_indexed_id:
@@ -1018,6 +1167,10 @@ def typecheck_expr(expr, ctxt):
         ):
             return annotate(typecheck_bv_unary, expr, ctxt)
 
+        # Regex infix ops
+        if RE_LOOP in expr.op or RE_POWER in expr.op:
+            return annotate(typecheck_regex_indexed, expr, ctxt)
+
         key = expr.op.__str__()
         if key in ctxt.globals:
             t = ctxt.globals[key].split(" ")[-1]
@@ -1045,3 +1198,36 @@ def typecheck(formula, glob):
         if isinstance(cmd, Assert):
             typecheck_expr(cmd.term, ctxt)
     return ctxt
+
+
+def typecheck_path(term, path, glob):
+    """
+    Typechecks a term after its subterm at path was rewritten, e.g. by a
+    mutation. Only the rewritten subterm and the terms above it are
+    typechecked again, all other subterms keep their type annotation.
+
+    :term: annotated term, e.g. of an assert
+    :path: indices of the subterms leading from term to the rewritten one
+    :glob: glob variables for formula returned by parser
+    :returns: type of term
+    """
+    ctxt = Context(glob, {})
+    ancestors = []
+    for i in path:
+        if term.quantifier:
+            for var, type in zip(*term.quantified_vars):
+                ctxt.add_to_locals(var, type)
+        elif term.var_binders:
+            for var, let_term in zip(term.var_binders, term.let_terms):
+                t = let_term.type
+                if t is None:
+                    t = typecheck_expr(let_term, ctxt)
+                ctxt.add_to_locals(var, t)
+        ancestors.append(term)
+        term = term.subterms[i]
+
+    t = typecheck_expr(term, ctxt)
+    for term in reversed(ancestors):
+        ctxt.retype = term
+        t = typecheck_expr(term, ctxt)
+    return t
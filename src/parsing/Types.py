@@ -119,14 +119,14 @@ GT = ">"
 LTE = "<="
 LT = "<"
 
-NUMERICAL_OPS = [UNARY_MINUS, MINUS, PLUS, MULTIPLY, ABS, GTE, GT, LTE, LT]
+NUMERICAL_OPS = [UNARY_MINUS, MINUS, PLUS, MULTIPLY, GTE, GT, LTE, LT]
 
 
 # specific Int ops
 DIV = "div"
 MOD = "mod"
 
-INT_OPS = [DIV, MOD]
+INT_OPS = [DIV, MOD, ABS]
 
 # specific real ops
 REAL_DIV = "/"
@@ -172,6 +172,8 @@ RE_DIFF = "re.diff"
 RE_PLUS = "re.+"
 RE_OPT = "re.opt"
 RE_RANGE = "re.range"
+RE_LOOP = "re.loop"
+RE_POWER = "re.^"
 STR_IS_DIGIT = "str.is_digit"
 STR_TO_CODE = "str.to_code"
 STR_TO_INT = "str.to_int"
@@ -208,6 +210,7 @@ STRING_OPS = [
     RE_OPT,
     RE_RANGE,
     STR_IS_DIGIT,
+    STR_TO_CODE,
     STR_TO_INT,
     STR_FROM_CODE,
     STR_FROM_INT,
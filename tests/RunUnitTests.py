@@ -25,8 +25,17 @@ import unittest
 
 from tests.unit.TestTerm import TermTestCase
 from tests.unit.TestParsing import ParsingTestCase
+from tests.unit.TestFastParser import FastParserTestCase
 from tests.unit.TestTypechecker import TypecheckerTestCase
 from tests.unit.test_imp_based import ImpBasedUnitTest
+from tests.unit.TestSolverPool import SolverPoolTestCase
+from tests.unit.TestResultCache import ResultCacheTestCase
+from tests.unit.TestParseCache import ParseCacheTestCase
+from tests.unit.TestParseService import ParseServiceTestCase
+from tests.unit.TestSeedScheduler import SeedSchedulerTestCase
+from tests.unit.TestSeedIndex import SeedIndexTestCase
+from tests.unit.TestRuleScheduler import RuleSchedulerTestCase
+from tests.unit.TestSupervisor import SupervisorTestCase
 
 
 sys.path.append("../")
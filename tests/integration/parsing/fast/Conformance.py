@@ -0,0 +1,115 @@
+# MIT License
+#
+# Copyright (c) [2020 - 2021] Mauro Bringolf and Dominik Winterer
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import sys
+
+from antlr4.InputStream import InputStream
+
+from src.parsing.Ast import Term, TERM_FIELDS
+from src.parsing.Parse import generate_ast
+from src.parsing.FastParser import FastParser, UnsupportedSyntax
+
+sys.setrecursionlimit(100000)
+sys.path.append("../../../../")
+
+
+def term_diff(expected, actual):
+    """
+    :returns: description of the first difference between two terms or None.
+    """
+    stack = [(expected, actual)]
+    while stack:
+        e, a = stack.pop()
+        if not isinstance(e, Term) or not isinstance(a, Term):
+            if type(e) is not type(a) or e != a:
+                return "%r != %r" % (e, a)
+            continue
+        for field in TERM_FIELDS:
+            e_val, a_val = getattr(e, field), getattr(a, field)
+            if field in ("op", "let_terms", "subterms"):
+                if field == "op":
+                    e_val, a_val = [e_val], [a_val]
+                if (e_val is None) != (a_val is None) or len(e_val or []) != len(
+                    a_val or []
+                ):
+                    return "%s: %s != %s" % (field, e, a)
+                stack.extend(zip(e_val or [], a_val or []))
+            elif type(e_val) is not type(a_val) or e_val != a_val:
+                return "%s: %r != %r in %s" % (field, e_val, a_val, e)
+    return None
+
+
+def ast_diff(s):
+    """
+    Parses s with ANTLR and the FastParser.
+
+    :returns: description of the first difference between both ASTs, None if
+              they agree, both parsers fail or the FastParser does not support
+              s.
+    """
+    try:
+        actual = FastParser(s).parse()
+    except UnsupportedSyntax:
+        return None
+    except Exception as e:
+        actual = e
+    try:
+        expected = generate_ast(InputStream(s), prep_seed=False)
+    except Exception as e:
+        if isinstance(actual, Exception):
+            return None
+        return "ANTLR fails with %r" % e
+    if isinstance(actual, Exception):
+        return "FastParser fails with %r" % actual
+    if expected is None:
+        return "ANTLR finds no commands" if actual[0].commands else None
+    (e_script, e_globs), (a_script, a_globs) = expected, actual
+    if e_globs != a_globs:
+        return "globals: %s != %s" % (e_globs, a_globs)
+    if len(e_script.commands) != len(a_script.commands):
+        return "%d != %d commands" % (len(e_script.commands), len(a_script.commands))
+    for e, a in zip(e_script.commands, a_script.commands):
+        if type(e) is not type(a) or str(e) != str(a):
+            return "%s != %s" % (e, a)
+        if hasattr(e, "term"):
+            diff = term_diff(e.term, a.term)
+            if diff:
+                return diff
+        if getattr(e, "terms", None):
+            for e_term, a_term in zip(e.terms, a.terms):
+                diff = term_diff(e_term, a_term)
+                if diff:
+                    return diff
+    return None
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("Usage: ./Conformance.py <smtlib-file>")
+        exit(0)
+    fn = sys.argv[1]
+    with open(fn, "rb") as reader:
+        diff = ast_diff(reader.read().decode("utf8"))
+    if diff:
+        print(diff)
+        exit(1)
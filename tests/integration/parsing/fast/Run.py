@@ -0,0 +1,92 @@
+# MIT License
+#
+# Copyright (c) [2020 - 2021] Mauro Bringolf and Dominik Winterer
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+# Checks that the FastParser builds the same ASTs as ANTLR on every SMT-LIB
+# file of a benchmark folder. Mismatching files are listed in errors.txt.
+#
+# Usage: python3 Run.py <benchmark-folder>
+
+import os
+import sys
+import subprocess as sp
+from multiprocessing import Pool
+
+sys.path.append("../../")
+
+os.system("rm -rf errors.txt timeouts.txt")
+BENCHMARK = sys.argv[1] if len(sys.argv) > 1 else "benchmarks"
+
+N = 128
+
+
+def do_comparison(fn):
+    cmd = "timeout -s 9 120 python3 Conformance.py " + fn + "; echo $?"
+    out = sp.getoutput(cmd).split("\n")[-1]
+    if out == "137":
+        return 137
+    if out != "0":
+        return 1
+    return 0
+
+
+def collect(res, files):
+    errs, timeouts = [], []
+    for i in range(len(res)):
+        if res[i] == 1:
+            errs.append(files[i])
+        if res[i] == 137:
+            timeouts.append(files[i])
+    return errs, timeouts
+
+
+def append_to_file(fn, lines):
+    if not lines:
+        return
+    with open(fn, "a") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+files = sp.getoutput("find " + BENCHMARK + ' -name "*.smt2"').split("\n")
+batch_size = 100
+n = (len(files) + batch_size - 1) // batch_size
+n_err = 0
+n_timeout = 0
+with Pool(N) as p:
+    for i in range(n):
+        batch = files[i * batch_size : (i + 1) * batch_size]
+        res = p.map(do_comparison, batch)
+        e, t = collect(res, batch)
+        n_err += len(e)
+        n_timeout += len(t)
+        append_to_file("errors.txt", e)
+        append_to_file("timeouts.txt", t)
+        print(
+            min((i + 1) * batch_size, len(files)),
+            "/",
+            len(files),
+            "err=",
+            n_err,
+            "timeouts=",
+            n_timeout,
+            flush=True,
+        )
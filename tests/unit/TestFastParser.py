@@ -0,0 +1,86 @@
+# MIT License
+#
+# Copyright (c) [2020 - 2021] Mauro Bringolf and Dominik Winterer
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import glob
+import unittest
+import sys
+
+from src.parsing.Parse import parse_str
+from src.parsing.FastParser import FastParser, UnsupportedSyntax
+from tests.integration.parsing.fast.Conformance import ast_diff
+
+sys.path.append("../../")
+
+SCRIPTS = [
+    """\
+(set-info :smt-lib-version 2.6)
+(set-logic QF_BV)
+(set-info :source |multi
+line|)
+(declare-fun x () (_ BitVec 8))
+(declare-fun f ((_ BitVec 8) Bool) (_ BitVec 4))
+(assert (= ((_ extract 3 0) x) (f (_ bv5 8) true) #b0101 (_  bv5 8)))
+(check-sat)
+(exit)""",
+    """\
+(declare-const x Int)
+(define-fun g ((y Int) (z Real)) Bool (> y z))
+(assert (let ((a 1) (b a)) (let ((c (+ a b))) (g c 1.05))))
+(assert (forall ((x Real) (a (Array Int Int))) (exists ((y Int)) (= x (select a y)))))
+(assert (= x "a""b" |x y| re.all))
+(push 1)
+(check-sat-assuming (p (not q)))
+(get-value (x (+ x 1)))
+(pop 1)""",
+    "(assert (= 01 1.5x (_ foo 5) (_ foo a)))",
+    "(declare-fun a () (Array Int (_ BitVec 8)))",
+]
+
+UNSUPPORTED = [
+    "(assert (! x :named a))",
+    "(assert (= ((as const (Array Int Int)) 0) a))",
+    "(assert (= x bvx))",
+    "(set-info :namedx 1)",
+    "(declare-const S Int)(declare-const y S)",
+    "(assert x",
+]
+
+
+class FastParserTestCase(unittest.TestCase):
+    def test_conformance(self):
+        for script in SCRIPTS:
+            self.assertIsNone(ast_diff(script))
+        for fn in glob.glob("tests/res/*.smt2") + glob.glob("tests/unit/**/*.smt2"):
+            with open(fn, "rb") as reader:
+                self.assertIsNone(ast_diff(reader.read().decode("utf8")), fn)
+
+    def test_fallback(self):
+        for script in UNSUPPORTED:
+            with self.assertRaises(UnsupportedSyntax):
+                FastParser(script).parse()
+            antlr, _ = parse_str(script)
+            fast, _ = parse_str(script, parser="fast")
+            self.assertEqual(str(antlr), str(fast))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+# MIT License
+#
+# Copyright (c) [2020 - 2021] Mauro Bringolf and Dominik Winterer
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import sys
+import shutil
+import tempfile
+import unittest
+
+from src.core.ParseCache import SeedParseCache
+from src.parsing.Parse import parse_str
+from src.parsing.Typechecker import typecheck
+
+sys.path.append("../../")
+
+SEED = """\
+(declare-fun x () Int)
+(declare-fun s () String)
+(assert (forall ((y Int)) (> (+ x y (str.len s)) 0)))
+(check-sat)"""
+
+
+class ParseCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_parse_cache(self):
+        script, glob = parse_str(SEED)
+        typecheck(script, glob)
+        cache = SeedParseCache(self.folder)
+        key = cache.key(SEED.encode())
+        self.assertIsNone(cache.lookup(key))
+        cache.store(key, script, glob)
+
+        # Read back by a fresh cache, with the type annotations.
+        cached, cached_glob = SeedParseCache(self.folder).lookup(key)
+        self.assertEqual(str(cached), str(script))
+        self.assertEqual(cached_glob, glob)
+        term = cached.commands[2].term
+        self.assertEqual(term.type, "Bool")
+        self.assertEqual(term.subterms[0].subterms[0].type, "Int")
+        self.assertIs(term.subterms[0].parent, term)
+
+        self.assertNotEqual(cache.key(SEED.encode() + b"\n"), key)
+
+    def test_corrupt_entry(self):
+        cache = SeedParseCache(self.folder)
+        key = cache.key(SEED.encode())
+        with open(cache.path(key), "wb") as writer:
+            writer.write(b"garbage")
+        self.assertIsNone(cache.lookup(key))
+
+
+if __name__ == "__main__":
+    unittest.main()
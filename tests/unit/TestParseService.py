@@ -0,0 +1,118 @@
+# MIT License
+#
+# Copyright (c) [2020 - 2021] Mauro Bringolf and Dominik Winterer
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+from src.core.ParseService import ParseService
+
+sys.path.append("../../")
+
+SEED = """\
+(declare-fun x () Int)
+(assert (forall ((y Int)) (> (+ x y) 0)))
+(check-sat)"""
+
+# Takes seconds to parse.
+SLOW_SEED = "(declare-fun x () Int)\n(assert %s)\n(check-sat)" % (
+    "(and (> x 0) " * 5000 + "true" + ")" * 5000
+)
+
+
+class ParseServiceTestCase(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.seed = self.write("seed.smt2", SEED)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def write(self, name, content):
+        path = os.path.join(self.folder, name)
+        with open(path, "w") as writer:
+            writer.write(content)
+        return path
+
+    def test_parse(self):
+        service = ParseService(2)
+        try:
+            tasks = [service.submit(self.seed) for _ in range(3)]
+            for task in tasks:
+                script, glob = task.result()
+                self.assertEqual(
+                    str(script.commands[1].term), "(forall ((y Int)) (> (+ x y) 0))"
+                )
+                self.assertEqual(script.commands[1].term.type, "Bool")
+                self.assertEqual(glob, {"x": "Int"})
+
+            invalid = self.write("invalid.smt2", "(assert")
+            self.assertEqual(service.submit(invalid).result(), (None, None))
+        finally:
+            service.close()
+
+    def test_deadline(self):
+        service = ParseService(1, timeout=0.1)
+        try:
+            slow = service.submit(self.write("slow.smt2", SLOW_SEED))
+            self.assertEqual(slow.result(), (None, None))
+
+            # The killed worker is replaced for the next seed.
+            script, _ = service.submit(self.seed).result()
+            self.assertEqual(len(script.commands), 3)
+        finally:
+            service.close()
+
+    def test_respawn_with_engine_running(self):
+        # Solver threads keep running while the timed out worker is replaced.
+        stop = threading.Event()
+
+        def solver():
+            while not stop.is_set():
+                subprocess.run(["sleep", "0.01"])
+
+        engine = ThreadPoolExecutor(max_workers=2)
+        runs = [engine.submit(solver) for _ in range(2)]
+        service = ParseService(1, timeout=0.1)
+        try:
+            slow = service.submit(self.write("slow.smt2", SLOW_SEED))
+            self.assertEqual(slow.result(), (None, None))
+
+            task = service.submit(self.seed)
+            self.assertEqual(service.workers[0].process._start_method, "forkserver")
+            script, _ = task.result()
+            self.assertEqual(len(script.commands), 3)
+        finally:
+            service.close()
+            stop.set()
+            for run in runs:
+                run.result()
+            engine.shutdown()
+
+
+if __name__ == "__main__":
+    unittest.main()
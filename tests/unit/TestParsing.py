@@ -20,10 +20,12 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
+import io
 import unittest
 import sys
 
 from src.parsing.Parse import parse_str, parse_file
+from src.parsing.CommandReader import read_commands
 
 sys.path.append("../../")
 
@@ -46,6 +48,26 @@ class ParsingTestCase(unittest.TestCase):
 (check-sat)"""
         self.assertEqual(oracle, formula.__str__())
 
+    def test_stream(self):
+        script = """\
+(set-info :source |comment with ( and ;|) ; dropped )
+(declare-fun s () String)
+(assert (= s "a)(b""c;d"))
+(check-sat)
+(get-model)
+"""
+        commands = list(read_commands(io.StringIO(script), chunk_size=7))
+        self.assertEqual(len(commands), 5)
+        self.assertEqual(commands[2], '(assert (= s "a)(b""c;d"))')
+        self.assertRaises(ValueError, list, read_commands(io.StringIO("x (check-sat)")))
+
+        for fn in ["tests/res/issue7.smt2", "tests/res/issue18.smt2"]:
+            formula, glob = parse_file(fn)
+            for parser in ["antlr", "fast"]:
+                streamed, streamed_glob = parse_file(fn, parser=parser, stream=True)
+                self.assertEqual(streamed.__str__(), formula.__str__())
+                self.assertEqual(streamed_glob, glob)
+
 
 #     def test_issue25(self):
 # script = """\
@@ -0,0 +1,134 @@
+# MIT License
+#
+# Copyright (c) [2020 - 2021] Mauro Bringolf and Dominik Winterer
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+from src.core.ResultCache import SeedResultCache, MutantResultCache, solver_identities
+from src.core.Solver import SolverQueryResult
+
+sys.path.append("../../")
+
+
+class CountingSolver:
+    def __init__(self, cil, stdout="sat\n", exitcode=0):
+        self.cil = cil
+        self.stdout = stdout
+        self.exitcode = exitcode
+        self.calls = 0
+
+    def solve(self, file, timeout, debug=False):
+        self.calls += 1
+        return self.stdout, "", self.exitcode
+
+
+class ResultCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.seed = self.folder + "/seed.smt2"
+        with open(self.seed, "w") as writer:
+            writer.write("(assert true)\n(check-sat)\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_seed_cache(self):
+        solver = CountingSolver("z3")
+        cache = SeedResultCache(self.folder)
+        result = cache.get(solver, self.seed, 8)
+        self.assertTrue(result.equals(SolverQueryResult.SAT))
+        cache.get(solver, self.seed, 8)
+        self.assertEqual(solver.calls, 1)
+
+        # Read back from disk by a fresh cache.
+        SeedResultCache(self.folder).get(solver, self.seed, 8)
+        self.assertEqual(solver.calls, 1)
+
+        # Different solver cli, different entry.
+        other = CountingSolver("z3 smt.arith.solver=2")
+        cache.get(other, self.seed, 8)
+        self.assertEqual(other.calls, 1)
+
+    def test_seed_cache_upgrade(self):
+        binary = self.folder + "/solver"
+        with open(binary, "w") as writer:
+            writer.write("#!/bin/sh\necho 'solver 1.0'\n")
+        os.chmod(binary, 0o755)
+        solver = CountingSolver(binary)
+        SeedResultCache(self.folder).get(solver, self.seed, 8)
+        SeedResultCache(self.folder).get(solver, self.seed, 8)
+        self.assertEqual(solver.calls, 1)
+
+        # A new campaign with an upgraded solver does not reuse the result.
+        with open(binary, "w") as writer:
+            writer.write("#!/bin/sh\necho 'solver 1.1'\n")
+        solver_identities.clear()
+        SeedResultCache(self.folder).get(solver, self.seed, 8)
+        self.assertEqual(solver.calls, 2)
+
+    def test_seed_cache_timeout(self):
+        solver = CountingSolver("z3", stdout="", exitcode=137)
+        cache = SeedResultCache()
+        cache.get(solver, self.seed, 8)
+        cache.get(solver, self.seed, 4)
+        self.assertEqual(solver.calls, 1)
+
+        # A timed out run is repeated with a larger timeout.
+        cache.get(solver, self.seed, 16)
+        self.assertEqual(solver.calls, 2)
+
+    def test_mutant_cache_lru(self):
+        cache = MutantResultCache(2)
+        cache.put("a", "z3", 8, ("sat\n", "", 0))
+        cache.put("b", "z3", 8, ("unsat\n", "", 0))
+        self.assertEqual(cache.get("a", "z3", 8), ("sat\n", "", 0))
+        self.assertIsNone(cache.get("a", "cvc5", 8))
+        self.assertIsNone(cache.get("a", "z3", 16))
+
+        # "b" is the least recently used entry.
+        cache.put("c", "z3", 8, ("sat\n", "", 0))
+        self.assertIsNone(cache.get("b", "z3", 8))
+        self.assertIsNotNone(cache.get("a", "z3", 8))
+
+    def test_mutant_cache_disk(self):
+        MutantResultCache(1, self.folder).put("a", "z3", 8, ("unsat\n", "", 0))
+        cache = MutantResultCache(1, self.folder)
+        self.assertEqual(cache.get("a", "z3", 8), ("unsat\n", "", 0))
+
+    def test_mutant_cache_failures(self):
+        # Timeouts and crashes are neither kept in memory nor on disk.
+        cache = MutantResultCache(10, self.folder)
+        cache.put("a", "z3", 8, ("", "", 137))
+        cache.put("b", "z3", 8, ("", "", -11))
+        cache.put("c", "z3", 8, ("", "ASSERTION VIOLATION", 0))
+        for mutant_hash in ["a", "b", "c"]:
+            self.assertIsNone(cache.get(mutant_hash, "z3", 8))
+            self.assertIsNone(
+                MutantResultCache(10, self.folder).get(mutant_hash, "z3", 8)
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
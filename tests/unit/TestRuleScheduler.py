@@ -0,0 +1,100 @@
+# MIT License
+#
+# Copyright (c) [2020 - 2021] Mauro Bringolf and Dominik Winterer
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import sys
+import unittest
+
+from src.mutators.ImplicationBasedWeakeningStrengthening.RuleScheduler import (
+    RuleScheduler,
+    UCBRuleScheduler,
+    ThompsonRuleScheduler,
+    merge_rule_stats,
+)
+
+sys.path.append("../../")
+
+
+class MockRule:
+    def __init__(self, name):
+        self.name = name
+
+
+class RuleSchedulerTestCase(unittest.TestCase):
+    def train(self, scheduler):
+        for _ in range(50):
+            scheduler.record("good", {"z3": 1, "cvc5": 0})
+            scheduler.record("bad", {"z3": 0, "cvc5": 0})
+
+    def test_uniform(self):
+        rules = [MockRule(name) for name in ["a", "b", "c"]]
+        self.assertEqual(
+            sorted(r.name for r in RuleScheduler().order(rules)), ["a", "b", "c"]
+        )
+
+    def test_ucb(self):
+        scheduler = UCBRuleScheduler()
+        self.train(scheduler)
+        rules = [MockRule("bad"), MockRule("good"), MockRule("new")]
+        order = [r.name for r in scheduler.order(rules)]
+        self.assertEqual(order, ["new", "good", "bad"])
+
+    def test_thompson(self):
+        scheduler = ThompsonRuleScheduler()
+        self.train(scheduler)
+        rules = [MockRule("bad"), MockRule("good")]
+        self.assertEqual(scheduler.order(rules)[0].name, "good")
+
+    def test_solver_arms(self):
+        # The rewards of a rule are kept per solver.
+        for scheduler in [UCBRuleScheduler(exploration=0.1), ThompsonRuleScheduler()]:
+            for _ in range(50):
+                scheduler.record("z3-only", {"z3": 1, "cvc5": 0})
+                scheduler.record("bad", {"z3": 0, "cvc5": 0})
+            self.assertEqual(
+                scheduler.arm("z3-only", "z3"), {"pulls": 50, "reward": 50}
+            )
+            self.assertEqual(
+                scheduler.arm("z3-only", "cvc5"), {"pulls": 50, "reward": 0}
+            )
+
+            # A rule is ranked by its best arm.
+            rules = [MockRule("bad"), MockRule("z3-only")]
+            self.assertEqual(scheduler.order(rules)[0].name, "z3-only")
+
+        # A rule not yet tried on a solver is explored first.
+        scheduler = UCBRuleScheduler()
+        scheduler.record("untried", {"z3": 0})
+        scheduler.record("bad", {"z3": 0, "cvc5": 0})
+        rules = [MockRule("bad"), MockRule("untried")]
+        self.assertEqual(scheduler.order(rules)[0].name, "untried")
+
+    def test_stats(self):
+        scheduler = RuleScheduler()
+        self.train(scheduler)
+        stats = merge_rule_stats([scheduler.stats, scheduler.stats]).stats
+        self.assertEqual(stats["good"]["pulls"], 100)
+        self.assertEqual(stats["good"]["reward"], 100)
+        self.assertEqual(stats["good"]["solvers"]["cvc5"]["reward"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+# MIT License
+#
+# Copyright (c) [2020 - 2021] Mauro Bringolf and Dominik Winterer
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import os
+import sys
+import shutil
+import argparse
+import tempfile
+import unittest
+
+from src.core.SeedIndex import (
+    SeedIndex,
+    filter_seeds,
+    init_worker,
+    profile_script,
+    profile_seed,
+)
+import src.core.SeedIndex as SeedIndexModule
+from src.parsing.Parse import parse_str
+from src.parsing.Typechecker import typecheck
+
+sys.path.append("../../")
+
+SEED = """\
+(set-logic LIA)
+(declare-fun x () Int)
+(assert (and (> x 0) (forall ((y Int)) (>= (+ x y) y))))
+(check-sat)"""
+
+
+class SeedIndexTestCase(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def write_seed(self, name, content):
+        path = os.path.join(self.folder, name)
+        with open(path, "w") as writer:
+            writer.write(content)
+        return path
+
+    def test_profile(self):
+        script, glob = parse_str(SEED)
+        typecheck(script, glob)
+        profile = profile_script(script)
+        self.assertEqual(profile["asserts"], 1)
+        self.assertEqual(profile["ops"], {"and": 1, ">": 1, ">=": 1, "+": 1})
+        self.assertEqual(profile["sorts"], ["Bool", "Int"])
+        self.assertTrue(profile["quantifiers"])
+        self.assertIn("DROPCONJ", profile["rules"]["sat"])
+
+    def test_filter_seeds(self):
+        valid = self.write_seed("valid.smt2", SEED)
+        invalid = self.write_seed("invalid.smt2", "(assert")
+        unknown = self.write_seed("unknown.smt2", SEED)
+
+        init_worker("antlr", False, 100000, None)
+        path = os.path.join(self.folder, "seed-index.json")
+        index = SeedIndex(path)
+        for seed in [valid, invalid]:
+            index.update(*profile_seed(seed))
+        index.save()
+        self.assertEqual(SeedIndex(path).entry(valid)["logic"], "LIA")
+        self.assertEqual(SeedIndex(path).entry(invalid)["reason"], "parse")
+
+        args = argparse.Namespace(
+            seed_index=path,
+            no_disk_cache=True,
+            file_size_limit=100000,
+            oracle="sat",
+            rule_set=None,
+            parser="antlr",
+            stream_parse=False,
+        )
+        seeds = [valid, invalid, unknown]
+        self.assertEqual(filter_seeds(seeds, args), [valid, unknown])
+        args.rule_set = "reglan"
+        self.assertEqual(filter_seeds(seeds, args), [unknown])
+
+        # Indexes built with other parser settings are not used.
+        args.parser = "fast"
+        self.assertEqual(filter_seeds(seeds, args), seeds)
+
+        # Changed seeds are not judged by their outdated entry.
+        with open(invalid, "w") as writer:
+            writer.write(SEED + "\n")
+        self.assertIsNone(SeedIndex(path).entry(invalid))
+
+    def test_parse_timeout(self):
+        def timeout(fn, timeout_limit, parser):
+            raise KeyboardInterrupt()  # as raised by exit_after
+
+        seed = self.write_seed("seed.smt2", SEED)
+        init_worker("antlr", False, 100000, None)
+        parse_filestream = SeedIndexModule.parse_filestream
+        SeedIndexModule.parse_filestream = timeout
+        try:
+            _, entry = profile_seed(seed)
+        finally:
+            SeedIndexModule.parse_filestream = parse_filestream
+        self.assertEqual(entry["reason"], "timeout")
+
+
+if __name__ == "__main__":
+    unittest.main()
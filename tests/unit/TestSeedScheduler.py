@@ -0,0 +1,93 @@
+# MIT License
+#
+# Copyright (c) [2020 - 2021] Mauro Bringolf and Dominik Winterer
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import sys
+import shutil
+import tempfile
+import unittest
+
+from src.core.SeedScheduler import SumTree, UniformSeedScheduler, YieldSeedScheduler
+
+sys.path.append("../../")
+
+
+def feedback(bugs=0, solver_time=1.0, timeouts=0, invalid=False):
+    return {
+        "invalid": invalid,
+        "yield": bugs,
+        "solver_time": solver_time,
+        "timeouts": timeouts,
+    }
+
+
+class SeedSchedulerTestCase(unittest.TestCase):
+    def test_uniform(self):
+        seeds = ["a.smt2", "b.smt2", "c.smt2"]
+        scheduler = UniformSeedScheduler(seeds)
+        visited = [scheduler.next() for _ in seeds]
+        self.assertEqual(sorted(visited), seeds)
+        self.assertIsNone(scheduler.next())
+
+    def test_yield(self):
+        seeds = ["good.smt2", "bad.smt2", "invalid.smt2"]
+        scheduler = YieldSeedScheduler(seeds)
+        scheduler.record("good.smt2", feedback(bugs=5))
+        scheduler.record("bad.smt2", feedback(solver_time=10.0, timeouts=3))
+        scheduler.record("invalid.smt2", feedback(invalid=True))
+
+        self.assertGreater(scheduler.weight("good.smt2"), scheduler.weight("bad.smt2"))
+        self.assertEqual(scheduler.weight("invalid.smt2"), 0)
+
+        # As many visits as seeds, never the invalid one.
+        visited = [scheduler.next() for _ in seeds]
+        self.assertNotIn("invalid.smt2", visited)
+        self.assertIsNone(scheduler.next())
+
+    def test_sum_tree(self):
+        tree = SumTree([1.0, 0.0, 3.0])
+        self.assertEqual(tree.total(), 4.0)
+        counts = [0, 0, 0]
+        for _ in range(4000):
+            counts[tree.sample()] += 1
+        self.assertEqual(counts[1], 0)
+        self.assertGreater(counts[2], 2 * counts[0])
+
+        tree.update(2, 0.0)
+        self.assertEqual(tree.total(), 1.0)
+        self.assertEqual({tree.sample() for _ in range(100)}, {0})
+
+    def test_yield_persistence(self):
+        folder = tempfile.mkdtemp()
+        try:
+            statefile = folder + "/seed-schedule.json"
+            scheduler = YieldSeedScheduler(["a.smt2"], statefile)
+            scheduler.record("a.smt2", feedback(bugs=2))
+            scheduler.save()
+
+            scheduler = YieldSeedScheduler(["a.smt2"], statefile)
+            self.assertEqual(scheduler.stats("a.smt2")["yield"], 2)
+        finally:
+            shutil.rmtree(folder)
+
+
+if __name__ == "__main__":
+    unittest.main()
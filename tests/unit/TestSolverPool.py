@@ -0,0 +1,71 @@
+# MIT License
+#
+# Copyright (c) [2020 - 2021] Mauro Bringolf and Dominik Winterer
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import sys
+import shutil
+import unittest
+
+from src.core.SolverPool import SolverPool, strip_exit
+
+sys.path.append("../../")
+
+
+class SolverPoolTestCase(unittest.TestCase):
+    def test_strip_exit(self):
+        script = '(assert true)\n(echo "(exit)")\n(check-sat)\n(exit)\n'
+        self.assertEqual(
+            strip_exit(script), '(assert true)\n(echo "(exit)")\n(check-sat)'
+        )
+
+    @unittest.skipUnless(shutil.which("z3"), "z3 not found")
+    def test_reuse(self):
+        sat = "(declare-const x Int)\n(assert (> x 0))\n(check-sat)\n(exit)\n"
+        unsat = "(declare-const x Int)\n(assert (> x x))\n(check-sat)\n(exit)\n"
+        pool = SolverPool(max_queries=10)
+        try:
+            self.assertEqual(pool.query("z3", sat, 10), ("sat\n", "", 0))
+            process = pool.idle["z3"][0]
+            self.assertEqual(pool.query("z3", unsat, 10), ("unsat\n", "", 0))
+            # The (exit) of the scripts does not end the process.
+            self.assertEqual(pool.idle["z3"], [process])
+            self.assertEqual(process.queries, 2)
+        finally:
+            pool.close()
+
+    @unittest.skipUnless(shutil.which("z3"), "z3 not found")
+    def test_error(self):
+        error = "(declare-const x Int)\n(assert (> x y))\n(check-sat)\n"
+        sat = "(declare-const x Int)\n(assert (> x 0))\n(check-sat)\n"
+        pool = SolverPool(max_queries=10)
+        try:
+            stdout, _, exitcode = pool.query("z3", error, 10)
+            self.assertTrue(stdout.startswith("(error "))
+            self.assertEqual(exitcode, 1)
+            # The process remains usable after the error.
+            self.assertEqual(pool.query("z3", sat, 10), ("sat\n", "", 0))
+            self.assertEqual(pool.idle["z3"][0].queries, 2)
+        finally:
+            pool.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+# MIT License
+#
+# Copyright (c) [2020 - 2021] Mauro Bringolf and Dominik Winterer
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import sys
+import time
+import shutil
+import tempfile
+import unittest
+import argparse
+import multiprocessing
+
+from src.core.Supervisor import Supervisor
+from src.core.SeedScheduler import YieldSeedScheduler
+
+sys.path.append("../../")
+
+
+class SupervisorTestCase(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        args = argparse.Namespace(
+            logfolder=self.folder, quiet=True, jobs=1, parse_jobs=1
+        )
+        self.supervisor = Supervisor(args)
+        self.restarts = 0
+
+        def start_worker():
+            self.restarts += 1
+
+        self.supervisor.start_worker = start_worker
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_killed_worker(self):
+        seeds = ["a.smt2", "b.smt2"]
+        scheduler = YieldSeedScheduler(seeds)
+
+        worker = multiprocessing.Process(target=time.sleep, args=(60,), daemon=True)
+        worker.start()
+        self.supervisor.workers[0] = worker
+        self.supervisor.status_queue.put(("seed", 0, "a.smt2"))
+        self.supervisor.collect_status(1, scheduler)
+
+        worker.kill()
+        worker.join()
+        self.supervisor.check_workers(scheduler)
+
+        # The worker is restarted and its seed is not handed out again.
+        self.assertEqual(self.restarts, 1)
+        self.assertEqual(scheduler.weight("a.smt2"), 0)
+        self.assertEqual([scheduler.next() for _ in seeds], ["b.smt2", "b.smt2"])
+
+    def test_finished_seed(self):
+        scheduler = YieldSeedScheduler(["a.smt2"])
+        feedback = {"invalid": False, "yield": 1, "solver_time": 1.0, "timeouts": 0}
+
+        worker = multiprocessing.Process(target=time.sleep, args=(60,), daemon=True)
+        worker.start()
+        self.supervisor.workers[0] = worker
+        self.supervisor.status_queue.put(("seed", 0, "a.smt2"))
+        self.supervisor.collect_status(1, scheduler)
+        self.supervisor.status_queue.put(("feedback", 0, ("a.smt2", feedback)))
+        self.supervisor.collect_status(1, scheduler)
+
+        # Died after reporting its seed, which stays valid.
+        worker.kill()
+        worker.join()
+        self.supervisor.check_workers(scheduler)
+        self.assertEqual(self.restarts, 1)
+        self.assertGreater(scheduler.weight("a.smt2"), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
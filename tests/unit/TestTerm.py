@@ -21,10 +21,15 @@
 # SOFTWARE.
 
 import sys
+import io
+import pickle
+import copy
 import unittest
 
 from src.parsing.Parse import parse_str
 from src.parsing.Ast import Const, Var, Expr
+from src.parsing.Typechecker import typecheck
+from src.parsing.Types import INTEGER_TYPE
 
 sys.path.append("../../")
 
@@ -195,6 +200,126 @@ class TermTestCase(unittest.TestCase):
         free_vars_let()
         free_vars_let2()
 
+    def test_free_variables_cache(self):
+        formula = """\
+(declare-const y Int)
+(declare-const z Int)
+(assert (and (forall ((x Int)) (> x y)) (= z 0)))
+"""
+        term = parse_str(formula)[0].commands[2].term
+        self.assertEqual(set(term.free_variables()), {"y", "z"})
+
+        forall = term.subterms[0]
+        forall.subterms[0].subterms[1].name = "w"
+        self.assertEqual(set(term.free_variables()), {"w", "z"})
+
+        forall.quantified_vars = (["w"], ["Int"])
+        self.assertEqual(set(term.free_variables()), {"x", "z"})
+
+        term.subterms = term.subterms[:1]
+        self.assertEqual(set(term.free_variables()), {"x"})
+        self.assertEqual(term.free_variables()["x"], [forall.subterms[0].subterms[0]])
+
+    def test_structural_hash(self):
+        formula = """\
+(declare-const y Int)
+(assert (and (> (+ y 1) 0) (> (+ y 1) 0) (let ((z y)) (> z 0))))
+"""
+        term = parse_str(formula)[0].commands[1].term
+        first, second, let = term.subterms
+        self.assertEqual(hash(first), hash(second))
+        self.assertEqual(first, second)
+        self.assertEqual(hash(term), hash(copy.deepcopy(term)))
+
+        occs = []
+        term.find_all(Expr("+", [Var("y", "Int"), Const("1", type="Int")]), occs)
+        self.assertEqual(occs, [first.subterms[0], second.subterms[0]])
+
+        first.subterms[0].op = "-"
+        self.assertNotEqual(hash(first), hash(second))
+        self.assertNotEqual(first, second)
+        self.assertEqual(hash(term), hash(copy.deepcopy(term)))
+
+        other = copy.deepcopy(let)
+        other.let_terms = [Const("0", type="Int")]
+        self.assertNotEqual(let, other)
+
+    def test_text(self):
+        formula = """\
+(declare-const y Int)
+(assert (and (> (+ y 1) 0) (forall ((x Int) (z Int)) (> (* x z) y)) (let ((z y)) (> z 0))))
+(check-sat)"""
+        script = parse_str(formula)[0]
+        self.assertEqual(str(script), formula)
+        out = io.StringIO()
+        script.write(out)
+        self.assertEqual(out.getvalue(), formula)
+
+        term = script.commands[1].term
+        gt = term.subterms[0]
+        gt.subterms[0].op = "-"
+        self.assertEqual(
+            str(term),
+            "(and (> (- y 1) 0) (forall ((x Int) (z Int)) (> (* x z) y)) "
+            "(let ((z y)) (> z 0)))",
+        )
+        term.subterms = term.subterms[1:]
+        self.assertEqual(
+            str(term),
+            "(and (forall ((x Int) (z Int)) (> (* x z) y)) (let ((z y)) (> z 0)))",
+        )
+
+    def test_layout(self):
+        formula = """\
+(declare-const y Int)
+(assert (forall ((x Int)) (> (+ x y) 0)))
+"""
+        term = parse_str(formula)[0].commands[1].term
+        self.assertFalse(hasattr(term, "__dict__"))
+
+        copied = pickle.loads(pickle.dumps(term))
+        self.assertEqual(copied, term)
+        self.assertEqual(str(copied), str(term))
+        self.assertIs(copied.subterms[0].parent, copied)
+
+        gt = term.subterms[0]
+        gt.subterms[0].assign(Var("x", "Int"))
+        self.assertEqual(str(term), "(forall ((x Int)) (> x 0))")
+        self.assertIs(gt.subterms[0].parent, gt)
+
+        # Parents are referenced weakly and dropped with the tree.
+        del term, copied
+        self.assertIsNone(gt.parent)
+
+    def test_deep_term(self):
+        depth = 2000
+        formula = (
+            "(declare-const x Int)\n(declare-const b Bool)\n(assert (> "
+            + "(ite b (+ x 1) " * depth
+            + "x"
+            + ")" * depth
+            + " 0))"
+        )
+        script, glob = parse_str(formula)
+        term = script.commands[2].term
+
+        # The terms are visited with explicit stacks, not by recursion, and
+        # every subterm of an ite is typechecked once.
+        limit = sys.getrecursionlimit()
+        sys.setrecursionlimit(1000)
+        try:
+            typecheck(script, glob)
+            self.assertEqual(str(term), formula.splitlines()[2][len("(assert ") : -1])
+            self.assertEqual(list(term.free_variables()), ["x", "b"])
+            self.assertEqual(len(term.free_variables()["x"]), depth + 1)
+            occs = []
+            term.find_all(Var("b", "Bool"), occs)
+            self.assertEqual(len(occs), depth)
+            self.assertEqual(hash(term), hash(term))
+        finally:
+            sys.setrecursionlimit(limit)
+        self.assertEqual(term.subterms[0].type, INTEGER_TYPE)
+
 
 if __name__ == "__main__":
     TermTestCase().test_term()
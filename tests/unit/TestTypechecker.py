@@ -28,6 +28,8 @@ sys.path.append("../../")
 
 from src.parsing.Ast import (
     Assert,
+    Expr,
+    Var,
 )
 from src.parsing.Parse import parse_str, parse_file
 
@@ -36,9 +38,16 @@ from src.parsing.Types import (
     BOOLEAN_TYPE,
     INTEGER_TYPE,
     STRING_TYPE,
+    REAL_TYPE,
 )
 
-from src.parsing.Typechecker import Context, typecheck_expr, typecheck
+from src.parsing.Typechecker import (
+    Context,
+    TypeCheckError,
+    typecheck_expr,
+    typecheck,
+    typecheck_path,
+)
 
 
 def check_type(expr):
@@ -60,6 +69,12 @@ def check_type(expr):
                 check_type(e)
 
 
+def subterms(expr):
+    yield expr
+    for term in (expr.let_terms or []) + (expr.subterms or []):
+        yield from subterms(term)
+
+
 def oracle(formula):
     for cmd in formula.commands:
         if isinstance(cmd, Assert):
@@ -162,6 +177,72 @@ class TypecheckerTestCase(unittest.TestCase):
         for i in range(1, 4):
             typecheck_expr(formula.commands[i].term, ctxt)
 
+    def test_typecheck_path(self):
+        formula_str = """
+(declare-fun x () Int)
+(declare-fun r () Real)
+(declare-fun s () String)
+(assert (forall ((y Int)) (and (> (abs y) x) (str.in_re s ((_ re.loop 1 3) re.allchar)))))
+(check-sat)
+"""
+        formula, glob = parse_str(formula_str)
+        typecheck(formula, glob)
+        term = formula.commands[3].term
+        gt = term.subterms[0].subterms[0]
+
+        # Well-typed rewrite: the new subterm and the terms above are annotated.
+        gt.subterms[0] = Expr("+", [gt.subterms[0], gt.subterms[1]])
+        term.type = None
+        self.assertEqual(typecheck_path(term, [0, 0, 0], glob), BOOLEAN_TYPE)
+        self.assertEqual(gt.subterms[0].type, INTEGER_TYPE)
+        self.assertEqual(term.type, BOOLEAN_TYPE)
+
+        # Ill-typed rewrite: abs is only defined on Int.
+        gt.subterms[1] = Expr("abs", [Var("r", REAL_TYPE)])
+        with self.assertRaises(TypeCheckError):
+            typecheck_path(term, [0, 0, 1], glob)
+
+    def test_error_restores_annotations(self):
+        # Subterms the typechecker did not get to before the error keep their
+        # previous annotation, the others are annotated.
+        formula_str = """
+(declare-const x Int)
+(assert (let ((a (+ x 1))) (and (> a "s") (< (- a 1) 0))))
+(assert (and (forall ((y Int)) (or (> y "s") (= (+ y x) 0))) (> x 0)))
+(check-sat)
+"""
+        formula, glob = parse_str(formula_str)
+        let = formula.commands[1].term
+        forall_and = formula.commands[2].term
+        for term in [let, forall_and]:
+            for sub in subterms(term):
+                if not sub.is_const:
+                    sub.type = "old"
+
+        # Failure in the body of a let.
+        with self.assertRaises(TypeCheckError):
+            typecheck_expr(let, Context(glob, {}))
+        plus, and_ = let.let_terms[0], let.subterms[0]
+        gt, lt = and_.subterms
+        self.assertEqual(plus.type, INTEGER_TYPE)
+        self.assertEqual(gt.subterms[0].type, INTEGER_TYPE)
+        self.assertEqual([t.type for t in [let, and_, gt]], ["old"] * 3)
+        self.assertEqual([t.type for t in subterms(lt) if not t.is_const], ["old"] * 3)
+
+        # Failure in the body of a quantifier.
+        with self.assertRaises(TypeCheckError):
+            typecheck_expr(forall_and, Context(glob, {}))
+        forall, gt = forall_and.subterms
+        or_ = forall.subterms[0]
+        self.assertEqual(or_.subterms[0].subterms[0].type, INTEGER_TYPE)
+        self.assertEqual(
+            [t.type for t in [forall_and, forall, or_, or_.subterms[0]]], ["old"] * 4
+        )
+        for term in [or_.subterms[1], gt]:
+            self.assertEqual(
+                {t.type for t in subterms(term) if not t.is_const}, {"old"}
+            )
+
     def test_typechecking_formula_small(self):
         formula_str = """
 (declare-fun x () Int)
@@ -1,2 +1,2 @@
-(assert (forall ((x Real)) (>= x (+ x (- (abs 17087.935638849973))))))
+(assert (forall ((x Real)) (>= x (+ x (- (ite (>= 17087.935638849973 0.0) 17087.935638849973 (- 17087.935638849973)))))))
 (check-sat)
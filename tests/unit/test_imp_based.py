@@ -35,6 +35,10 @@ from src.parsing.Typechecker import typecheck
 from src.parsing.Parse import *
 from src.mutators.ImplicationBasedWeakeningStrengthening.ImplicationBasedWeakeningStrengthening import *
 from src.mutators.ImplicationBasedWeakeningStrengthening.rules import *
+from src.mutators.ImplicationBasedWeakeningStrengthening.CandidateIndex import (
+    CandidateIndex,
+)
+from src.mutators.ImplicationBasedWeakeningStrengthening.TermPool import TermPool
 
 z3 = shutil.which("z3") or os.environ.get("Z3_EXE", None)
 
@@ -156,7 +160,100 @@ class MockArgs:
 
 
 class ImpBasedUnitTest(unittest.TestCase):
-    pass
+    def test_mutate_keeps_previous_script(self):
+        script, glbls = parse_file("tests/unit/impbased/drop-conj.smt2", silent=True)
+        typecheck(script, glbls)
+        before = str(script)
+
+        random.seed(17)
+        generator = ImplicationBasedWeakeningStrengthening(
+            script, glbls, MockArgs("sat", rule_set="DROPCONJ")
+        )
+        mutant, success, _ = generator.mutate()
+
+        self.assertTrue(success)
+        self.assertIsNot(mutant, script)
+        self.assertEqual(str(script), before)
+        self.assertNotEqual(str(mutant), before)
+
+        # Asserts off the rewritten path are shared with the previous script.
+        asserts = [cmd for cmd in script.commands if isinstance(cmd, Assert)]
+        shared = [cmd for cmd in mutant.commands if any(cmd is a for a in asserts)]
+        self.assertEqual(len(shared), len(asserts) - 1)
+
+    def test_number_relation_shift_real(self):
+        script, glbls = parse_str(
+            """\
+(declare-const x Real)
+(declare-const y Real)
+(assert (< x y))
+"""
+        )
+        typecheck(script, glbls)
+
+        for seed in range(10):
+            random.seed(seed)
+            generator = ImplicationBasedWeakeningStrengthening(
+                script, glbls, MockArgs("sat", rule_set="NUMRELSHIFTSKEWED")
+            )
+            mutant, success, _ = generator.mutate()
+
+            self.assertTrue(success)
+            self.assertNotIn("abs", str(mutant))
+            self.assertIn("ite", str(mutant))
+            typecheck(mutant, glbls)
+
+    def test_candidate_index_update(self):
+        script, glbls = parse_file(
+            "tests/unit/impbased/number-relation-shift-2.smt2", silent=True
+        )
+        typecheck(script, glbls)
+
+        random.seed(17)
+        generator = ImplicationBasedWeakeningStrengthening(
+            script, glbls, MockArgs("sat", rule_set="all")
+        )
+        for _ in range(10):
+            generator.mutate()
+            rebuilt = CandidateIndex.build(generator.script, generator.oracle)
+            for rule in generator.rules:
+                self.assertEqual(
+                    generator.index.candidates(rule), rebuilt.candidates(rule)
+                )
+
+    def test_term_pool(self):
+        script, glbls = parse_str(
+            """\
+(declare-const x Int)
+(declare-const y Int)
+(declare-const s String)
+(assert (forall ((z Int)) (> (+ x z) (str.len s))))
+(assert (let ((a (+ x 1))) (and (= a y) (< x (str.len s)))))
+"""
+        )
+        typecheck(script, glbls)
+        formulas = [cmd.term for cmd in script.commands if isinstance(cmd, Assert)]
+        pool = TermPool(formulas, glbls)
+
+        def subterms(term):
+            yield term
+            for sub in term.subterms or []:
+                yield from subterms(sub)
+
+        for sort in ["Bool", "Int", "String"]:
+            for unfree in [None] + list(glbls.keys()):
+                expected = [
+                    t
+                    for f in formulas
+                    for t in subterms(f)
+                    if t.type == sort
+                    and set(t.free_variables()) <= set(glbls)
+                    and unfree not in t.free_variables()
+                ]
+                self.assertEqual(
+                    [id(t) for t in pool.candidates(sort, unfree)],
+                    [id(t) for t in expected],
+                )
 
 
 def test_case(name, ruleName, oracle, num_candidates, chosen_candidates):